@@ -0,0 +1,110 @@
+"""
+Crash-safe file writes.
+
+Files are written to a temporary file in the same directory, flushed and
+fsynced, then renamed over the target, so a kill or power loss leaves either
+the old or the new content, never a truncated file.
+"""
+
+import os
+import json
+import stat
+import tempfile
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, single process only
+    fcntl = None
+
+
+def _current_umask():
+    # os.umask can only be read by setting it; done once at import, before
+    # any worker threads create files
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+UMASK = _current_umask()
+
+
+def atomic_write(path, data, mode='w'):
+    """
+    Replace a file's content atomically.
+
+    The file keeps its permissions; a new file gets the usual 0666 minus
+    umask (mkstemp alone would leave it 0600).
+
+    Args:
+        path: Target file path
+        data: str (mode 'w') or bytes (mode 'wb')
+        mode: 'w' or 'wb'
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, mode) as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, _file_mode(path))
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    _fsync_directory(directory)
+
+
+def write_json(path, obj, **kwargs):
+    """Serialize obj and write it to path atomically (kwargs go to json.dumps)."""
+    atomic_write(path, json.dumps(obj, **kwargs))
+
+
+def append_line(path, line):
+    """Append one line and fsync, for append-only logs."""
+    with open(path, 'a') as f:
+        f.write(line + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+
+
+@contextmanager
+def file_lock(path):
+    """
+    Hold an exclusive advisory lock on `path`.lock, for read-modify-write
+    updates of a file shared between processes.
+    """
+    with open(path + '.lock', 'a') as lock:
+        if fcntl:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+
+def _file_mode(path):
+    """Permission bits of the existing file, or the default for a new one."""
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        return 0o666 & ~UMASK
+
+
+def _fsync_directory(directory):
+    """Persist the rename itself (POSIX only; a no-op where unsupported)."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except (OSError, AttributeError):
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
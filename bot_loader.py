@@ -0,0 +1,20 @@
+import os
+import importlib.util
+
+BOT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "solana-hype-bot.py")
+
+
+def load_bot_module():
+    """
+    Import solana-hype-bot.py (not a valid module name).
+
+    Each call executes the file again, so module-level settings can be
+    changed on the returned module without affecting other callers.
+
+    Returns:
+        module: The bot module
+    """
+    spec = importlib.util.spec_from_file_location("bot", BOT_FILE)
+    bot_module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(bot_module)
+    return bot_module
@@ -0,0 +1,193 @@
+"""
+LLM spend and latency budget.
+
+Tracks HTTP requests (GrokClient retries included), tokens and wall time
+spent generating each tweet and each day for the account, and degrades
+generation in stages as the day's budget runs out:
+
+    normal          full attempts, simpler-prompt retries
+    fewer_attempts  fewer attempts, no simpler-prompt retries
+    cheap_model     as above, with BUDGET_CHEAP_MODEL (skipped if unset)
+    cached_drafts   bulk drafts first, the LLM only once none are left
+    offline         no LLM calls: bulk drafts, then the local fallback pool
+
+Per-tweet limits stop the attempts for one tweet early (the tweet then comes
+from cached drafts or the fallback pool), so a degraded provider costs at
+most the per-tweet budget instead of 10 attempts x 3 retries.
+"""
+
+import json
+import time
+
+STAGES = ('normal', 'fewer_attempts', 'cheap_model', 'cached_drafts', 'offline')
+STAGE_NORMAL, STAGE_FEWER_ATTEMPTS, STAGE_CHEAP_MODEL, STAGE_CACHED_DRAFTS, STAGE_OFFLINE = range(len(STAGES))
+# Share of the daily budget used at which each stage after normal starts
+STAGE_THRESHOLDS = (0.5, 0.7, 0.85, 1.0)
+USAGE_KEYS = ('requests', 'tokens', 'seconds')
+
+
+def load_draft_texts(path):
+    """
+    Read drafts written by bulk_generate.py.
+
+    Returns:
+        list: Draft texts in file order (empty if the file is missing)
+    """
+    texts = []
+    try:
+        with open(path, 'r') as f:
+            for line in f:
+                try:
+                    texts.append(json.loads(line)['text'])
+                except (json.JSONDecodeError, KeyError, TypeError):
+                    continue
+    except FileNotFoundError:
+        pass
+    return texts
+
+
+class BudgetGovernor:
+    """
+    Caps LLM requests, tokens and wall time per tweet and per day.
+    """
+
+    def __init__(self, grok_client, clock, tweet_limits, day_limits, cheap_model=None, reduced_attempts=3):
+        """
+        Initialize governor.
+
+        Args:
+            grok_client: GrokClient whose total_usage is metered
+            clock: Time source for the current day
+            tweet_limits: {'requests', 'tokens', 'seconds'} per tweet (0 = no limit)
+            day_limits: {'requests', 'tokens', 'seconds'} per day (0 = no limit)
+            cheap_model: Model to switch to in the cheap_model stage (optional)
+            reduced_attempts: Generation attempts from the fewer_attempts stage on
+        """
+        self.grok_client = grok_client
+        self.clock = clock
+        self.tweet_limits = tweet_limits
+        self.day_limits = day_limits
+        self.cheap_model = cheap_model
+        self.reduced_attempts = reduced_attempts
+
+        self.date = clock.now().date()
+        self.day = dict.fromkeys(USAGE_KEYS, 0)
+        # Spend not yet written to the day state; kept across reloads so a
+        # compare-and-set conflict adds it to the other worker's totals
+        self.unsaved = dict.fromkeys(USAGE_KEYS, 0)
+        self.tweet = dict.fromkeys(USAGE_KEYS, 0)
+        self.last_stage = STAGE_NORMAL
+        self._snapshot = None
+
+    def load(self, spend):
+        """
+        Restore today's spend from the day state, plus our unsaved spend.
+
+        Args:
+            spend: Spend saved in the day state (ignored if from another day)
+        """
+        self._roll_day()
+        if not spend or spend.get('date') != self.date.isoformat():
+            spend = {}
+        self.day = {key: spend.get(key, 0) + self.unsaved[key] for key in USAGE_KEYS}
+
+    def to_dict(self):
+        """Today's spend for the day state."""
+        return {'date': self.date.isoformat(), **{key: round(self.day[key], 1) for key in USAGE_KEYS}}
+
+    def saved(self):
+        """Mark the spend from to_dict() as written to the day state."""
+        self.unsaved = dict.fromkeys(USAGE_KEYS, 0)
+
+    def _roll_day(self):
+        today = self.clock.now().date()
+        if today != self.date:
+            self.date = today
+            self.day = dict.fromkeys(USAGE_KEYS, 0)
+            self.unsaved = dict.fromkeys(USAGE_KEYS, 0)
+
+    def day_share(self):
+        """Largest share of any daily limit used so far (0.0 if none is set)."""
+        shares = [self.day[key] / limit for key, limit in self.day_limits.items() if limit]
+        return max(shares, default=0.0)
+
+    def stage(self):
+        """
+        Degrade stage for today's spend.
+
+        Returns:
+            int: Index into STAGES
+        """
+        self._roll_day()
+        share = self.day_share()
+        stage = sum(share >= threshold for threshold in STAGE_THRESHOLDS)
+        if stage == STAGE_CHEAP_MODEL and not self.cheap_model:
+            stage = STAGE_FEWER_ATTEMPTS
+        return stage
+
+    def begin_tweet(self):
+        """
+        Start metering one tweet.
+
+        Returns:
+            int: Degrade stage to generate it in
+        """
+        stage = self.stage()
+        if stage != self.last_stage:
+            print(f"[SPEND] Day budget at {self.day_share():.0%}, generation mode: {STAGES[stage]}")
+            self.last_stage = stage
+        self.tweet = dict.fromkeys(USAGE_KEYS, 0)
+        self._snapshot = self._usage()
+        return stage
+
+    def _usage(self):
+        usage = self.grok_client.total_usage
+        return {
+            'requests': usage['requests'],
+            'tokens': usage['input_tokens'] + usage['output_tokens'],
+            'seconds': time.monotonic(),
+        }
+
+    def update(self):
+        """Add spend since the last update to the tweet and day totals."""
+        if self._snapshot is None:
+            return
+        usage = self._usage()
+        for key in USAGE_KEYS:
+            delta = usage[key] - self._snapshot[key]
+            self.tweet[key] += delta
+            self.day[key] += delta
+            self.unsaved[key] += delta
+        self._snapshot = usage
+
+    def _remaining(self, key):
+        """Requests/tokens/seconds left for this tweet (None = unlimited)."""
+        left = [limits[key] - used[key] for limits, used in ((self.tweet_limits, self.tweet), (self.day_limits, self.day))
+                if limits.get(key)]
+        return min(left, default=None)
+
+    def allow_attempt(self):
+        """Whether another generation attempt fits the tweet and day budgets."""
+        self.update()
+        return all(remaining is None or remaining > 0 for remaining in map(self._remaining, USAGE_KEYS))
+
+    def max_attempts(self, stage, default):
+        """Generation attempts for a tweet in the given stage."""
+        return default if stage == STAGE_NORMAL else min(default, self.reduced_attempts)
+
+    def max_retries(self, default=3):
+        """GrokClient retries that fit the remaining request budget (at least 1)."""
+        remaining = self._remaining('requests')
+        return default if remaining is None else max(1, min(default, int(remaining)))
+
+    def model(self, stage, default):
+        """Model to generate with in the given stage."""
+        return self.cheap_model if stage >= STAGE_CHEAP_MODEL and self.cheap_model else default
+
+    def end_tweet(self):
+        """Finish metering the current tweet and log its spend."""
+        self.update()
+        self._snapshot = None
+        if self.tweet['requests']:
+            print(f"[SPEND] Tweet: {self.tweet['requests']} requests, {self.tweet['tokens']} tokens, "
+                  f"{self.tweet['seconds']:.1f}s | day: {self.day_share():.0%} used")
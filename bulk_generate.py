@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Bulk pre-generation of draft tweets for campaign review.
+
+API calls run concurrently through an asyncio layer (GrokClient calls are
+dispatched to a bounded thread pool), while CPU work (cleaning, linting,
+scoring, fingerprinting) runs in a process pool. Accepted drafts stream to a
+JSON Lines file as they complete, and every processed job is recorded in a
+checkpoint file so an interrupted run resumes where it left off. Jobs that
+fail with an API error are not checkpointed and are retried on resume.
+
+Examples:
+    python bulk_generate.py --count 2000 --output drafts/week42.jsonl
+    python bulk_generate.py --count 500 --categories product_spotlight --products Velcro,BitNova
+    python bulk_generate.py --count 2000 --output drafts/week42.jsonl   # resume after a crash
+"""
+
+import os
+import sys
+import json
+import random
+import asyncio
+import argparse
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dotenv import load_dotenv
+
+from grok_client import GrokClient
+from knowledge_base import NovaStaqKnowledgeBase
+from prompt_builder import PromptBuilder
+from bot_loader import load_bot_module
+from history_store import fingerprint
+from tweet_rules import LENGTH_TYPES, clean_tweet, lint_tweet, score_tweet
+from token_budget import max_tokens_for_length
+
+load_dotenv()
+
+HF_TOKEN = os.getenv('HF_TOKEN')
+HF_MODEL = os.getenv('HF_MODEL', 'meta-llama/Llama-3.3-70B-Instruct')
+HF_TEMPERATURE = float(os.getenv('HF_TEMPERATURE', '0.7'))
+HF_MAX_TOKENS = int(os.getenv('HF_MAX_TOKENS', '150'))
+PROMPT_TOKEN_BUDGET = int(os.getenv('PROMPT_TOKEN_BUDGET', '900')) or None
+
+
+def read_complete_lines(path):
+    """
+    Read the newline-terminated lines of a file.
+
+    A crash mid-write leaves a partial last line; it is cut off the file so
+    appends on resume start on a fresh line.
+
+    Returns:
+        list: Complete lines (empty if the file is missing)
+    """
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return []
+
+    end = data.rfind(b'\n') + 1
+    if end < len(data):
+        print(f"[WARN] Dropping partial last line of {path}")
+        with open(path, 'r+b') as f:
+            f.truncate(end)
+    return data[:end].decode('utf-8', errors='replace').splitlines()
+
+
+def process_batch(items):
+    """
+    Clean, lint, score and fingerprint a batch of raw generations.
+
+    Runs in a worker process, so it only takes and returns plain data.
+
+    Args:
+        items: List of (job dict, raw tweet text) tuples
+
+    Returns:
+        list: Result dicts with cleaned text, violations, score, fingerprint
+    """
+    results = []
+    for job, raw in items:
+        tweet = clean_tweet(raw)
+        results.append({
+            'job': job,
+            'text': tweet,
+            'violations': lint_tweet(tweet),
+            'score': round(score_tweet(tweet, job['length_type']), 3),
+            'fp': fingerprint(tweet) if tweet else None,
+        })
+    return results
+
+
+class BulkGenerator:
+    """
+    Generates draft tweets in bulk with resumable, streaming output.
+    """
+
+    def __init__(self, output_path, categories=None, products=None, length_types=None,
+                 concurrency=8, workers=None, batch_size=16, seed=0):
+        """
+        Initialize bulk generator.
+
+        Args:
+            output_path: JSON Lines file for accepted drafts
+            categories: Category names to draw from (default: all, by weight)
+            products: Product names to focus on (default: any, 25% of the time)
+            length_types: Length types to draw from (default: all)
+            concurrency: Maximum in-flight API calls
+            workers: Process pool size for CPU work (default: CPU count)
+            batch_size: Generations per process pool task
+            seed: Seed for job planning, so a resumed run plans the same jobs
+        """
+        self.output_path = output_path
+        self.checkpoint_path = output_path + '.ckpt'
+        self.concurrency = concurrency
+        self.workers = workers
+        self.batch_size = batch_size
+        self.seed = seed
+
+        self.kb = NovaStaqKnowledgeBase()
+        self.prompt_builder = PromptBuilder(self.kb)
+        self.grok_client = GrokClient(
+            api_key=HF_TOKEN,
+            model=HF_MODEL,
+            temperature=HF_TEMPERATURE,
+            max_tokens=HF_MAX_TOKENS
+        )
+
+        self.categories = [self.kb.get_category_by_name(name) for name in categories] if categories else self.kb.get_all_categories()
+        self.products = [self.kb.get_product_by_name(name) for name in products] if products else None
+        self.length_types = length_types or LENGTH_TYPES
+        if None in self.categories or (self.products and None in self.products):
+            raise ValueError("Unknown category or product name")
+        unknown = set(self.length_types) - set(LENGTH_TYPES)
+        if unknown:
+            raise ValueError(f"Unknown length type(s): {', '.join(sorted(unknown))} "
+                             f"(choose from {', '.join(LENGTH_TYPES)})")
+
+        # The bot's own history (STATE_BACKEND), read-only: drafts are not posts
+        self.history = load_bot_module().create_state_backend(read_only=True).history
+        self.seen = set()
+        self.stats = {'accepted': 0, 'rejected': 0, 'errors': 0}
+
+    def plan_job(self, index):
+        """
+        Deterministically plan the parameters of one generation job.
+
+        Args:
+            index: Job index
+
+        Returns:
+            dict: Job with index, category, length_type and product names
+        """
+        rng = random.Random(f"{self.seed}:{index}")
+        weights = [cat.get('weight', 1.0) for cat in self.categories]
+        category = rng.choices(self.categories, weights=weights, k=1)[0]
+
+        product = None
+        if self.products:
+            product = rng.choice(self.products)
+        elif category['name'] == 'product_spotlight' or rng.random() < 0.25:
+            product = rng.choice(self.kb.get_all_products())
+
+        return {
+            'index': index,
+            'category': category['name'],
+            'length_type': rng.choice(self.length_types),
+            'product': product['name'] if product else None,
+        }
+
+    def load_checkpoint(self):
+        """
+        Load processed job indices and fingerprints of accepted drafts.
+
+        Returns:
+            set: Indices of jobs already processed
+        """
+        done = {int(line) for line in read_complete_lines(self.checkpoint_path) if line.strip()}
+        for line in read_complete_lines(self.output_path):
+            try:
+                self.seen.add(int(json.loads(line)['fp'], 16))
+            except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+                continue
+        return done
+
+    def _generate(self, job):
+        """Build prompts for a job and call the API (runs in a thread)."""
+        category = self.kb.get_category_by_name(job['category'])
+        product = self.kb.get_product_by_name(job['product']) if job['product'] else None
+        system_prompt, user_prompt = self.prompt_builder.build_prompts(
+            category=category,
+            length_type=job['length_type'],
+            product=product,
+            token_budget=PROMPT_TOKEN_BUDGET
+        )
+        return self.grok_client.generate_tweet(
+            system_prompt, user_prompt,
+            max_tokens=max_tokens_for_length(job['length_type'])
+        )
+
+    async def _fetch(self, job, semaphore, executor):
+        async with semaphore:
+            loop = asyncio.get_running_loop()
+            try:
+                raw = await loop.run_in_executor(executor, self._generate, job)
+                return job, raw
+            except Exception as e:
+                print(f"[ERROR] Job {job['index']}: {e}")
+                return job, None
+
+    def _write_results(self, results, output, checkpoint):
+        """Dedup processed results, stream accepted drafts and checkpoint."""
+        for result in results:
+            job = result['job']
+            if result['text'] and not result['violations'] and result['fp'] not in self.seen \
+                    and result['text'] not in self.history:
+                self.seen.add(result['fp'])
+                output.write(json.dumps({
+                    'text': result['text'],
+                    'fp': format(result['fp'], '016x'),
+                    'score': result['score'],
+                    'category': job['category'],
+                    'length_type': job['length_type'],
+                    'product': job['product'],
+                    'job': job['index'],
+                    'generated_at': datetime.now().isoformat(),
+                }) + '\n')
+                self.stats['accepted'] += 1
+            else:
+                self.stats['rejected'] += 1
+            checkpoint.write(f"{job['index']}\n")
+
+        output.flush()
+        checkpoint.flush()
+
+    async def run(self, count):
+        """
+        Generate drafts for jobs 0..count-1 not already checkpointed.
+
+        Args:
+            count: Total number of generation jobs for this batch
+        """
+        done = self.load_checkpoint()
+        pending = [self.plan_job(i) for i in range(count) if i not in done]
+        print(f"[BULK] {len(pending)} jobs pending ({len(done)} already done)")
+        if not pending:
+            return
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.output_path)), exist_ok=True)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        loop = asyncio.get_running_loop()
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as io_pool, \
+                ProcessPoolExecutor(max_workers=self.workers) as cpu_pool, \
+                open(self.output_path, 'a') as output, \
+                open(self.checkpoint_path, 'a') as checkpoint:
+
+            tasks = [asyncio.ensure_future(self._fetch(job, semaphore, io_pool)) for job in pending]
+            batch = []
+            processing = []
+
+            for finished in asyncio.as_completed(tasks):
+                job, raw = await finished
+                if raw is None:
+                    self.stats['errors'] += 1
+                    continue
+
+                batch.append((job, raw))
+                if len(batch) >= self.batch_size:
+                    processing.append(loop.run_in_executor(cpu_pool, process_batch, batch))
+                    batch = []
+
+                # Write out CPU results as they finish without blocking fetches
+                still_processing = []
+                for future in processing:
+                    if future.done():
+                        self._write_results(future.result(), output, checkpoint)
+                    else:
+                        still_processing.append(future)
+                processing = still_processing
+
+            if batch:
+                processing.append(loop.run_in_executor(cpu_pool, process_batch, batch))
+            for future in processing:
+                self._write_results(await future, output, checkpoint)
+
+        print(f"[BULK] Accepted: {self.stats['accepted']}, "
+              f"rejected: {self.stats['rejected']}, errors: {self.stats['errors']}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Bulk-generate draft tweets to JSON Lines")
+    parser.add_argument('--count', type=int, required=True,
+                        help="Number of generation jobs in the batch")
+    parser.add_argument('--output', default='drafts.jsonl',
+                        help="Output JSON Lines file (checkpoint is <output>.ckpt)")
+    parser.add_argument('--categories', help="Comma-separated category names")
+    parser.add_argument('--products', help="Comma-separated product names")
+    parser.add_argument('--length-types', help="Comma-separated length types")
+    parser.add_argument('--concurrency', type=int, default=8,
+                        help="Maximum concurrent API calls")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Process pool size for cleaning/linting/scoring")
+    parser.add_argument('--seed', type=int, default=0,
+                        help="Job planning seed (keep it fixed when resuming)")
+    return parser.parse_args()
+
+
+def split_list(value):
+    return [item.strip() for item in value.split(',') if item.strip()] if value else None
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    if not HF_TOKEN:
+        print("[ERROR] Missing Hugging Face API token!")
+        sys.exit(1)
+
+    try:
+        generator = BulkGenerator(
+            output_path=args.output,
+            categories=split_list(args.categories),
+            products=split_list(args.products),
+            length_types=split_list(args.length_types),
+            concurrency=args.concurrency,
+            workers=args.workers,
+            seed=args.seed
+        )
+    except ValueError as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+    asyncio.run(generator.run(args.count))
@@ -0,0 +1,54 @@
+import threading
+from datetime import datetime, timedelta
+
+
+class SystemClock:
+    """Wall-clock time and real, interruptible sleeping."""
+
+    def __init__(self):
+        self.wake = threading.Event()
+
+    def now(self):
+        return datetime.now()
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            self.wake.wait(seconds)
+
+    def interrupt(self):
+        """End the current sleep and make later sleeps return at once (shutdown)."""
+        self.wake.set()
+
+
+class VirtualClock:
+    """
+    Simulated clock: sleeping advances time instantly.
+
+    Lets the scheduler run through days of operation (rollovers, quiet hours,
+    daily quotas) in milliseconds.
+    """
+
+    def __init__(self, start=None):
+        """
+        Initialize virtual clock.
+
+        Args:
+            start: Starting datetime (default: now)
+        """
+        self.current = start or datetime.now()
+        self.slept = 0.0
+
+    def now(self):
+        return self.current
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            self.current += timedelta(seconds=seconds)
+            self.slept += seconds
+
+    def interrupt(self):
+        """Sleeps are already instant."""
+
+    def advance(self, **kwargs):
+        """Move time forward by a timedelta given as keyword arguments."""
+        self.current += timedelta(**kwargs)
@@ -0,0 +1,203 @@
+"""
+Offline fallback tweets.
+
+When the LLM is unavailable the bot still needs fresh, on-brand tweets. A
+small template engine combines knowledge base facts (products, features,
+use cases, tech highlights, whitepaper insights, market data, problems and
+advantages) into a large pool of candidates. Only candidates that pass the
+tweet rules (clean, lint-free, within length limits) are kept.
+
+The pool is built once per knowledge bundle (see knowledge_bundle.py), in a
+fixed order that cycles through the templates in shuffled order, so
+consecutive tweets vary in product and template.
+At run time FallbackPool indexes the candidates not yet in history and
+serves the next one in O(1).
+"""
+
+import random
+import re
+from itertools import combinations
+
+from tweet_rules import clean_tweet, lint_tweet
+
+LAST_RESORT_TWEET = "Building the future of decentralized payments in Africa."
+
+# Leading words that keep their capital mid-sentence
+PROPER_NOUNS = ('Africa', 'Solana', 'Web2', 'Web3', 'Novastaq')
+
+# Words too common to tie two facts to the same topic
+STOPWORDS = frozenset((
+    'a', 'an', 'and', 'are', 'as', 'both', 'but', 'by', 'for', 'from', 'how', 'in', 'is', 'it', 'more',
+    'not', 'of', 'on', 'one', 'or', 'than', 'the', 'to', 'under', 'with',
+    'global', 'globally', 'infrastructure', 'markets',
+))
+
+# Templates per product: {product}, {tagline}, {feature}, {feature2},
+# {use_case}, {highlight}, {insight}. Templates that put two facts side by
+# side ({use_case} and {highlight}, {insight} and {market}/{advantage}) only
+# pair facts on the same topic (see _related).
+PRODUCT_TEMPLATES = (
+    "{product} is a {tagline}. {Feature} and {feature2}, built for how Africa actually pays.",
+    "{Use_case} should not be hard. {product} handles it with {highlight}.",
+    "{Insight}. That is why {product} focuses on {use_case}.",
+    "What {product} brings to {use_case}: {feature}, {feature2} and {highlight}.",
+)
+
+# Company-level templates: {problem}, {insight}, {market}, {advantage}
+COMPANY_TEMPLATES = (
+    "{Problem}: still one of the biggest gaps in African finance. Novastaq is building the infrastructure to close it.",
+    "{Insight}. {Market}.",
+    "{Market}. Novastaq's edge: {advantage}.",
+    "{Insight}. Novastaq's answer: {advantage}.",
+)
+
+
+def _lower_first(text):
+    """Lowercase a leading capital unless the word is an acronym or brand (P2P, WhatsApp)."""
+    word = text.split(' ', 1)[0]
+    if word.startswith(PROPER_NOUNS):
+        return text
+    if len(word) > 1 and word[0].isupper() and word[1:].islower():
+        return text[0].lower() + text[1:]
+    return text
+
+
+def _topics(text):
+    """Word stems of a fact, for matching facts on the same topic."""
+    return {word[:6] for word in re.findall(r'[a-z0-9]+', text.lower()) if word not in STOPWORDS}
+
+
+def _related(a, b):
+    """True if two facts share a topic word (so they read well side by side)."""
+    return bool(_topics(a) & _topics(b))
+
+
+def _sentence(text):
+    return text.strip().rstrip('.')
+
+
+def _fill(template, product=None, **values):
+    """
+    Format a template. Lowercase slot names get mid-sentence casing,
+    Capitalized ones sentence casing; the product name is kept as is.
+    """
+    slots = {'product': product}
+    for name, value in values.items():
+        value = _sentence(value)
+        slots[name] = _lower_first(value)
+        slots[name.capitalize()] = value[0].upper() + value[1:] if value else value
+    return template.format(**slots)
+
+
+def _interleave(groups, rng):
+    """Shuffle each group, then take one from each in turn for variety."""
+    for group in groups:
+        rng.shuffle(group)
+    merged = []
+    for i in range(max((len(g) for g in groups), default=0)):
+        merged.extend(g[i] for g in groups if i < len(g))
+    return merged
+
+
+def build_candidates(kb, seed=0, max_size=5000):
+    """
+    Build the fallback pool from a knowledge base.
+
+    Args:
+        kb: NovaStaqKnowledgeBase
+        seed: Shuffle seed (fixed, so the order is stable between runs)
+        max_size: Maximum number of candidates kept
+
+    Returns:
+        list: Valid, unique tweet texts in serving order
+    """
+    whitepaper = kb.whitepaper
+    insights = whitepaper.get('key_insights', [])
+    markets = list(whitepaper.get('market_opportunity', {}).values())
+    problems = whitepaper.get('core_problems', [])
+    advantages = whitepaper.get('competitive_advantages', [])
+
+    groups = [[] for _ in PRODUCT_TEMPLATES + COMPANY_TEMPLATES]
+    company = len(PRODUCT_TEMPLATES)
+    for product in kb.get_all_products():
+        name = product.get('name', '')
+        # Items that are lists themselves ("USDT, USDC and SOL") read badly in a list
+        features = [f for f in product.get('key_features', []) if ',' not in f]
+        use_cases = product.get('use_cases', [])
+        highlights = product.get('tech_highlights', [])
+        tagline = product.get('tagline', '')
+        for feature, feature2 in combinations(features, 2):
+            if tagline:
+                groups[0].append(_fill(PRODUCT_TEMPLATES[0], product=name, tagline=tagline,
+                                       feature=feature, feature2=feature2))
+            for use_case in use_cases:
+                for highlight in highlights:
+                    groups[3].append(_fill(PRODUCT_TEMPLATES[3], product=name, use_case=use_case,
+                                           feature=feature, feature2=feature2, highlight=highlight))
+        for use_case in use_cases:
+            for highlight in filter(lambda h: _related(use_case, h), highlights):
+                groups[1].append(_fill(PRODUCT_TEMPLATES[1], product=name, use_case=use_case, highlight=highlight))
+            for insight in insights:
+                groups[2].append(_fill(PRODUCT_TEMPLATES[2], product=name, use_case=use_case, insight=insight))
+
+    for problem in problems:
+        groups[company].append(_fill(COMPANY_TEMPLATES[0], problem=problem))
+    for insight in insights:
+        for market in filter(lambda m: _related(insight, m), markets):
+            groups[company + 1].append(_fill(COMPANY_TEMPLATES[1], insight=insight, market=market))
+        for advantage in filter(lambda a: _related(insight, a), advantages):
+            groups[company + 3].append(_fill(COMPANY_TEMPLATES[3], insight=insight, advantage=advantage))
+    for market in markets:
+        for advantage in advantages:
+            groups[company + 2].append(_fill(COMPANY_TEMPLATES[2], market=market, advantage=advantage))
+
+    seen = set()
+    for i, group in enumerate(groups):
+        valid = []
+        for text in group:
+            text = clean_tweet(text)
+            if text not in seen and not lint_tweet(text):
+                seen.add(text)
+                valid.append(text)
+        groups[i] = valid
+
+    return _interleave(groups, random.Random(seed))[:max_size]
+
+
+class FallbackPool:
+    """Serves pool candidates that are not in history yet."""
+
+    def __init__(self, candidates, history):
+        """
+        Args:
+            candidates: Candidate texts in serving order (see build_candidates)
+            history: Tweet history (anything supporting `in`)
+        """
+        self.candidates = candidates
+        self.history = history
+        self.unused = None
+
+    def __len__(self):
+        if self.unused is None:
+            self._index_unused()
+        return len(self.unused)
+
+    def _index_unused(self):
+        # Stored reversed so the next candidate is popped from the end
+        self.unused = [i for i in range(len(self.candidates) - 1, -1, -1)
+                       if self.candidates[i] not in self.history]
+
+    def next(self):
+        """
+        Take the next unused candidate.
+
+        Returns:
+            str or None: Tweet text, or None once the pool is exhausted
+        """
+        if self.unused is None:
+            self._index_unused()
+        while self.unused:
+            text = self.candidates[self.unused.pop()]
+            if text not in self.history:  # posted since the index was built
+                return text
+        return None
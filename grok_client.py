@@ -2,6 +2,9 @@ import requests
 import time
 import json
 
+from token_budget import estimator
+from replay import ReplayError
+
 
 class GrokClient:
     """
@@ -11,7 +14,7 @@ class GrokClient:
     Handles API communication with retry logic, rate limiting, and comprehensive error handling.
     """
 
-    def __init__(self, api_key, model="meta-llama/Llama-3.3-70B-Instruct", temperature=0.7, max_tokens=100, api_endpoint=None):
+    def __init__(self, api_key, model="meta-llama/Llama-3.3-70B-Instruct", temperature=0.7, max_tokens=100, api_endpoint=None, session=None, sleep=None):
         """
         Initialize LLM API client.
 
@@ -21,6 +24,10 @@ class GrokClient:
             temperature: Creativity level 0.0-1.0 (default: 0.7)
             max_tokens: Maximum tokens to generate (default: 100)
             api_endpoint: API endpoint URL (default: Hugging Face)
+            session: HTTP transport with a requests-style post() (default:
+                requests; see replay.py for recording/replaying sessions)
+            sleep: Function used for retry backoff (default: time.sleep;
+                the bot passes its clock's sleep so replays do not wait)
         """
         self.api_key = api_key
         self.model = model
@@ -28,15 +35,25 @@ class GrokClient:
         self.max_tokens = max_tokens
         self.api_endpoint = api_endpoint or "https://router.huggingface.co/v1/chat/completions"
         self.timeout = 60  # seconds (HF can be slower)
+        self.session = session or requests
+        self.sleep = sleep or time.sleep
+        self.last_usage = None
+        self.total_usage = {'calls': 0, 'requests': 0, 'input_tokens': 0, 'output_tokens': 0}
 
-    def generate_tweet(self, system_prompt, user_prompt, max_retries=3):
+    def generate_tweet(self, system_prompt, user_prompt, max_retries=3, max_tokens=None, model=None):
         """
         Generate a tweet using LLM API.
 
+        Token usage of the successful call is stored in last_usage and added
+        to total_usage; total_usage['requests'] counts every HTTP request,
+        retries included.
+
         Args:
             system_prompt: System instructions (brand voice, rules)
             user_prompt: Specific tweet request
             max_retries: Number of retry attempts on failure
+            max_tokens: Output token cap for this call (default: self.max_tokens)
+            model: Model for this call (default: self.model)
 
         Returns:
             str: Generated tweet text
@@ -51,15 +68,19 @@ class GrokClient:
 
         for retry_count in range(max_retries):
             try:
-                response = self._make_request(messages, retry_count)
+                self.total_usage['requests'] += 1
+                response = self._make_request(messages, retry_count, max_tokens, model)
 
                 # Extract tweet from response
                 if response and 'choices' in response and len(response['choices']) > 0:
                     tweet = response['choices'][0]['message']['content'].strip()
+                    self._record_usage(messages, tweet, response.get('usage'))
                     return tweet
                 else:
                     raise Exception("Invalid response structure from API")
 
+            except ReplayError:
+                raise  # cassette exhausted: retrying cannot help
             except Exception as e:
                 error_message = str(e)
 
@@ -68,18 +89,51 @@ class GrokClient:
                     wait_time = self._handle_api_error(error_message, retry_count)
                     if wait_time > 0:
                         print(f"   Waiting {wait_time}s before retry...")
-                        time.sleep(wait_time)
+                        self.sleep(wait_time)
                 else:
                     # Final attempt failed
                     raise Exception(f"LLM API failed after {max_retries} attempts: {error_message}")
 
-    def _make_request(self, messages, retry_count):
+    def _record_usage(self, messages, output, usage):
+        """
+        Record input/output tokens for a call.
+
+        Uses the counts reported by the API when present (and calibrates the
+        shared token estimator with them), otherwise estimates locally.
+
+        Args:
+            messages: Messages sent
+            output: Generated text
+            usage: 'usage' object from the API response, if any
+        """
+        input_chars = sum(len(m['content']) for m in messages)
+        if usage and usage.get('prompt_tokens'):
+            estimator.calibrate(input_chars, usage['prompt_tokens'])
+            self.last_usage = {
+                'input_tokens': usage['prompt_tokens'],
+                'output_tokens': usage.get('completion_tokens', estimator.estimate(output)),
+                'estimated': False
+            }
+        else:
+            self.last_usage = {
+                'input_tokens': sum(estimator.estimate(m['content']) for m in messages),
+                'output_tokens': estimator.estimate(output),
+                'estimated': True
+            }
+
+        self.total_usage['calls'] += 1
+        self.total_usage['input_tokens'] += self.last_usage['input_tokens']
+        self.total_usage['output_tokens'] += self.last_usage['output_tokens']
+
+    def _make_request(self, messages, retry_count, max_tokens=None, model=None):
         """
         Make HTTP request to Grok API.
 
         Args:
             messages: List of message objects
             retry_count: Current retry attempt number
+            max_tokens: Output token cap (default: self.max_tokens)
+            model: Model (default: self.model)
 
         Returns:
             dict: API response JSON
@@ -90,15 +144,15 @@ class GrokClient:
         }
 
         payload = {
-            "model": self.model,
+            "model": model or self.model,
             "messages": messages,
             "temperature": self.temperature,
-            "max_tokens": self.max_tokens,
+            "max_tokens": max_tokens or self.max_tokens,
             "stream": False
         }
 
         try:
-            response = requests.post(
+            response = self.session.post(
                 self.api_endpoint,
                 headers=headers,
                 json=payload,
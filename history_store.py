@@ -0,0 +1,284 @@
+import os
+import re
+import json
+import math
+import struct
+import bisect
+import hashlib
+from array import array
+
+from atomic_io import atomic_write, append_line
+
+
+def normalize_tweet(text):
+    """
+    Normalize tweet text for duplicate detection.
+
+    Lowercases, drops punctuation and collapses whitespace so trivial
+    variations of the same tweet map to the same fingerprint.
+
+    Args:
+        text: Tweet text
+
+    Returns:
+        str: Normalized text
+    """
+    text = re.sub(r'[^\w\s]', '', text.lower())
+    return ' '.join(text.split())
+
+
+def fingerprint(text):
+    """
+    Compute the 64-bit fingerprint of a tweet's normalized text.
+
+    Args:
+        text: Tweet text
+
+    Returns:
+        int: Unsigned 64-bit fingerprint
+    """
+    digest = hashlib.blake2b(normalize_tweet(text).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter keyed by 64-bit fingerprints.
+
+    Bit positions are derived from the fingerprint by double hashing, so no
+    extra hashing of the text is needed.
+    """
+
+    def __init__(self, capacity, error_rate=0.01, bits=None):
+        """
+        Initialize an empty filter sized for the given capacity.
+
+        Args:
+            capacity: Expected number of entries
+            error_rate: Target false positive rate at capacity
+            bits: Existing bit array (bytearray) to wrap
+        """
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(64, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bits if bits is not None else bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, fp):
+        h1 = fp & 0xFFFFFFFF
+        h2 = (fp >> 32) | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, fp):
+        for pos in self._positions(fp):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, fp):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(fp))
+
+
+class TweetHistory:
+    """
+    Compact tweet history for duplicate detection.
+
+    Membership is answered from memory using a Bloom filter (fast negative
+    path) and a sorted array of 64-bit fingerprints. Full tweet texts live in
+    an append-only JSON Lines cold store that is only read when a fingerprint
+    matches, to rule out hash collisions.
+
+    Files:
+        <path>      Cold store, one JSON record per line
+        <path>.idx  Bloom filter and sorted fingerprint table
+    """
+
+    INDEX_MAGIC = b'NSQH1'
+    INDEX_HEADER = struct.Struct('>5sQQdQ')  # magic, cold store size, capacity, error rate, count
+
+    def __init__(self, path='tweet_history.jsonl', legacy_path=None, capacity=10000, error_rate=0.01,
+                 read_only=False):
+        """
+        Initialize history and load (or rebuild) the index.
+
+        Args:
+            path: Cold store file path
+            legacy_path: Old JSON list history file to import on first run
+            capacity: Initial Bloom filter capacity (grows automatically)
+            error_rate: Bloom filter false positive rate at capacity
+            read_only: Never write the files (no legacy import, no index
+                file); add() must not be called
+        """
+        self.path = path
+        self.read_only = read_only
+        self.index_path = path + '.idx'
+        self.error_rate = error_rate
+        self.bloom = BloomFilter(capacity, error_rate)
+        self.fingerprints = array('Q')
+
+        if not read_only and not os.path.exists(self.path) and legacy_path and os.path.exists(legacy_path):
+            self._import_legacy(legacy_path)
+        if not read_only:
+            self._drop_torn_tail()
+
+        if not self._load_index():
+            self._rebuild_index()
+
+    def __len__(self):
+        return len(self.fingerprints)
+
+    def __contains__(self, text):
+        if not text:
+            return False
+        fp = fingerprint(text)
+        if fp not in self.bloom:
+            return False
+        i = bisect.bisect_left(self.fingerprints, fp)
+        if i == len(self.fingerprints) or self.fingerprints[i] != fp:
+            return False
+        return self._cold_store_contains(fp, normalize_tweet(text))
+
+    def __iter__(self):
+        """Iterate over stored tweet texts (reads the cold store)."""
+        for record in self._read_cold_store():
+            yield record['text']
+
+    def records(self):
+        """Iterate over full stored records (text plus extra fields)."""
+        return self._read_cold_store()
+
+    def add(self, text, **fields):
+        """
+        Record a tweet in history.
+
+        Args:
+            text: Tweet text
+            **fields: Extra data to keep with the record (e.g. tweet_id)
+        """
+        fp = fingerprint(text)
+        record = {'fp': format(fp, '016x'), 'text': text}
+        record.update(fields)
+        append_line(self.path, json.dumps(record))
+        self._index(fp)
+
+    def save(self):
+        """Write the Bloom filter and fingerprint table to the index file."""
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        header = self.INDEX_HEADER.pack(self.INDEX_MAGIC, size, self.bloom.capacity,
+                                        self.bloom.error_rate, len(self.fingerprints))
+        atomic_write(self.index_path, header + bytes(self.bloom.bits) + self.fingerprints.tobytes(), mode='wb')
+
+    def _index(self, fp):
+        i = bisect.bisect_left(self.fingerprints, fp)
+        if i < len(self.fingerprints) and self.fingerprints[i] == fp:
+            return
+        self.fingerprints.insert(i, fp)
+        if len(self.fingerprints) > self.bloom.capacity:
+            self._resize_bloom(self.bloom.capacity * 2)
+        else:
+            self.bloom.add(fp)
+
+    def _resize_bloom(self, capacity):
+        self.bloom = BloomFilter(capacity, self.error_rate)
+        for fp in self.fingerprints:
+            self.bloom.add(fp)
+
+    def _load_index(self):
+        """
+        Load the index file if it matches the current cold store.
+
+        Returns:
+            bool: True if loaded, False if missing or stale
+        """
+        try:
+            with open(self.index_path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return False
+
+        if len(data) < self.INDEX_HEADER.size:
+            return False
+        magic, size, capacity, error_rate, count = self.INDEX_HEADER.unpack_from(data)
+        cold_size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        if magic != self.INDEX_MAGIC or size != cold_size:
+            return False
+
+        bloom = BloomFilter(capacity, error_rate)
+        offset = self.INDEX_HEADER.size
+        bloom_bytes = len(bloom.bits)
+        if len(data) != offset + bloom_bytes + count * 8:
+            return False
+        bloom.bits = bytearray(data[offset:offset + bloom_bytes])
+
+        self.bloom = bloom
+        self.fingerprints = array('Q')
+        self.fingerprints.frombytes(data[offset + bloom_bytes:])
+        return True
+
+    def _rebuild_index(self):
+        """Rebuild the in-memory index from the cold store and persist it."""
+        fps = sorted({int(record['fp'], 16) for record in self._read_cold_store()})
+        self.fingerprints = array('Q', fps)
+        capacity = self.bloom.capacity
+        while capacity < len(fps):
+            capacity *= 2
+        self._resize_bloom(capacity)
+        if not self.read_only:
+            self.save()
+
+    def _drop_torn_tail(self):
+        """
+        Cut a partial last line (interrupted append) off the cold store.
+
+        Otherwise the next add() would be glued onto it and lost with it.
+        """
+        try:
+            with open(self.path, 'r+b') as f:
+                end = f.seek(0, os.SEEK_END)
+                pos = end
+                while pos > 0:
+                    start = max(0, pos - 4096)
+                    f.seek(start)
+                    newline = f.read(pos - start).rfind(b'\n')
+                    if newline >= 0:
+                        pos = start + newline + 1
+                        break
+                    pos = start
+                if pos < end:
+                    print(f"[WARN] Dropping partial last line of {self.path}")
+                    f.truncate(pos)
+        except FileNotFoundError:
+            return
+
+    def _read_cold_store(self):
+        try:
+            with open(self.path, 'r') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # torn final line from an interrupted append
+        except FileNotFoundError:
+            return
+
+    def _cold_store_contains(self, fp, normalized):
+        key = format(fp, '016x')
+        for record in self._read_cold_store():
+            if record['fp'] == key and normalize_tweet(record['text']) == normalized:
+                return True
+        return False
+
+    def _import_legacy(self, legacy_path):
+        """Import a JSON list of tweet texts into the cold store."""
+        try:
+            with open(legacy_path, 'r') as f:
+                texts = json.load(f)
+        except json.JSONDecodeError:
+            return
+
+        with open(self.path, 'a') as f:
+            for text in texts:
+                f.write(json.dumps({'fp': format(fingerprint(text), '016x'), 'text': text}) + '\n')
+        print(f"[OK] Imported {len(texts)} tweets from {legacy_path}")
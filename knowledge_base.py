@@ -2,55 +2,100 @@ import json
 import os
 import random
 
+from knowledge_index import KnowledgeIndex
+from knowledge_bundle import load_bundle
+from fallback_pool import build_candidates
+
 
 class NovaStaqKnowledgeBase:
     """
     Centralized knowledge management system for Novastaq content.
 
     Loads and provides access to products, brand voice, content categories,
-    and whitepaper data.
+    and whitepaper data. Knowledge is loaded lazily, the first time it is
+    needed, from the precompiled bundle (see knowledge_bundle.py), which is
+    rebuilt automatically when the JSON files change.
     """
 
-    def __init__(self, knowledge_dir="knowledge"):
+    # Section name -> (file name, top-level key or None for the whole document, default)
+    SECTION_FILES = {
+        'products': ("products.json", 'products', []),
+        'brand_voice': ("brand_voice.json", None, {}),
+        'categories': ("content_categories.json", 'categories', []),
+        'whitepaper': ("whitepaper_data.json", None, {}),
+    }
+
+    def __init__(self, knowledge_dir="knowledge", lazy=True, use_bundle=True):
         """
-        Initialize knowledge base and load all data.
+        Initialize knowledge base.
 
         Args:
             knowledge_dir: Directory containing JSON knowledge files
+            lazy: Load knowledge on first access instead of upfront
+            use_bundle: Load from the precompiled bundle; False reads each
+                JSON file directly, one section at a time
         """
         self.knowledge_dir = knowledge_dir
-        self.products = []
-        self.brand_voice = {}
-        self.categories = []
-        self.whitepaper = {}
-
-        self.load_all_data()
-
-    def load_all_data(self):
-        """Load all JSON knowledge files."""
+        self.use_bundle = use_bundle
+        self._sections = {}
+        self._index = None
+        self._bundle = None
+
+        if not lazy:
+            self.load_all_data()
+
+    @property
+    def products(self):
+        return self._get_section('products')
+
+    @property
+    def brand_voice(self):
+        return self._get_section('brand_voice')
+
+    @property
+    def categories(self):
+        return self._get_section('categories')
+
+    @property
+    def whitepaper(self):
+        return self._get_section('whitepaper')
+
+    def _get_section(self, section):
+        """Return a knowledge section, loading its file on first access."""
+        if section not in self._sections:
+            if self.use_bundle:
+                self._load_bundle()
+            else:
+                self._load_section(section)
+        return self._sections[section]
+
+    def _load_bundle(self):
+        """Load every section, the lookups and the index from the bundle."""
         try:
-            # Load products
-            with open(os.path.join(self.knowledge_dir, "products.json"), 'r') as f:
-                data = json.load(f)
-                self.products = data.get('products', [])
-                print(f"[OK] Loaded {len(self.products)} products")
+            self._bundle = load_bundle(self.knowledge_dir)
+        except FileNotFoundError as e:
+            print(f"[ERROR] Knowledge file not found: {e}")
+            raise
+        except json.JSONDecodeError as e:
+            print(f"[ERROR] Invalid JSON in knowledge file: {e}")
+            raise
+        except ValueError as e:
+            print(f"[ERROR] {e}")
+            raise
+        self._sections.update(self._bundle['sections'])
+        self._index = self._bundle['index']
 
-            # Load brand voice
-            with open(os.path.join(self.knowledge_dir, "brand_voice.json"), 'r') as f:
-                self.brand_voice = json.load(f)
-                print(f"[OK] Loaded brand voice guidelines")
+    def _load_section(self, section):
+        """
+        Load a single knowledge file into the section cache.
 
-            # Load content categories
-            with open(os.path.join(self.knowledge_dir, "content_categories.json"), 'r') as f:
+        Args:
+            section: Section name from SECTION_FILES
+        """
+        filename, key, default = self.SECTION_FILES[section]
+        try:
+            with open(os.path.join(self.knowledge_dir, filename), 'r') as f:
                 data = json.load(f)
-                self.categories = data.get('categories', [])
-                print(f"[OK] Loaded {len(self.categories)} content categories")
-
-            # Load whitepaper data
-            with open(os.path.join(self.knowledge_dir, "whitepaper_data.json"), 'r') as f:
-                self.whitepaper = json.load(f)
-                print(f"[OK] Loaded whitepaper data")
-
         except FileNotFoundError as e:
             print(f"[ERROR] Knowledge file not found: {e}")
             raise
@@ -58,6 +103,21 @@ class NovaStaqKnowledgeBase:
             print(f"[ERROR] Invalid JSON in knowledge file: {e}")
             raise
 
+        self._sections[section] = data.get(key, default) if key else data
+
+    def load_all_data(self):
+        """Load all knowledge now."""
+        if self.use_bundle:
+            self._load_bundle()
+        else:
+            for section in self.SECTION_FILES:
+                self._load_section(section)
+
+        print(f"[OK] Loaded {len(self.products)} products")
+        print(f"[OK] Loaded brand voice guidelines")
+        print(f"[OK] Loaded {len(self.categories)} content categories")
+        print(f"[OK] Loaded whitepaper data")
+
     def get_random_product(self):
         """
         Get a random product from the knowledge base.
@@ -79,7 +139,11 @@ class NovaStaqKnowledgeBase:
         Returns:
             dict: Product details or None if not found
         """
-        for product in self.products:
+        products = self.products
+        if self._bundle:
+            i = self._bundle['product_index'].get(name.lower())
+            return products[i] if i is not None else None
+        for product in products:
             if product['name'].lower() == name.lower():
                 return product
         return None
@@ -96,6 +160,9 @@ class NovaStaqKnowledgeBase:
         if not self.categories:
             return None
 
+        if self._bundle:
+            return random.choices(self.categories, cum_weights=self._bundle['category_cum_weights'], k=1)[0]
+
         # Extract weights
         weights = [cat.get('weight', 1.0) for cat in self.categories]
 
@@ -112,7 +179,11 @@ class NovaStaqKnowledgeBase:
         Returns:
             dict: Category details or None if not found
         """
-        for category in self.categories:
+        categories = self.categories
+        if self._bundle:
+            i = self._bundle['category_index'].get(name.lower())
+            return categories[i] if i is not None else None
+        for category in categories:
             if category['name'].lower() == name.lower():
                 return category
         return None
@@ -197,3 +268,50 @@ class NovaStaqKnowledgeBase:
             key = random.choice(list(market_data.keys()))
             return {key: market_data[key]}
         return None
+
+    def get_index(self):
+        """Retrieval index over product and whitepaper facts, built on first use."""
+        if self._index is None and self.use_bundle:
+            self._load_bundle()
+        if self._index is None:
+            self._index = KnowledgeIndex.from_knowledge_base(self)
+        return self._index
+
+    def get_fallback_candidates(self):
+        """
+        Offline fallback tweets (see fallback_pool.py), precomputed in the bundle.
+
+        Returns:
+            list: Candidate tweet texts in serving order
+        """
+        if self.use_bundle and self._bundle is None:
+            self._load_bundle()
+        if self._bundle:
+            return self._bundle['fallback_pool']
+        return build_candidates(self)
+
+    def get_system_sections(self):
+        """
+        Pre-rendered system prompt sections from the bundle.
+
+        Returns:
+            list or None: (section name, text) tuples, or None without a bundle
+        """
+        if self.use_bundle and self._bundle is None:
+            self._load_bundle()
+        return self._bundle['system_sections'] if self._bundle else None
+
+    def get_relevant_snippets(self, query, product_name=None, k=4, token_budget=120):
+        """
+        Get the knowledge snippets most relevant to a query.
+
+        Args:
+            query: Free text describing the tweet topic
+            product_name: Focus product; facts about other products are excluded
+            k: Maximum number of snippets
+            token_budget: Maximum estimated tokens across snippets
+
+        Returns:
+            list: Snippet texts, most relevant first
+        """
+        return self.get_index().search(query, product=product_name, k=k, token_budget=token_budget)
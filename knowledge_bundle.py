@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Precompiled knowledge bundle.
+
+Compiles the knowledge/ JSON files into one versioned pickle that holds
+everything derived from them: the validated sections, name lookups,
+category sampling weights, the retrieval index, the rendered system
+prompt sections and the offline fallback pool. Loading it is a single file read, so short-lived runs
+(cron, many accounts per host) skip JSON parsing, indexing and prompt
+rendering.
+
+The bundle records the size, mtime and sha256 of its sources (the knowledge
+files and the modules that derive data from them). A stat() of each source
+is enough when nothing changed; if any differs the hashes are compared and
+the bundle is rebuilt on a real change. When only the mtime moved (touch,
+checkout) the recorded stats are refreshed, so later runs are back on the
+stat()-only path.
+
+The bundle is built locally from files in this repository and is never
+meant to be shipped or downloaded: loading a pickle runs code.
+
+Examples:
+    python knowledge_bundle.py              # build (or confirm up to date)
+    python knowledge_bundle.py --check      # validate knowledge files only
+"""
+
+import os
+import sys
+import pickle
+import hashlib
+import argparse
+from itertools import accumulate
+
+from atomic_io import atomic_write
+
+BUNDLE_VERSION = 1
+BUNDLE_FILE = '.bundle.pickle'
+SOURCE_FILES = ("products.json", "brand_voice.json", "content_categories.json", "whitepaper_data.json")
+CODE_DIR = os.path.dirname(os.path.abspath(__file__))
+CODE_SOURCES = ("knowledge_bundle.py", "knowledge_index.py", "prompt_builder.py", "fallback_pool.py", "tweet_rules.py")
+
+
+def _source_paths(knowledge_dir):
+    return ([os.path.join(knowledge_dir, name) for name in SOURCE_FILES] +
+            [os.path.join(CODE_DIR, name) for name in CODE_SOURCES])
+
+
+def _sha256(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def source_manifest(knowledge_dir):
+    """
+    Describe the bundle's sources.
+
+    Returns:
+        dict: path -> [mtime_ns, size, sha256]
+    """
+    manifest = {}
+    for path in _source_paths(knowledge_dir):
+        stat = os.stat(path)
+        manifest[path] = [stat.st_mtime_ns, stat.st_size, _sha256(path)]
+    return manifest
+
+
+def is_current(bundle, knowledge_dir):
+    """
+    Check a loaded bundle against its sources.
+
+    Unchanged size and mtime count as unchanged; otherwise the content
+    hash decides (so a touch or checkout does not force a rebuild).
+    """
+    return _check_sources(bundle, knowledge_dir)[0]
+
+
+def _check_sources(bundle, knowledge_dir):
+    """
+    is_current(), also updating the manifest of sources that were only touched.
+
+    Returns:
+        tuple: (current, touched) - touched if a manifest entry got a new mtime
+    """
+    if bundle.get('version') != BUNDLE_VERSION:
+        return False, False
+    sources = bundle.get('sources', {})
+    paths = _source_paths(knowledge_dir)
+    if set(sources) != set(paths):
+        return False, False
+    touched = False
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return False, False
+        mtime_ns, size, digest = sources[path]
+        if (stat.st_mtime_ns, stat.st_size) == (mtime_ns, size):
+            continue
+        if stat.st_size != size or _sha256(path) != digest:
+            return False, False
+        sources[path] = [stat.st_mtime_ns, size, digest]
+        touched = True
+    return True, touched
+
+
+def validate(sections):
+    """
+    Check the knowledge sections against the schema the bot relies on.
+
+    Args:
+        sections: Section name -> data (see NovaStaqKnowledgeBase.SECTION_FILES)
+
+    Returns:
+        list: Problem descriptions (empty if valid)
+    """
+    problems = []
+
+    products = sections.get('products')
+    if not isinstance(products, list) or not products:
+        problems.append("products.json: 'products' must be a non-empty list")
+        products = []
+    for i, product in enumerate(products):
+        if not isinstance(product, dict) or not isinstance(product.get('name'), str) or not product['name']:
+            problems.append(f"products.json: product {i} needs a 'name'")
+            continue
+        for field in ('key_features', 'use_cases', 'tech_highlights'):
+            if not isinstance(product.get(field, []), list):
+                problems.append(f"products.json: {product['name']}.{field} must be a list")
+
+    categories = sections.get('categories')
+    if not isinstance(categories, list) or not categories:
+        problems.append("content_categories.json: 'categories' must be a non-empty list")
+        categories = []
+    for i, category in enumerate(categories):
+        if not isinstance(category, dict) or not isinstance(category.get('name'), str) or not category['name']:
+            problems.append(f"content_categories.json: category {i} needs a 'name'")
+            continue
+        weight = category.get('weight', 1.0)
+        if not isinstance(weight, (int, float)) or weight <= 0:
+            problems.append(f"content_categories.json: {category['name']}.weight must be a positive number")
+        if not isinstance(category.get('examples', []), list):
+            problems.append(f"content_categories.json: {category['name']}.examples must be a list")
+
+    for section, filename in (('brand_voice', 'brand_voice.json'), ('whitepaper', 'whitepaper_data.json')):
+        if not isinstance(sections.get(section), dict):
+            problems.append(f"{filename}: must be a JSON object")
+
+    names = [p['name'].lower() for p in products if isinstance(p, dict) and p.get('name')]
+    if len(names) != len(set(names)):
+        problems.append("products.json: duplicate product names")
+    names = [c['name'].lower() for c in categories if isinstance(c, dict) and c.get('name')]
+    if len(names) != len(set(names)):
+        problems.append("content_categories.json: duplicate category names")
+
+    return problems
+
+
+def build_bundle(knowledge_dir="knowledge"):
+    """
+    Compile the knowledge files into a bundle dict.
+
+    Raises:
+        ValueError: If the knowledge files fail validation
+    """
+    # Imported here: both modules import this one
+    from knowledge_base import NovaStaqKnowledgeBase
+    from knowledge_index import KnowledgeIndex
+    from prompt_builder import PromptBuilder
+    from fallback_pool import build_candidates
+
+    manifest = source_manifest(knowledge_dir)
+    kb = NovaStaqKnowledgeBase(knowledge_dir, use_bundle=False)
+    kb.load_all_data()
+    sections = {section: kb._get_section(section) for section in kb.SECTION_FILES}
+
+    problems = validate(sections)
+    if problems:
+        raise ValueError("Invalid knowledge files:\n  " + "\n  ".join(problems))
+
+    return {
+        'version': BUNDLE_VERSION,
+        'sources': manifest,
+        'sections': sections,
+        'product_index': {p['name'].lower(): i for i, p in enumerate(sections['products'])},
+        'category_index': {c['name'].lower(): i for i, c in enumerate(sections['categories'])},
+        'category_cum_weights': list(accumulate(c.get('weight', 1.0) for c in sections['categories'])),
+        'index': KnowledgeIndex.from_knowledge_base(kb),
+        'system_sections': PromptBuilder(kb).render_system_sections(),
+        'fallback_pool': build_candidates(kb),
+    }
+
+
+def load_bundle(knowledge_dir="knowledge", rebuild=True):
+    """
+    Load the bundle, rebuilding it when a source changed.
+
+    Args:
+        knowledge_dir: Directory containing the knowledge files
+        rebuild: Build and save a fresh bundle if missing or stale
+
+    Returns:
+        dict or None: Bundle, or None if stale and rebuild is False
+    """
+    path = os.path.join(knowledge_dir, BUNDLE_FILE)
+    try:
+        with open(path, 'rb') as f:
+            bundle = pickle.loads(f.read())
+        current, touched = _check_sources(bundle, knowledge_dir)
+        if current:
+            if touched:
+                _save_bundle(path, bundle, "Refreshed knowledge bundle manifest")
+            return bundle
+    except (FileNotFoundError, PermissionError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        pass
+
+    if not rebuild:
+        return None
+
+    bundle = build_bundle(knowledge_dir)
+    _save_bundle(path, bundle, "Built knowledge bundle")
+    return bundle
+
+
+def _save_bundle(path, bundle, message):
+    try:
+        atomic_write(path, pickle.dumps(bundle, protocol=pickle.HIGHEST_PROTOCOL), mode='wb')
+        print(f"[OK] {message} {path}")
+    except OSError as e:
+        # Read-only deployments still work, they just rebuild in memory
+        print(f"[WARN] Could not save knowledge bundle: {e}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Build the precompiled knowledge bundle")
+    parser.add_argument('--knowledge-dir', default="knowledge", help="Knowledge files directory")
+    parser.add_argument('--check', action='store_true', help="Validate the knowledge files and exit")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.check:
+        from knowledge_base import NovaStaqKnowledgeBase
+        kb = NovaStaqKnowledgeBase(args.knowledge_dir, use_bundle=False)
+        problems = validate({section: kb._get_section(section) for section in kb.SECTION_FILES})
+        for problem in problems:
+            print(f"[ERROR] {problem}")
+        print("[OK] Knowledge files valid" if not problems else f"[FAIL] {len(problems)} problems")
+        sys.exit(1 if problems else 0)
+
+    try:
+        bundle = load_bundle(args.knowledge_dir)
+    except ValueError as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+    print(f"[OK] Bundle v{bundle['version']}: {len(bundle['sections']['products'])} products, "
+          f"{len(bundle['sections']['categories'])} categories, {len(bundle['index'].snippets)} facts")
@@ -0,0 +1,148 @@
+import re
+import math
+import random
+from collections import Counter, defaultdict
+
+from token_budget import estimate_tokens
+
+
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'how', 'in',
+    'is', 'it', 'its', 'of', 'on', 'or', 'that', 'the', 'their', 'then', 'this',
+    'to', 'with', 'what', 'when', 'where', 'why', 'we', 'our', 'not', 'but',
+    'rather', 'than', 'about', 'into', 'them', 'they', 'you', 'your',
+}
+
+
+def tokenize(text):
+    """Lowercase word tokens without stopwords."""
+    return [t for t in re.findall(r'[a-z0-9]+', text.lower()) if t not in STOPWORDS and len(t) > 1]
+
+
+class KnowledgeIndex:
+    """
+    In-memory BM25 index over knowledge base snippets.
+
+    Snippets are short facts extracted from products and whitepaper data,
+    each tagged with its source and (for product facts) the product name.
+    """
+
+    def __init__(self, snippets, k1=1.5, b=0.75):
+        """
+        Build the index.
+
+        Args:
+            snippets: List of dicts with 'text', 'source' and optional 'product'
+            k1: BM25 term frequency saturation
+            b: BM25 length normalization
+        """
+        self.snippets = snippets
+        self.k1 = k1
+        self.b = b
+        self.postings = defaultdict(list)
+        self.doc_lengths = []
+
+        for i, snippet in enumerate(snippets):
+            terms = Counter(tokenize(snippet['text'] + ' ' + snippet['source'].replace('_', ' ')))
+            self.doc_lengths.append(sum(terms.values()))
+            for term, tf in terms.items():
+                self.postings[term].append((i, tf))
+
+        self.avg_length = sum(self.doc_lengths) / len(self.doc_lengths) if self.doc_lengths else 0
+        num_docs = len(snippets)
+        self.idf = {
+            term: math.log(1 + (num_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self.postings.items()
+        }
+
+    @classmethod
+    def from_knowledge_base(cls, kb):
+        """
+        Extract snippets from a knowledge base and index them.
+
+        Args:
+            kb: NovaStaqKnowledgeBase instance
+
+        Returns:
+            KnowledgeIndex: Index over product and whitepaper facts
+        """
+        snippets = []
+
+        for product in kb.get_all_products():
+            name = product.get('name', '')
+            for field in ('tagline', 'description'):
+                if product.get(field):
+                    snippets.append({'text': f"{name}: {product[field]}", 'source': f"products.{field}", 'product': name})
+            for field in ('key_features', 'use_cases', 'tech_highlights'):
+                for item in product.get(field, []):
+                    snippets.append({'text': f"{name}: {item}", 'source': f"products.{field}", 'product': name})
+
+        for section, value in kb.whitepaper.items():
+            snippets.extend(cls._flatten(section, value))
+
+        return cls(snippets)
+
+    @classmethod
+    def _flatten(cls, source, value):
+        """Turn a whitepaper section into one snippet per fact."""
+        if isinstance(value, str):
+            return [{'text': value, 'source': source}]
+        if isinstance(value, list):
+            return [{'text': item, 'source': source} for item in value if isinstance(item, str)]
+        if isinstance(value, dict):
+            snippets = []
+            for key, item in value.items():
+                label = key.replace('_', ' ').capitalize()
+                if isinstance(item, str):
+                    snippets.append({'text': f"{label}: {item}", 'source': f"{source}.{key}"})
+                elif isinstance(item, list) and all(isinstance(x, str) for x in item):
+                    snippets.append({'text': f"{label}: {', '.join(item)}", 'source': f"{source}.{key}"})
+                else:
+                    snippets.extend(cls._flatten(f"{source}.{key}", item))
+            return snippets
+        return []
+
+    def search(self, query, product=None, k=4, token_budget=120, diversity=2):
+        """
+        Select the most relevant snippets for a query within a token budget.
+
+        Args:
+            query: Free text (category description, product details)
+            product: Product name; facts about other products are excluded
+            k: Maximum number of snippets
+            token_budget: Maximum estimated tokens across selected snippets
+            diversity: Sample k snippets from the top k * diversity so
+                repeated queries do not always produce the same context
+
+        Returns:
+            list: Snippet texts, most relevant first
+        """
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for i, tf in self.postings[term]:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[i] / self.avg_length)
+                scores[i] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        ranked = [
+            (score, i) for i, score in scores.items()
+            if self.snippets[i].get('product') in (None, product)
+        ]
+        ranked.sort(reverse=True)
+
+        candidates = ranked[:k * diversity]
+        if len(candidates) > k:
+            candidates = sorted(random.sample(candidates, k), reverse=True)
+
+        selected = []
+        used = 0
+        for _, i in candidates:
+            text = self.snippets[i]['text']
+            cost = estimate_tokens(text)
+            if used + cost > token_budget:
+                continue
+            selected.append(text)
+            used += cost
+        return selected
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Engagement metrics collector.
+
+Reads public metrics (likes, retweets, replies, quotes, impressions) for
+posted tweets back from Twitter and stores them as a time series in the
+state backend, next to tweet history.
+
+Tweets are refreshed on an age-based schedule: every 15 minutes in the first
+hour, then hourly, every 3 hours after 6 hours and daily after a day. A
+final sample is taken at 7 days. It feeds the tweet's category/length/product
+combination into the sampling bandit, once per tweet, and the tweet is not
+read again. Due tweets are fetched with one lookup call per 100 ids, so
+even several accounts stay far below read rate limits.
+
+Examples:
+    python metrics_collector.py --once           # refresh what is due, exit
+    python metrics_collector.py --interval 900   # keep collecting
+    python metrics_collector.py --report         # engagement by hour and category
+"""
+
+import argparse
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import tweepy
+from dotenv import load_dotenv
+
+from bot_loader import load_bot_module
+from clock import SystemClock
+from state_backend import METRIC_FIELDS
+from sampling_bandit import SamplingBandit
+
+load_dotenv()
+
+BATCH_SIZE = 100  # ids per get_tweets call (API maximum)
+FINAL_AGE = timedelta(days=7)
+# (tweet younger than, refresh every)
+REFRESH_SCHEDULE = (
+    (timedelta(hours=1), timedelta(minutes=15)),
+    (timedelta(hours=6), timedelta(hours=1)),
+    (timedelta(days=1), timedelta(hours=3)),
+    (FINAL_AGE, timedelta(days=1)),
+)
+
+
+def refresh_interval(age):
+    """Time between samples for a tweet of the given age (None past FINAL_AGE)."""
+    for max_age, interval in REFRESH_SCHEDULE:
+        if age < max_age:
+            return interval
+    return None
+
+
+def engagement(counts):
+    """Likes + retweets + replies + quotes (impressions are not engagement)."""
+    return sum(counts[:4]) if counts else 0
+
+
+class MetricsCollector:
+    """
+    Schedules and performs batched public metrics lookups.
+    """
+
+    def __init__(self, client, history, metrics, bandit=None, clock=None, batch_size=BATCH_SIZE):
+        """
+        Initialize collector.
+
+        Args:
+            client: Twitter client (anything with get_tweets)
+            history: Tweet history with records() (tweet_id, posted_at, selection fields)
+            metrics: Metrics store of the state backend (add, latest)
+            bandit: SamplingBandit fed with final engagement (optional)
+            clock: Time source (default: SystemClock)
+            batch_size: Tweet ids per lookup call
+        """
+        self.client = client
+        self.history = history
+        self.metrics = metrics
+        self.bandit = bandit
+        self.clock = clock or SystemClock()
+        self.batch_size = batch_size
+        self.stop_requested = False
+
+    def posted_tweets(self):
+        """History records of posted tweets: {tweet_id: record}."""
+        tweets = {}
+        for record in self.history.records():
+            if record.get('tweet_id') and record.get('posted_at'):
+                tweets[str(record['tweet_id'])] = record
+        return tweets
+
+    def due(self, tweets, latest):
+        """
+        Pick the tweets whose next sample is due.
+
+        Args:
+            tweets: {tweet_id: history record}
+            latest: {tweet_id: (unix_time, counts or None)} from the metrics store
+
+        Returns:
+            list: Due tweet ids, oldest sample (or never sampled) first
+        """
+        now = self.clock.now()
+        due = []
+        for tweet_id, record in tweets.items():
+            posted_at = datetime.fromisoformat(record['posted_at'])
+            last = latest.get(tweet_id)
+            if last is None:
+                due.append((0, tweet_id))
+                continue
+            last_at, counts = last
+            sampled_at = datetime.fromtimestamp(last_at)
+            if counts is None or sampled_at - posted_at >= FINAL_AGE:
+                continue  # gone, or final sample already taken
+            age = now - posted_at
+            interval = refresh_interval(age)
+            if interval is None or now - sampled_at >= interval:
+                due.append((last_at, tweet_id))
+        return [tweet_id for _, tweet_id in sorted(due)]
+
+    def fetch(self, tweet_ids):
+        """
+        Look up public metrics for up to batch_size tweets in one call.
+
+        Returns:
+            dict: tweet_id -> counts tuple, or None for tweets that are gone
+        """
+        response = self.client.get_tweets(ids=tweet_ids, tweet_fields=['public_metrics'])
+        found = {
+            str(tweet.id): tuple((tweet.public_metrics or {}).get(field) or 0 for field in METRIC_FIELDS)
+            for tweet in (response.data or [])
+        }
+        return {tweet_id: found.get(tweet_id) for tweet_id in tweet_ids}
+
+    def collect(self):
+        """
+        Refresh every due tweet, in batches.
+
+        Returns:
+            dict: Counts of tweets due, sampled, finalized and lookup calls made
+        """
+        tweets = self.posted_tweets()
+        due = self.due(tweets, self.metrics.latest())
+        stats = {'due': len(due), 'sampled': 0, 'finalized': 0, 'calls': 0}
+
+        for start in range(0, len(due), self.batch_size):
+            if self.stop_requested:
+                break
+            batch = due[start:start + self.batch_size]
+            try:
+                results = self.fetch(batch)
+            except tweepy.TooManyRequests:
+                print("[RATE LIMIT] Metrics lookup limited, resuming next round")
+                break
+            stats['calls'] += 1
+
+            now = self.clock.now()
+            at = int(now.timestamp())
+            self.metrics.add([(tweet_id, at, counts) for tweet_id, counts in results.items()])
+            stats['sampled'] += len(results)
+
+            for tweet_id, counts in results.items():
+                record = tweets[tweet_id]
+                if counts is not None and now - datetime.fromisoformat(record['posted_at']) >= FINAL_AGE:
+                    stats['finalized'] += 1
+                    if self.bandit and record.get('category'):
+                        self.bandit.record_engagement(
+                            record['category'], record.get('length_type'), record.get('product'),
+                            engagement(counts)
+                        )
+
+        if self.bandit and stats['finalized']:
+            self.bandit.save()
+        print(f"[METRICS] {stats['sampled']}/{stats['due']} due tweets sampled in {stats['calls']} calls, "
+              f"{stats['finalized']} finalized")
+        return stats
+
+    def run(self, interval=900):
+        """
+        Collect until interrupted.
+
+        Args:
+            interval: Seconds between collection rounds
+        """
+        try:
+            while not self.stop_requested:
+                try:
+                    self.collect()
+                except Exception as e:
+                    print(f"[ERROR] Metrics collection failed: {e}")
+                self.clock.sleep(interval)
+        except KeyboardInterrupt:
+            print("\n[STOPPED] Metrics collector")
+
+    def report(self):
+        """
+        Average latest engagement by posting hour and by category.
+
+        Returns:
+            dict: {'by_hour': {hour: (tweets, mean)}, 'by_category': {name: (tweets, mean)}}
+        """
+        latest = self.metrics.latest()
+        by_hour, by_category = defaultdict(list), defaultdict(list)
+        for tweet_id, record in self.posted_tweets().items():
+            last = latest.get(tweet_id)
+            if not last or last[1] is None:
+                continue
+            value = engagement(last[1])
+            by_hour[datetime.fromisoformat(record['posted_at']).hour].append(value)
+            by_category[record.get('category') or 'unknown'].append(value)
+
+        def summarize(groups):
+            return {key: (len(values), round(sum(values) / len(values), 2)) for key, values in sorted(groups.items())}
+
+        return {'by_hour': summarize(by_hour), 'by_category': summarize(by_category)}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Collect engagement metrics for posted tweets")
+    parser.add_argument('--once', action='store_true', help="Collect once and exit")
+    parser.add_argument('--interval', type=int, default=900, help="Seconds between collection rounds")
+    parser.add_argument('--report', action='store_true', help="Print engagement by hour and category and exit")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    bot_module = load_bot_module()
+    state_backend = bot_module.create_state_backend()
+    collector = MetricsCollector(
+        # Rate limits end a round (see collect), so do not wait them out
+        client=None if args.report else bot_module.create_twitter_client(wait_on_rate_limit=False),
+        history=state_backend.history,
+        metrics=state_backend.metrics,
+        bandit=SamplingBandit(bot_module.SAMPLING_STATS_FILE)
+    )
+
+    if args.report:
+        report = collector.report()
+        print("[REPORT] Mean engagement by posting hour (tweets, mean):")
+        for hour, (count, mean) in report['by_hour'].items():
+            print(f"  {hour:02d}:00  {count:>4}  {mean}")
+        print("[REPORT] Mean engagement by category (tweets, mean):")
+        for name, (count, mean) in report['by_category'].items():
+            print(f"  {name:<24}{count:>4}  {mean}")
+    elif args.once:
+        collector.collect()
+    else:
+        collector.run(interval=args.interval)
@@ -1,112 +1,70 @@
 #!/usr/bin/env python3
 """
-Post a single test tweet to verify everything works.
+One-shot runner: post a tweet if one is due, persist state and exit.
+
+Designed to be invoked by cron or a systemd timer instead of keeping
+solana-hype-bot.py resident. Today's count, the daily target and the next
+scheduled slot are kept in the state backend (STATE_BACKEND) between runs.
+
+Examples:
+    python post_one_tweet.py              # post only if a tweet is due
+    python post_one_tweet.py --force      # post now regardless of schedule
+    python post_one_tweet.py --status     # show persisted state and exit
+    python post_one_tweet.py --dry-run    # generate without Twitter auth
+
+--status and --dry-run only read the state backend, they never change it.
+
+Crontab (check every 15 minutes):
+    */15 * * * * cd /path/to/bot && venv/bin/python post_one_tweet.py >> bot.log 2>&1
 """
 
-import os
-import re
-import random
+import sys
+import argparse
 from dotenv import load_dotenv
-import tweepy
-from grok_client import GrokClient
-from knowledge_base import NovaStaqKnowledgeBase
-from prompt_builder import PromptBuilder
+
+from bot_loader import load_bot_module
 
 load_dotenv()
 
-# Twitter credentials
-API_KEY = os.getenv('TWITTER_API_KEY')
-API_SECRET = os.getenv('TWITTER_API_SECRET')
-ACCESS_TOKEN = os.getenv('TWITTER_ACCESS_TOKEN')
-ACCESS_TOKEN_SECRET = os.getenv('TWITTER_ACCESS_TOKEN_SECRET')
-BEARER_TOKEN = os.getenv('TWITTER_BEARER_TOKEN')
 
-# Hugging Face credentials
-HF_TOKEN = os.getenv('HF_TOKEN')
-HF_MODEL = os.getenv('HF_MODEL', 'meta-llama/Llama-3.3-70B-Instruct')
+def parse_args():
+    parser = argparse.ArgumentParser(description="Post one tweet if due, then exit")
+    parser.add_argument('--force', action='store_true',
+                        help="Post now, ignoring the daily target and schedule")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="Generate a tweet without Twitter auth or posting")
+    parser.add_argument('--status', action='store_true',
+                        help="Print persisted state and exit")
+    return parser.parse_args()
+
 
-def clean_tweet(tweet):
-    """Remove emojis and clean tweet."""
-    if not tweet:
-        return ""
+def main():
+    args = parse_args()
+    bot_module = load_bot_module()
 
-    tweet = tweet.strip('"\'')
+    if args.status:
+        bot = bot_module.NovaStaqTwitterBot(dry_run=True)
+        next_tweet = bot.next_tweet_at.strftime('%Y-%m-%d %I:%M %p') if bot.next_tweet_at else "now"
+        stale = " (a new day starts on the next run)" if bot.last_tweet_date != bot.clock.now().date() else ""
+        print(f"[STATE] Date: {bot.last_tweet_date}{stale}")
+        print(f"[STATE] Today: {bot.tweets_today}/{bot_module.TWEETS_PER_DAY}")
+        print(f"[STATE] Next tweet: {next_tweet}")
+        return 0
 
-    # Remove emojis
-    emoji_pattern = re.compile("["
-        u"\U0001F600-\U0001F64F"
-        u"\U0001F300-\U0001F5FF"
-        u"\U0001F680-\U0001F6FF"
-        u"\U0001F1E0-\U0001F1FF"
-        u"\U00002700-\U000027BF"
-        u"\U0001F900-\U0001F9FF"
-        "]+", flags=re.UNICODE)
-    tweet = emoji_pattern.sub('', tweet)
+    if not args.dry_run and not all([bot_module.API_KEY, bot_module.API_SECRET,
+                                     bot_module.ACCESS_TOKEN, bot_module.ACCESS_TOKEN_SECRET,
+                                     bot_module.BEARER_TOKEN]):
+        print("[ERROR] Missing Twitter API credentials!")
+        return 1
 
-    tweet = re.sub(r'^[-•]\s*', '', tweet, flags=re.MULTILINE)
-    tweet = ' '.join(tweet.split())
+    if not bot_module.HF_TOKEN:
+        print("[ERROR] Missing Hugging Face API token!")
+        return 1
 
-    return tweet.strip()
+    bot = bot_module.NovaStaqTwitterBot(dry_run=args.dry_run)
+    bot.run_once(force=args.force or args.dry_run)
+    return 0
 
-def main():
-    print("=" * 60)
-    print("POSTING TEST TWEET")
-    print("=" * 60)
-
-    # Initialize components
-    print("\n📚 Loading knowledge base...")
-    kb = NovaStaqKnowledgeBase()
-
-    print("🤖 Initializing AI...")
-    client = GrokClient(api_key=HF_TOKEN, model=HF_MODEL, temperature=0.7, max_tokens=150)
-    prompt_builder = PromptBuilder(kb)
-
-    print("🐦 Connecting to Twitter...")
-    twitter_client = tweepy.Client(
-        bearer_token=BEARER_TOKEN,
-        consumer_key=API_KEY,
-        consumer_secret=API_SECRET,
-        access_token=ACCESS_TOKEN,
-        access_token_secret=ACCESS_TOKEN_SECRET,
-        wait_on_rate_limit=True
-    )
-
-    me = twitter_client.get_me()
-    username = me.data.username
-    print(f"✅ Connected as @{username}\n")
-
-    # Generate tweet
-    print("🎲 Generating tweet...")
-    category = kb.get_random_category()
-    length_type = random.choice(['short', 'long'])
-    product = kb.get_random_product() if random.random() < 0.3 else None
-
-    print(f"   Category: {category['name']}")
-    print(f"   Length: {length_type}")
-    if product:
-        print(f"   Product: {product['name']}")
-
-    system_prompt = prompt_builder.build_system_prompt()
-    user_prompt = prompt_builder.build_user_prompt(category, length_type, product)
-
-    tweet = client.generate_tweet(system_prompt, user_prompt)
-    tweet = clean_tweet(tweet)
-
-    print(f"\n📝 Generated tweet ({len(tweet)} chars):")
-    print(f"   \"{tweet}\"\n")
-
-    # Confirm
-    print("🚀 Posting to Twitter...")
-    response = twitter_client.create_tweet(text=tweet)
-    tweet_id = response.data['id']
-
-    print("\n" + "=" * 60)
-    print("✅ TWEET POSTED SUCCESSFULLY!")
-    print("=" * 60)
-    print(f"\n🔗 View it here: https://twitter.com/{username}/status/{tweet_id}")
-    print(f"\n📊 Tweet: \"{tweet}\"")
-    print(f"\n💡 Category: {category['name']}")
-    print(f"📏 Length: {len(tweet)} characters\n")
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,212 @@
+"""
+Opt-in profiling for the bot loop.
+
+A sampling thread records the stacks of the other threads (via
+sys._current_frames) while an instrumented stage is running, and each stage
+call records wall time, CPU time and net allocated memory (tracemalloc).
+Nothing is sampled while the bot sleeps between posts.
+
+Output, written on exit and on SIGUSR1:
+    <dir>/profile-<pid>.folded    collapsed stacks ("a;b;c <count>") for
+                                  flamegraph.pl, speedscope or inferno
+    <dir>/profile-<pid>.txt       per-stage timings, hottest functions and
+                                  top allocation sites
+
+Enable with BOT_PROFILE=<dir> or --profile [dir].
+"""
+
+import os
+import sys
+import time
+import atexit
+import signal
+import threading
+import functools
+import statistics
+import tracemalloc
+from collections import Counter, defaultdict
+
+
+class Profiler:
+    """Sampling profiler plus per-stage wall/CPU/allocation stats."""
+
+    def __init__(self, output_dir='profiles', interval=0.005, trace_memory=True, max_depth=64):
+        """
+        Initialize profiler.
+
+        Args:
+            output_dir: Directory for profile output
+            interval: Seconds between stack samples
+            trace_memory: Track allocations with tracemalloc
+            max_depth: Deepest stack frames kept per sample
+        """
+        self.output_dir = output_dir
+        self.interval = interval
+        self.trace_memory = trace_memory
+        self.max_depth = max_depth
+
+        self.stacks = Counter()
+        self.stages = defaultdict(list)  # name -> [(wall, cpu, alloc_bytes)]
+        self.samples = 0
+        self.active = 0
+        self.lock = threading.Lock()
+        self._stop = threading.Event()
+        self._dump_requested = False
+        self._thread = None
+
+    def start(self, install=True):
+        """
+        Start sampling.
+
+        Args:
+            install: Dump on exit and on SIGUSR1
+
+        Returns:
+            Profiler: self
+        """
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start(16)
+        self._thread = threading.Thread(target=self._sample_loop, name="profiler", daemon=True)
+        self._thread.start()
+
+        if install:
+            atexit.register(self.stop)
+            if hasattr(signal, 'SIGUSR1') and threading.current_thread() is threading.main_thread():
+                signal.signal(signal.SIGUSR1, self._request_dump)
+        print(f"[PROFILE] Sampling every {self.interval * 1000:g}ms, output in {self.output_dir}/")
+        return self
+
+    def stop(self):
+        """Stop sampling and write the final dump."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.dump()
+
+    def _request_dump(self, signum, frame):
+        # The main thread may hold self.lock when the signal arrives, so the
+        # sampling thread writes the dump instead of the handler
+        self._dump_requested = True
+
+    def _sample_loop(self):
+        own = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            if self._dump_requested:
+                self._dump_requested = False
+                self.dump()
+            if not self.active:
+                continue
+            for thread in threading.enumerate():
+                names[thread.ident] = thread.name
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    if code.co_filename == __file__:  # skip stage wrappers
+                        frame = frame.f_back
+                        continue
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                with self.lock:
+                    self.stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+    def stage(self, name, func):
+        """
+        Wrap a callable so each call is sampled and timed as a stage.
+
+        Args:
+            name: Stage name in the summary
+            func: Callable to wrap
+
+        Returns:
+            Wrapped callable
+        """
+        @functools.wraps(func)
+        def profiled(*args, **kwargs):
+            with self.lock:
+                self.active += 1
+            memory = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+            wall, cpu = time.perf_counter(), time.thread_time()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                wall, cpu = time.perf_counter() - wall, time.thread_time() - cpu
+                allocated = tracemalloc.get_traced_memory()[0] - memory if tracemalloc.is_tracing() else 0
+                with self.lock:
+                    self.active -= 1
+                    self.stages[name].append((wall, cpu, allocated))
+        return profiled
+
+    def instrument(self, obj, stages):
+        """
+        Replace methods on an object with profiled wrappers.
+
+        Args:
+            obj: Instance whose methods to wrap
+            stages: {stage_name: method_name}
+        """
+        for name, method in stages.items():
+            setattr(obj, method, self.stage(name, getattr(obj, method)))
+
+    def summary(self, top=15):
+        """
+        Build the text summary.
+
+        Returns:
+            str: Stage timings, hottest functions and allocation sites
+        """
+        with self.lock:
+            stages = {name: list(calls) for name, calls in self.stages.items()}
+            stacks = Counter(self.stacks)
+
+        lines = ["STAGES (ms; alloc = net KiB retained)",
+                 f"{'stage':<20}{'calls':>7}{'wall p50':>10}{'wall p95':>10}{'wall max':>10}"
+                 f"{'cpu mean':>10}{'alloc':>10}"]
+        for name, calls in sorted(stages.items()):
+            walls = sorted(c[0] * 1000 for c in calls)
+            p95 = walls[min(len(walls) - 1, int(len(walls) * 0.95))]
+            lines.append(
+                f"{name:<20}{len(calls):>7}{statistics.median(walls):>10.1f}{p95:>10.1f}{walls[-1]:>10.1f}"
+                f"{statistics.mean(c[1] for c in calls) * 1000:>10.1f}"
+                f"{statistics.mean(c[2] for c in calls) / 1024:>10.1f}"
+            )
+
+        total = sum(stacks.values())
+        self_counts = Counter()
+        for stack, count in stacks.items():
+            self_counts[stack.rsplit(';', 1)[-1]] += count
+        lines += ["", f"HOTTEST FUNCTIONS (self samples of {total})"]
+        for frame, count in self_counts.most_common(top):
+            lines.append(f"{count:>7} {count / total:>6.1%}  {frame}")
+
+        if tracemalloc.is_tracing():
+            lines += ["", "TOP ALLOCATION SITES (live)"]
+            snapshot = tracemalloc.take_snapshot().filter_traces([
+                tracemalloc.Filter(False, __file__),
+                tracemalloc.Filter(False, tracemalloc.__file__),
+            ])
+            for stat in snapshot.statistics('lineno')[:top]:
+                frame = stat.traceback[0]
+                lines.append(f"{stat.size / 1024:>9.1f} KiB {stat.count:>7}  "
+                             f"{os.path.basename(frame.filename)}:{frame.lineno}")
+        return '\n'.join(lines)
+
+    def dump(self):
+        """Write collapsed stacks and the summary; safe to call repeatedly."""
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, f"profile-{os.getpid()}")
+        with self.lock:
+            stacks = list(self.stacks.items())
+        with open(base + '.folded', 'w') as f:
+            for stack, count in stacks:
+                f.write(f"{stack} {count}\n")
+        with open(base + '.txt', 'w') as f:
+            f.write(self.summary() + '\n')
+        print(f"[PROFILE] Wrote {base}.folded and {base}.txt ({self.samples} samples)")
@@ -1,3 +1,7 @@
+from token_budget import fit_sections
+from tweet_rules import MAX_TWEET_LENGTH
+
+
 class PromptBuilder:
     """
     Intelligent prompt construction for Grok API tweet generation.
@@ -14,6 +18,32 @@ class PromptBuilder:
             knowledge_base: NovaStaqKnowledgeBase instance
         """
         self.kb = knowledge_base
+        self._system_prompt = None
+
+    # Drop priority of optional prompt sections under a token budget
+    # (lowest first); sections not listed are always kept
+    DROP_PRIORITY = {
+        'example': 1,
+        'system_examples': 2,
+        'facts': 3,
+        'guidance': 4,
+        'content_approach': 5,
+        'voice': 6,
+        'description': 7,
+    }
+
+    LENGTH_SPECS = {
+        'very_short': ("50-100 characters (ultra brief, punchy one-liner)",
+                       "One sentence. Sharp and direct. Make every word count."),
+        'short': ("100-150 characters (concise, quotable)",
+                  "Brief but complete thought. Clear and impactful."),
+        'medium': ("150-200 characters (balanced, informative)",
+                   "Develop the idea with context. Two sentences work well."),
+        'long': ("200-250 characters (detailed, explanatory)",
+                 "Provide full context and reasoning. Multiple points if needed."),
+        'very_long': ("250-280 characters (comprehensive, in-depth)",
+                      "Maximum depth. Explain thoroughly with examples or data.")
+    }
 
     def build_system_prompt(self):
         """
@@ -22,22 +52,42 @@ class PromptBuilder:
         Returns:
             str: System prompt for Grok API
         """
-        brand = self.kb.get_brand_voice_guidelines()
-        rules = self.kb.get_strict_rules()
-
-        system_prompt = f"""You are the official voice of Novastaq Technologies Inc on Twitter.
-
-BRAND IDENTITY:
-Novastaq is a blockchain technology company building decentralized payment infrastructure for Africa. We develop Web2 and Web3 solutions including payment systems, smart contracts, and financial infrastructure.
+        if self._system_prompt is None:
+            self._system_prompt = "\n\n".join(text for _, text in self._system_sections())
+        return self._system_prompt
 
-Products: Velcro (multi-currency fintech), BitNova (crypto P2P payments), Stakepadi (prediction markets), Tsara (settlement infrastructure), Criptpay (crypto payment gateway)
+    def _system_sections(self):
+        """
+        System prompt sections in order (pre-rendered in the knowledge bundle).
 
-Mission: {brand.get('brand_identity', {}).get('mission', 'Build reliable digital infrastructure for payments and Web3 systems across Africa')}
+        Returns:
+            list: (section name, text) tuples
+        """
+        return self.kb.get_system_sections() or self.render_system_sections()
 
-VOICE & TONE:
-Write in a professional, authoritative, and innovative voice. Be knowledgeable about blockchain, payments, and African tech. Sound confident but not arrogant. Be clear and accessible while maintaining technical credibility.
+    def render_system_sections(self):
+        """
+        Render the system prompt sections from the knowledge base.
 
-CRITICAL RULES - NEVER BREAK THESE:
+        Returns:
+            list: (section name, text) tuples
+        """
+        brand = self.kb.get_brand_voice_guidelines()
+        products = ', '.join(
+            f"{p['name']} ({p.get('tagline', '').lower()})" if p.get('tagline') else p['name']
+            for p in self.kb.get_all_products()
+        )
+        mission = brand.get('brand_identity', {}).get('mission', 'Build reliable digital infrastructure for payments and Web3 systems across Africa')
+
+        return [
+            ('intro', "You are the official voice of Novastaq Technologies Inc on Twitter."),
+            ('identity', """BRAND IDENTITY:
+Novastaq is a blockchain technology company building decentralized payment infrastructure for Africa. We develop Web2 and Web3 solutions including payment systems, smart contracts, and financial infrastructure."""),
+            ('products', f"Products: {products}"),
+            ('mission', f"Mission: {mission}"),
+            ('voice', """VOICE & TONE:
+Write in a professional, authoritative, and innovative voice. Be knowledgeable about blockchain, payments, and African tech. Sound confident but not arrogant. Be clear and accessible while maintaining technical credibility."""),
+            ('rules', """CRITICAL RULES - NEVER BREAK THESE:
 1. NO emojis of any kind
 2. NO bullet points, dashes, or list formatting
 3. NO hashtags (unless specifically requested)
@@ -46,20 +96,16 @@ CRITICAL RULES - NEVER BREAK THESE:
 6. Write naturally - sound human, not automated
 7. Be specific and concrete - avoid vague generalities
 8. Focus on insights rather than announcements
-9. Provide genuine value to readers
-
-CONTENT APPROACH:
-Lead with substance, not promotion. If discussing products, explain the problem being solved. If sharing technical insights, make one clear point. If offering business wisdom, provide actionable lessons. If presenting thought leadership, make bold but defensible claims.
-
-GOOD EXAMPLE:
+9. Provide genuine value to readers"""),
+            ('content_approach', """CONTENT APPROACH:
+Lead with substance, not promotion. If discussing products, explain the problem being solved. If sharing technical insights, make one clear point. If offering business wisdom, provide actionable lessons. If presenting thought leadership, make bold but defensible claims."""),
+            ('system_examples', """GOOD EXAMPLE:
 "Cross-border payment fees in Africa average 8 to 10 percent. Blockchain can reduce this to under 1 percent. That is not innovation for innovation's sake, it is economic empowerment at scale."
 
 BAD EXAMPLE:
-"🚀 Excited to announce that blockchain is revolutionizing payments! Check out our amazing products! #Web3 #Africa"
-
-Remember: Every tweet builds Novastaq's reputation. Be thoughtful, insightful, and genuinely valuable."""
-
-        return system_prompt
+"🚀 Excited to announce that blockchain is revolutionizing payments! Check out our amazing products! #Web3 #Africa\""""),
+            ('closing', "Remember: Every tweet builds Novastaq's reputation. Be thoughtful, insightful, and genuinely valuable."),
+        ]
 
     def build_user_prompt(self, category, length_type, product=None):
         """
@@ -73,66 +119,96 @@ Remember: Every tweet builds Novastaq's reputation. Be thoughtful, insightful, a
         Returns:
             str: User prompt for Grok API
         """
+        return "\n\n".join(text for _, text in self._user_sections(category, length_type, product))
+
+    def _user_sections(self, category, length_type, product=None):
+        """
+        User prompt sections in order.
+
+        Returns:
+            list: (section name, text) tuples
+        """
         category_name = category.get('name', '')
         category_desc = category.get('description', '')
         category_guidance = category.get('guidance', '')
 
-        # Get length specifications with more variety
-        length_specs = {
-            'very_short': ("50-100 characters (ultra brief, punchy one-liner)",
-                          "One sentence. Sharp and direct. Make every word count."),
-            'short': ("100-150 characters (concise, quotable)",
-                     "Brief but complete thought. Clear and impactful."),
-            'medium': ("150-200 characters (balanced, informative)",
-                      "Develop the idea with context. Two sentences work well."),
-            'long': ("200-250 characters (detailed, explanatory)",
-                    "Provide full context and reasoning. Multiple points if needed."),
-            'very_long': ("250-280 characters (comprehensive, in-depth)",
-                         "Maximum depth. Explain thoroughly with examples or data.")
-        }
-
-        length_spec, length_note = length_specs.get(length_type, length_specs['medium'])
+        length_spec, length_note = self.LENGTH_SPECS.get(length_type, self.LENGTH_SPECS['medium'])
 
-        # Base prompt
-        user_prompt = f"Generate a tweet for the '{category_name}' category.\n\n"
-
-        # Add category context
-        user_prompt += f"Category description: {category_desc}\n\n"
+        # Base prompt and category context
+        sections = [
+            ('header', f"Generate a tweet for the '{category_name}' category."),
+            ('description', f"Category description: {category_desc}"),
+        ]
 
         # Add product focus if specified
         if product:
-            product_name = product.get('name', '')
-            product_desc = product.get('description', '')
-            product_features = product.get('key_features', [])
-
-            user_prompt += f"Focus on: {product_name}\n"
-            user_prompt += f"Product: {product_desc}\n"
+            sections.append(('product', f"Focus on: {product.get('name', '')}\nProduct: {product.get('description', '')}"))
 
-            if product_features and len(product_features) > 0:
-                user_prompt += f"Consider features like: {', '.join(product_features[:3])}\n"
-
-            user_prompt += "\n"
+        # Add the knowledge snippets most relevant to this category/product
+        query = f"{category_name.replace('_', ' ')} {category_desc} {category_guidance}"
+        if product:
+            query += f" {product.get('name', '')} {product.get('description', '')}"
+        snippets = self.kb.get_relevant_snippets(
+            query,
+            product_name=product.get('name') if product else None
+        )
+        if snippets:
+            sections.append(('facts', "Relevant facts (use at most one or two):\n" + "\n".join(snippets)))
 
         # Add category-specific guidance
         if category_guidance:
-            user_prompt += f"Approach: {category_guidance}\n\n"
+            sections.append(('guidance', f"Approach: {category_guidance}"))
 
         # Add example if available
         example = self.kb.get_random_category_example(category_name)
         if example:
-            user_prompt += f"Example style (do not copy, just reference the approach):\n\"{example}\"\n\n"
+            sections.append(('example', f"Example style (do not copy, just reference the approach):\n\"{example}\""))
 
         # Add length requirements
-        user_prompt += f"Length: {length_spec}\n"
-        user_prompt += f"{length_note}\n\n"
+        sections.append(('length', f"Length: {length_spec}\n{length_note}"))
 
         # Final instructions
-        user_prompt += "Generate ONE tweet that follows all the rules in the system prompt. "
-        user_prompt += "Return ONLY the tweet text, nothing else. "
-        user_prompt += "No quotation marks around the tweet. "
-        user_prompt += "No emojis, no bullet points, no hashtags."
+        sections.append(('instructions',
+                         "Generate ONE tweet that follows all the rules in the system prompt. "
+                         "Return ONLY the tweet text, nothing else. "
+                         "No quotation marks around the tweet. "
+                         "No emojis, no bullet points, no hashtags."))
+
+        return sections
+
+    def build_prompts(self, category, length_type, product=None, token_budget=None):
+        """
+        Build system and user prompts within a combined token budget.
 
-        return user_prompt
+        Optional sections are dropped in DROP_PRIORITY order (category
+        example first, category description last) until the estimated
+        prompt size fits.
+
+        Args:
+            category: Category dict from knowledge base
+            length_type: Length type (see LENGTH_SPECS)
+            product: Optional product dict to focus on
+            token_budget: Maximum estimated input tokens, or None for no limit
+
+        Returns:
+            tuple: (system_prompt, user_prompt)
+        """
+        if token_budget is None:
+            return self.build_system_prompt(), self.build_user_prompt(category, length_type, product)
+
+        system_sections = self._system_sections()
+        user_sections = self._user_sections(category, length_type, product)
+        named = system_sections + user_sections
+        kept, dropped = fit_sections(
+            [(text, self.DROP_PRIORITY.get(name)) for name, text in named],
+            token_budget
+        )
+
+        if dropped:
+            print(f"[BUDGET] Dropped prompt sections: {', '.join(named[i][0] for i in sorted(dropped))}")
+
+        system_count = len(system_sections) - sum(1 for i in dropped if i < len(system_sections))
+        return "\n\n".join(kept[:system_count]), "\n\n".join(kept[system_count:])
 
     def build_simple_fallback_prompt(self):
         """
@@ -156,3 +232,59 @@ Rules:
 Make it insightful and valuable. Just return the tweet text, nothing else."""
 
         return system_prompt, user_prompt
+
+    def build_reply_prompt(self, mention_text, author_username=None):
+        """
+        Build prompts for replying to a mention.
+
+        Args:
+            mention_text: Text of the tweet mentioning us
+            author_username: Username of the mention author (without @)
+
+        Returns:
+            tuple: (system_prompt, user_prompt)
+        """
+        system_prompt = self.build_system_prompt()
+        system_prompt += """
+
+REPLYING TO MENTIONS:
+You are replying to someone who mentioned Novastaq. Answer what they actually asked or said. Be helpful, direct and courteous. Keep it under 240 characters. Do not make promises about pricing, listings, partnerships or timelines. Never ask for private keys, seed phrases or personal financial details. If the mention is spam, abusive or unrelated to Novastaq, reply with exactly: SKIP"""
+
+        author = f"@{author_username}" if author_username else "A user"
+        user_prompt = f"{author} wrote:\n\"{mention_text}\"\n\n"
+        user_prompt += "Write ONE reply. Return ONLY the reply text, nothing else. "
+        user_prompt += "Do not start with their @handle, it is added automatically. "
+        user_prompt += "No quotation marks, no emojis, no hashtags."
+
+        return system_prompt, user_prompt
+
+    def build_thread_segment_prompt(self, topic, outline, index, max_length=MAX_TWEET_LENGTH):
+        """
+        Build prompts for one tweet of a thread.
+
+        Every segment sees the whole outline, so segments generated in
+        parallel stay consistent and do not repeat each other.
+
+        Args:
+            topic: Thread topic
+            outline: List of segment briefs, in thread order
+            index: Position of this segment in the outline
+            max_length: Character limit for this segment
+
+        Returns:
+            tuple: (system_prompt, user_prompt)
+        """
+        system_prompt = self.build_system_prompt()
+        system_prompt += """
+
+WRITING THREADS:
+You are writing one tweet of a multi-tweet thread. Each tweet must make sense on its own and cover only its own point from the outline. Do not number the tweet, do not say "thread", and do not refer to other tweets."""
+
+        plan = "\n".join(f"{i + 1}. {brief}" for i, brief in enumerate(outline))
+        user_prompt = f"Thread topic: {topic}\n\nThread outline:\n{plan}\n\n"
+        user_prompt += f"Write tweet {index + 1} of {len(outline)}: {outline[index]}\n"
+        user_prompt += f"Length: under {max_length} characters.\n"
+        user_prompt += "Return ONLY the tweet text, nothing else. "
+        user_prompt += "No quotation marks, no emojis, no bullet points, no hashtags."
+
+        return system_prompt, user_prompt
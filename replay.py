@@ -0,0 +1,292 @@
+"""
+Record and replay LLM and Twitter traffic.
+
+Recording wraps the real transports and appends every interaction (request,
+response, timing, errors) to a cassette file; replay serves the recorded
+interactions back in order, without network access or credentials, either
+instantly or at a multiple of the original latency.
+
+Cassettes are JSON Lines, gzip-compressed when the path ends in .gz:
+    {"channel": "llm", "method": "post", "request": {...}, "response": {...}, "elapsed": 1.2}
+    {"channel": "twitter", "method": "create_tweet", "request": {...}, "response": {...}, "elapsed": 0.3}
+
+Interactions are replayed in recorded order per (channel, method), so a run
+that makes the same sequence of calls gets the same responses.
+"""
+
+import gzip
+import json
+import time
+import zlib
+import threading
+from collections import defaultdict, deque
+
+import requests
+import tweepy
+
+
+class ReplayError(Exception):
+    """Raised when a replayed run makes a call the cassette has no entry for."""
+
+
+def _open_cassette(path, mode):
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def _read_cassette(path):
+    """
+    Read a cassette's text, keeping what was written before a crash.
+
+    A recording that was killed leaves a gzip stream without its end marker
+    (gzip.open raises EOFError and drops the last block) and possibly a
+    partial last line; everything before them is returned.
+
+    Returns:
+        list: Complete lines
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if path.endswith('.gz'):
+        chunks = []
+        while data:  # one gzip member per recording session (append mode)
+            decompressor = zlib.decompressobj(wbits=31)
+            chunks.append(decompressor.decompress(data))
+            if not decompressor.eof:
+                print(f"[WARN] {path} was not closed; replaying what was recorded")
+                break
+            data = decompressor.unused_data
+        data = b''.join(chunks)
+    end = data.rfind(b'\n') + 1
+    return data[:end].decode('utf-8').splitlines()
+
+
+class CassetteWriter:
+    """Appends interactions to a cassette file as they happen."""
+
+    def __init__(self, path):
+        """
+        Args:
+            path: Cassette file path (.gz for compression)
+        """
+        self.path = path
+        self.lock = threading.Lock()
+        self.file = _open_cassette(path, 'a')
+
+    def write(self, channel, method, request, response=None, error=None, elapsed=0.0):
+        entry = {'channel': channel, 'method': method, 'request': request, 'elapsed': round(elapsed, 4)}
+        if error is not None:
+            entry['error'] = error
+        else:
+            entry['response'] = response
+        with self.lock:
+            self.file.write(json.dumps(entry, separators=(',', ':')) + '\n')
+            self.file.flush()
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+
+class Cassette:
+    """Recorded interactions loaded for replay."""
+
+    def __init__(self, path, speed=0.0):
+        """
+        Load a cassette.
+
+        Args:
+            path: Cassette file path
+            speed: Latency multiplier on replay (0 = instant, 1 = original)
+        """
+        self.path = path
+        self.speed = speed
+        self.lock = threading.Lock()
+        self.entries = defaultdict(deque)
+        for line in _read_cassette(path):
+            if line.strip():
+                entry = json.loads(line)
+                self.entries[(entry['channel'], entry['method'])].append(entry)
+
+    def next(self, channel, method):
+        """
+        Pop the next recorded interaction, sleeping for its scaled latency.
+
+        Raises:
+            ReplayError: If no interaction is left for this channel/method
+        """
+        with self.lock:
+            queue = self.entries.get((channel, method))
+            if not queue:
+                raise ReplayError(f"No recorded {channel}.{method} left in {self.path}")
+            entry = queue.popleft()
+        if self.speed:
+            time.sleep(entry['elapsed'] * self.speed)
+        return entry
+
+    def remaining(self):
+        """Number of unplayed interactions per channel/method."""
+        return {f"{c}.{m}": len(q) for (c, m), q in self.entries.items() if q}
+
+
+def _error_info(e):
+    return {'type': type(e).__name__, 'message': str(e)}
+
+
+def _raise_recorded(error):
+    exc_type = getattr(requests.exceptions, error['type'], None)
+    if exc_type is None or not isinstance(exc_type, type) or not issubclass(exc_type, Exception):
+        exc_type = Exception
+    raise exc_type(error['message'])
+
+
+# ---------------------------------------------------------------------------
+# LLM HTTP transport (GrokClient session)
+# ---------------------------------------------------------------------------
+
+class RecordedResponse:
+    """Minimal requests.Response stand-in built from a recording."""
+
+    def __init__(self, status_code, headers, text):
+        self.status_code = status_code
+        self.headers = headers
+        self.text = text
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class RecordingSession:
+    """requests-style session that records every post() to a cassette."""
+
+    def __init__(self, writer, session=None):
+        """
+        Args:
+            writer: CassetteWriter
+            session: Underlying transport (default: requests)
+        """
+        self.writer = writer
+        self.session = session or requests
+
+    def post(self, url, headers=None, json=None, timeout=None):
+        request = {'url': url, 'json': json}  # Authorization header is never stored
+        start = time.monotonic()
+        try:
+            response = self.session.post(url, headers=headers, json=json, timeout=timeout)
+        except Exception as e:
+            self.writer.write('llm', 'post', request, error=_error_info(e), elapsed=time.monotonic() - start)
+            raise
+
+        keep_headers = {k: v for k, v in response.headers.items() if k.lower() in ('retry-after', 'content-type')}
+        self.writer.write('llm', 'post', request, response={
+            'status_code': response.status_code,
+            'headers': keep_headers,
+            'text': response.text
+        }, elapsed=time.monotonic() - start)
+        return response
+
+
+class ReplaySession:
+    """requests-style session that serves post() responses from a cassette."""
+
+    def __init__(self, cassette):
+        """
+        Args:
+            cassette: Cassette
+        """
+        self.cassette = cassette
+
+    def post(self, url, headers=None, json=None, timeout=None):
+        entry = self.cassette.next('llm', 'post')
+        if 'error' in entry:
+            _raise_recorded(entry['error'])
+        response = entry['response']
+        return RecordedResponse(response['status_code'], response['headers'], response['text'])
+
+
+# ---------------------------------------------------------------------------
+# Twitter client (tweepy.Client proxy)
+# ---------------------------------------------------------------------------
+
+TWEEPY_MODELS = {cls.__name__: cls for cls in (tweepy.Tweet, tweepy.User, tweepy.Media, tweepy.Place, tweepy.Poll)}
+
+
+def _encode(value):
+    """Serialize tweepy responses (namedtuples of model objects) to JSON data."""
+    if isinstance(value, tweepy.Response):
+        return {'__response__': {field: _encode(getattr(value, field)) for field in value._fields}}
+    if type(value).__name__ in TWEEPY_MODELS and hasattr(value, 'data'):
+        return {'__model__': type(value).__name__, 'data': value.data}
+    if isinstance(value, dict):
+        return {k: _encode(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_encode(v) for v in value]
+    return value
+
+
+def _decode(value):
+    """Inverse of _encode."""
+    if isinstance(value, dict):
+        if '__response__' in value:
+            return tweepy.Response(**{k: _decode(v) for k, v in value['__response__'].items()})
+        if '__model__' in value:
+            return TWEEPY_MODELS[value['__model__']](value['data'])
+        return {k: _decode(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_decode(v) for v in value]
+    return value
+
+
+class RecordingTwitterClient:
+    """Proxy for tweepy.Client that records every API method call."""
+
+    def __init__(self, client, writer):
+        """
+        Args:
+            client: tweepy.Client
+            writer: CassetteWriter
+        """
+        self._client = client
+        self._writer = writer
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if not callable(attr):
+            return attr
+
+        def recorded(*args, **kwargs):
+            request = {'args': _encode(list(args)), 'kwargs': _encode(kwargs)}
+            start = time.monotonic()
+            try:
+                result = attr(*args, **kwargs)
+            except Exception as e:
+                self._writer.write('twitter', name, request, error=_error_info(e), elapsed=time.monotonic() - start)
+                raise
+            self._writer.write('twitter', name, request, response=_encode(result), elapsed=time.monotonic() - start)
+            return result
+
+        return recorded
+
+
+class ReplayTwitterClient:
+    """Stand-in for tweepy.Client that serves calls from a cassette."""
+
+    def __init__(self, cassette):
+        """
+        Args:
+            cassette: Cassette
+        """
+        self._cassette = cassette
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        def replayed(*args, **kwargs):
+            entry = self._cassette.next('twitter', name)
+            if 'error' in entry:
+                raise tweepy.TweepyException(entry['error']['message'])
+            return _decode(entry['response'])
+
+        return replayed
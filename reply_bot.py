@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+"""
+Mention ingestion and automated replies.
+
+A poller reads new mentions with a persisted since_id cursor and pushes them
+into a bounded work queue; a pool of worker threads builds reply prompts,
+generates replies through GrokClient and posts them as replies. Fetched but
+unanswered mentions are persisted with the cursor, so a restart neither
+re-fetches nor re-answers anything, and nothing fetched is lost.
+
+The first run starts at the newest existing mention without answering the
+backlog. A mention is marked as sending before its reply is posted; if the
+process dies mid-post it is not answered again (at most one reply per
+mention). Failed replies are retried on later polls, up to
+MAX_REPLY_ATTEMPTS times.
+
+The Twitter client is injected (anything with get_users_mentions and
+create_tweet), so the pipeline can run against a local fake API.
+
+Examples:
+    python reply_bot.py --once          # poll, answer everything pending, exit
+    python reply_bot.py --interval 60   # poll every minute
+    python reply_bot.py --once --dry-run
+"""
+
+import re
+import sys
+import json
+import queue
+import signal
+import argparse
+import threading
+from dotenv import load_dotenv
+
+from bot_loader import load_bot_module
+from tweet_rules import clean_tweet, MAX_TWEET_LENGTH
+from atomic_io import write_json
+
+load_dotenv()
+
+MENTION_STATE_FILE = 'mention_state.json'
+MAX_ANSWERED_IDS = 5000
+MAX_REPLY_ATTEMPTS = 3
+SKIP_REPLY = re.compile(r'SKIP\W*', re.IGNORECASE)
+
+
+class MentionState:
+    """
+    Persisted mention cursor, pending mentions and recently answered ids.
+
+    Thread-safe: the poller and reply workers update it concurrently.
+    """
+
+    def __init__(self, path=MENTION_STATE_FILE):
+        """
+        Initialize state and load it from disk.
+
+        Args:
+            path: JSON state file path
+        """
+        self.path = path
+        self.lock = threading.Lock()
+        self.started = False
+        self.since_id = None
+        self.pending = {}
+        self.answered = []
+        self._answered_set = set()
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, 'r') as f:
+                state = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+
+        self.since_id = state.get('since_id')
+        self.pending = state.get('pending', {})
+        self.answered = state.get('answered', [])
+        self._answered_set = set(self.answered)
+        self.started = True
+
+    def save(self):
+        with self.lock:
+            state = {
+                'since_id': self.since_id,
+                'pending': self.pending,
+                'answered': self.answered[-MAX_ANSWERED_IDS:]
+            }
+            write_json(self.path, state)
+            self.started = True
+
+    def is_known(self, mention_id):
+        """True if the mention is already pending or answered."""
+        with self.lock:
+            return mention_id in self.pending or mention_id in self._answered_set
+
+    def add_pending(self, mentions, newest_id):
+        """
+        Record newly fetched mentions and advance the cursor.
+
+        Args:
+            mentions: Mention dicts (with 'id')
+            newest_id: Newest mention id seen by the poll
+        """
+        with self.lock:
+            for mention in mentions:
+                self.pending[mention['id']] = mention
+            if newest_id and (self.since_id is None or int(newest_id) > int(self.since_id)):
+                self.since_id = newest_id
+        self.save()
+
+    def mark_sending(self, mention_id):
+        """Record that a reply is about to be posted (persisted first)."""
+        with self.lock:
+            if mention_id in self.pending:
+                self.pending[mention_id]['sending'] = True
+        self.save()
+
+    def record_failure(self, mention_id):
+        """
+        Record a failed reply attempt; the mention stays pending.
+
+        Returns:
+            int: Attempts made so far
+        """
+        with self.lock:
+            mention = self.pending.get(mention_id, {})
+            mention.pop('sending', None)
+            mention['attempts'] = mention.get('attempts', 0) + 1
+            attempts = mention['attempts']
+        self.save()
+        return attempts
+
+    def mark_done(self, mention_id):
+        """Mark a mention as answered (or deliberately skipped)."""
+        with self.lock:
+            self.pending.pop(mention_id, None)
+            if mention_id not in self._answered_set:
+                self.answered.append(mention_id)
+                self._answered_set.add(mention_id)
+            if len(self.answered) > MAX_ANSWERED_IDS * 2:
+                self.answered = self.answered[-MAX_ANSWERED_IDS:]
+                self._answered_set = set(self.answered)
+        self.save()
+
+
+class ReplyBot:
+    """
+    Polls mentions and answers them with a pool of reply workers.
+    """
+
+    def __init__(self, client, user_id, grok_client, prompt_builder,
+                 state=None, workers=4, queue_size=100, dry_run=False):
+        """
+        Initialize reply bot.
+
+        Args:
+            client: Twitter client (tweepy.Client or a compatible fake)
+            user_id: Our user id (mentions are read for this account)
+            grok_client: GrokClient for reply generation
+            prompt_builder: PromptBuilder for reply prompts
+            state: MentionState (default: loaded from MENTION_STATE_FILE)
+            workers: Number of reply worker threads
+            queue_size: Maximum queued mentions (poller blocks when full)
+            dry_run: Generate replies but do not post them
+        """
+        self.client = client
+        self.user_id = str(user_id)
+        self.grok_client = grok_client
+        self.prompt_builder = prompt_builder
+        self.state = state or MentionState()
+        self.num_workers = workers
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.dry_run = dry_run
+        self.stop_event = threading.Event()
+        self.threads = []
+        self.failed = []
+        self.failed_lock = threading.Lock()
+        self.stats = {'fetched': 0, 'replied': 0, 'skipped': 0, 'errors': 0}
+        self.stats_lock = threading.Lock()
+
+    def _count(self, key):
+        with self.stats_lock:
+            self.stats[key] += 1
+
+    def fetch_mentions(self):
+        """
+        Fetch all mentions newer than the cursor, following pagination.
+
+        Returns:
+            tuple: (list of new mention dicts oldest first, newest id seen)
+        """
+        mentions = []
+        newest_id = None
+        pagination_token = None
+
+        while True:
+            response = self.client.get_users_mentions(
+                id=self.user_id,
+                since_id=self.state.since_id,
+                pagination_token=pagination_token,
+                max_results=100,
+                expansions=['author_id'],
+                user_fields=['username'],
+                tweet_fields=['author_id', 'conversation_id', 'created_at']
+            )
+
+            meta = response.meta or {}
+            if newest_id is None:
+                newest_id = meta.get('newest_id')
+
+            users = {str(user.id): user.username for user in (response.includes or {}).get('users', [])}
+            for tweet in response.data or []:
+                author_id = str(tweet.author_id)
+                mentions.append({
+                    'id': str(tweet.id),
+                    'text': tweet.text,
+                    'author_id': author_id,
+                    'author_username': users.get(author_id)
+                })
+
+            pagination_token = meta.get('next_token')
+            if not pagination_token:
+                break
+
+        mentions.sort(key=lambda mention: int(mention['id']))
+        return mentions, newest_id
+
+    def fetch_newest_id(self):
+        """Id of the newest existing mention (None if there are none)."""
+        response = self.client.get_users_mentions(id=self.user_id, max_results=5)
+        return (response.meta or {}).get('newest_id')
+
+    def poll(self):
+        """
+        Fetch new mentions, persist them as pending and enqueue them.
+
+        On the first run the cursor is set to the newest existing mention and
+        nothing is answered, so the bot does not reply to its whole history.
+
+        Returns:
+            int: Number of new mentions enqueued
+        """
+        if not self.state.started:
+            newest_id = self.fetch_newest_id()
+            self.state.add_pending([], newest_id)
+            print(f"[MENTIONS] First run: starting after mention {newest_id}, older mentions are not answered")
+            return 0
+
+        mentions, newest_id = self.fetch_mentions()
+        new = [m for m in mentions if m['author_id'] != self.user_id and not self.state.is_known(m['id'])]
+        self.state.add_pending(new, newest_id)
+
+        for mention in new:
+            self.queue.put(mention)
+            self._count('fetched')
+
+        if new:
+            print(f"[MENTIONS] {len(new)} new")
+        return len(new)
+
+    def enqueue_pending(self):
+        """Re-enqueue mentions fetched before a restart but never answered."""
+        pending = sorted(self.state.pending.values(), key=lambda mention: int(mention['id']))
+        resumed = 0
+        for mention in pending:
+            if mention.get('sending'):
+                # Died between posting and marking done: the reply may be out
+                print(f"[WARN] Mention {mention['id']} may already be answered (interrupted post), not replying again")
+                self.state.mark_done(mention['id'])
+                continue
+            self.queue.put(mention)
+            resumed += 1
+        if resumed:
+            print(f"[MENTIONS] Resuming {resumed} pending")
+
+    def retry_failed(self):
+        """Re-enqueue mentions whose reply failed since the last poll."""
+        with self.failed_lock:
+            failed, self.failed = self.failed, []
+        for mention in failed:
+            self.queue.put(mention)
+        if failed:
+            print(f"[MENTIONS] Retrying {len(failed)} failed")
+
+    def generate_reply(self, mention):
+        """
+        Generate a reply for a mention.
+
+        Args:
+            mention: Mention dict
+
+        Returns:
+            str: Reply text, or None if the mention should be skipped
+        """
+        system_prompt, user_prompt = self.prompt_builder.build_reply_prompt(
+            mention['text'], mention.get('author_username')
+        )
+        reply = clean_tweet(self.grok_client.generate_tweet(system_prompt, user_prompt))
+        if not reply or SKIP_REPLY.fullmatch(reply) or len(reply) > MAX_TWEET_LENGTH:
+            return None
+        return reply
+
+    def handle(self, mention):
+        """Generate and post the reply for a single mention."""
+        try:
+            reply = self.generate_reply(mention)
+            if reply is None:
+                print(f"[SKIP] Mention {mention['id']}")
+                self._count('skipped')
+            elif self.dry_run:
+                print(f"[DRY RUN] Reply to {mention['id']}: {reply}")
+                self._count('replied')
+            else:
+                self.state.mark_sending(mention['id'])
+                self.client.create_tweet(text=reply, in_reply_to_tweet_id=mention['id'])
+                print(f"[REPLIED] {mention['id']}: {reply}")
+                self._count('replied')
+            if not self.dry_run:
+                self.state.mark_done(mention['id'])
+        except Exception as e:
+            print(f"[ERROR] Reply to {mention['id']} failed: {e}")
+            self._count('errors')
+            if self.dry_run:
+                return
+            attempts = self.state.record_failure(mention['id'])
+            if attempts >= MAX_REPLY_ATTEMPTS:
+                print(f"[ERROR] Giving up on mention {mention['id']} after {attempts} attempts")
+                self.state.mark_done(mention['id'])
+            else:
+                with self.failed_lock:
+                    self.failed.append(mention)
+
+    def _worker(self):
+        while True:
+            mention = self.queue.get()
+            try:
+                if mention is None:
+                    return
+                self.handle(mention)
+            finally:
+                self.queue.task_done()
+
+    def start_workers(self):
+        for _ in range(self.num_workers):
+            thread = threading.Thread(target=self._worker, daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def stop_workers(self):
+        """Let workers drain the queue, then stop them."""
+        for _ in self.threads:
+            self.queue.put(None)
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
+
+    def run_once(self):
+        """
+        Answer pending mentions, poll once, drain the queue and return.
+
+        Failed replies stay pending for the next run.
+        """
+        self.start_workers()
+        try:
+            self.enqueue_pending()
+            self.poll()
+        finally:
+            self.stop_workers()
+        print(f"[STATS] {self.stats}")
+
+    def run(self, interval=60):
+        """
+        Poll continuously until stopped.
+
+        Args:
+            interval: Seconds between polls
+        """
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, lambda signum, frame: self.stop_event.set())
+
+        self.start_workers()
+        self.enqueue_pending()
+        try:
+            while not self.stop_event.is_set():
+                self.retry_failed()
+                try:
+                    self.poll()
+                except Exception as e:
+                    print(f"[ERROR] Mention poll failed: {e}")
+                self.stop_event.wait(interval)
+        except KeyboardInterrupt:
+            print("\n[STOPPED] Draining reply queue...")
+        finally:
+            self.stop_workers()
+            print(f"[STATS] {self.stats}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Reply to mentions")
+    parser.add_argument('--once', action='store_true',
+                        help="Poll once, answer everything pending and exit")
+    parser.add_argument('--interval', type=int, default=60,
+                        help="Seconds between mention polls")
+    parser.add_argument('--workers', type=int, default=4,
+                        help="Reply worker threads")
+    parser.add_argument('--queue-size', type=int, default=100,
+                        help="Maximum queued mentions")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="Generate replies without posting them")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    bot_module = load_bot_module()
+
+    if not bot_module.HF_TOKEN:
+        print("[ERROR] Missing Hugging Face API token!")
+        sys.exit(1)
+
+    # Mentions are read with real credentials even in dry-run; only posting is skipped
+    bot = bot_module.NovaStaqTwitterBot()
+    reply_bot = ReplyBot(
+        client=bot.client,
+        user_id=bot.user_id,
+        grok_client=bot.grok_client,
+        prompt_builder=bot.prompt_builder,
+        workers=args.workers,
+        queue_size=args.queue_size,
+        dry_run=args.dry_run
+    )
+
+    if args.once:
+        reply_bot.run_once()
+    else:
+        reply_bot.run(interval=args.interval)
@@ -0,0 +1,173 @@
+import json
+import math
+import random
+
+from atomic_io import write_json, file_lock
+
+COUNTERS = ('accepted', 'rejected', 'api_calls', 'posts', 'engagement')
+
+
+class SamplingBandit:
+    """
+    Thompson sampling over (category, length_type, product) combinations.
+
+    Each combination keeps a Beta posterior over its first-pass acceptance
+    rate (valid length, not a duplicate). Selection weights are the static
+    prior (category weight, product focus rate) multiplied by a sample from
+    that posterior and an engagement bonus, so combinations that keep failing
+    validation are picked less often without ever being ruled out.
+
+    Stats persist to a JSON file so learning survives restarts. The bot and
+    the metrics collector update the same file from separate processes, so
+    save() merges this process's new counts into the file under a lock
+    instead of overwriting it.
+    """
+
+    def __init__(self, path='sampling_stats.json', product_rate=0.25, engagement_weight=0.1):
+        """
+        Initialize bandit and load persisted stats.
+
+        Args:
+            path: JSON file for per-combination stats (None keeps them in memory)
+            product_rate: Prior probability of a product focus outside product_spotlight
+            engagement_weight: Strength of the engagement bonus in selection
+        """
+        self.path = path
+        self.product_rate = product_rate
+        self.engagement_weight = engagement_weight
+        self.stats = self.load()
+        self.pending = {}  # counts recorded since the last save
+
+    @staticmethod
+    def arm_key(category, length_type, product):
+        """
+        Build the stats key for a combination.
+
+        Args:
+            category: Category name
+            length_type: Length type
+            product: Product name or None
+
+        Returns:
+            str: Key like "tech_engineering|short|-"
+        """
+        return f"{category}|{length_type}|{product or '-'}"
+
+    def load(self):
+        if self.path is None:
+            return dict(getattr(self, 'stats', {}))
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def save(self):
+        """Add counts recorded since the last save to the file and reload it."""
+        if self.path is None:
+            self.pending = {}
+            return
+        with file_lock(self.path):
+            stats = self.load()
+            for key, delta in self.pending.items():
+                arm = stats.setdefault(key, dict.fromkeys(COUNTERS, 0))
+                for counter, value in delta.items():
+                    arm[counter] = arm.get(counter, 0) + value
+            write_json(self.path, stats)
+        self.stats = stats
+        self.pending = {}
+
+    def _arm(self, key):
+        return self.stats.setdefault(key, dict.fromkeys(COUNTERS, 0))
+
+    def _add(self, key, **counts):
+        arm = self._arm(key)
+        delta = self.pending.setdefault(key, dict.fromkeys(COUNTERS, 0))
+        for counter, value in counts.items():
+            arm[counter] += value
+            delta[counter] += value
+
+    def choose(self, categories, length_types, products):
+        """
+        Sample a combination to generate.
+
+        Args:
+            categories: Category dicts (with 'name' and 'weight')
+            length_types: Length type names
+            products: Product dicts (with 'name')
+
+        Returns:
+            tuple: (category dict, length_type, product dict or None)
+        """
+        arms = []
+        weights = []
+        for category in categories:
+            if category['name'] == 'product_spotlight':
+                product_options = [(p, 1.0 / len(products)) for p in products]
+            else:
+                product_options = [(None, 1.0 - self.product_rate)]
+                product_options += [(p, self.product_rate / len(products)) for p in products]
+
+            for length_type in length_types:
+                for product, product_prior in product_options:
+                    key = self.arm_key(category['name'], length_type, product['name'] if product else None)
+                    prior = category.get('weight', 1.0) * product_prior / len(length_types)
+                    arms.append((category, length_type, product))
+                    weights.append(prior * self._sample(key))
+
+        return random.choices(arms, weights=weights, k=1)[0]
+
+    def _sample(self, key):
+        """Draw acceptance probability from the posterior, scaled by engagement."""
+        arm = self.stats.get(key)
+        if not arm:
+            return random.betavariate(1, 1)
+
+        theta = random.betavariate(1 + arm['accepted'], 1 + arm['rejected'])
+        if arm['posts']:
+            theta *= 1 + self.engagement_weight * math.log1p(arm['engagement'] / arm['posts'])
+        return theta
+
+    def record_attempt(self, category, length_type, product, accepted, api_calls=1):
+        """
+        Record the outcome of one generation attempt.
+
+        Args:
+            category: Category name
+            length_type: Length type
+            product: Product name or None
+            accepted: True if the tweet passed validation, None if the API
+                call failed (only the cost is recorded)
+            api_calls: HTTP requests spent on the attempt, retries included
+        """
+        counts = {'api_calls': api_calls}
+        if accepted is not None:
+            counts['accepted' if accepted else 'rejected'] = 1
+        self._add(self.arm_key(category, length_type, product), **counts)
+
+    def record_engagement(self, category, length_type, product, engagement):
+        """
+        Record engagement for a posted tweet.
+
+        Args:
+            category: Category name
+            length_type: Length type
+            product: Product name or None
+            engagement: Engagement count (likes + retweets + replies + quotes)
+        """
+        self._add(self.arm_key(category, length_type, product), posts=1, engagement=engagement)
+
+    def summary(self):
+        """
+        Per-combination acceptance rate and API calls per accepted tweet.
+
+        Returns:
+            list: (key, acceptance rate, calls per accepted) sorted by rate
+        """
+        rows = []
+        for key, arm in self.stats.items():
+            attempts = arm['accepted'] + arm['rejected']
+            if attempts:
+                calls = arm['api_calls'] / arm['accepted'] if arm['accepted'] else float('inf')
+                rows.append((key, arm['accepted'] / attempts, calls))
+        return sorted(rows, key=lambda row: row[1], reverse=True)
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Scheduler simulation on a virtual clock.
+
+Runs the bot's real posting loop (day rollovers, daily targets, quiet hours,
+gaps between posts) against a VirtualClock, with generation and posting
+replaced by local stand-ins, so thousands of days run in seconds. State and
+history files go to a temporary directory.
+
+Examples:
+    python simulate.py --days 365
+    python simulate.py --days 5000 --seed 7 --start 2026-01-01T09:00
+"""
+
+import os
+import sys
+import random
+import argparse
+import tempfile
+import contextlib
+import statistics
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from bot_loader import load_bot_module
+from clock import VirtualClock
+
+
+class SimulatedTwitterClient:
+    """Records post times from the virtual clock instead of posting."""
+
+    def __init__(self, clock, bot_module):
+        self.clock = clock
+        self.bot_module = bot_module
+        self.posts = []
+
+    def create_tweet(self, text):
+        self.posts.append(self.clock.now())
+        return SimpleNamespace(data={'id': str(len(self.posts))})
+
+
+class Simulation:
+    """
+    Drives the bot loop on a virtual clock and collects schedule metrics.
+    """
+
+    def __init__(self, days, start=None, seed=None, workdir=None):
+        """
+        Args:
+            days: Number of simulated days
+            start: Simulation start datetime (default: today 09:00)
+            seed: Random seed for reproducible schedules
+            workdir: Directory for state/history files
+        """
+        self.days = days
+        self.start = start or datetime.now().replace(hour=9, minute=0, second=0, microsecond=0)
+        self.seed = seed
+        self.workdir = workdir
+        self.targets = {}
+
+    def run(self, verbose=False):
+        """
+        Run the simulation.
+
+        Returns:
+            dict: Report (see report())
+        """
+        if self.seed is not None:
+            random.seed(self.seed)
+
+        bot_module = load_bot_module()
+        for name in ('STATE_FILE', 'TWEET_HISTORY_FILE', 'LEGACY_HISTORY_FILE',
+                     'SAMPLING_STATS_FILE', 'USERNAME_CACHE_FILE'):
+            setattr(bot_module, name, os.path.join(self.workdir, os.path.basename(getattr(bot_module, name))))
+        bot_module.STATE_BACKEND = f"sqlite:///{os.path.join(self.workdir, 'bot_state.db')}"
+
+        clock = VirtualClock(self.start)
+        bot = bot_module.NovaStaqTwitterBot(clock=clock)
+        twitter = SimulatedTwitterClient(clock, bot_module)
+        bot._client = twitter
+        bot._username = "simulated"
+
+        counter = iter(range(10 ** 9))
+        bot.generate_unique_tweet = lambda: f"Simulated tweet {next(counter)} about payments infrastructure in Africa"
+
+        # Record each day's target as the bot picks it
+        start_new_day = bot.start_new_day_if_needed
+
+        def start_new_day_and_record():
+            start_new_day()
+            self.targets[bot.last_tweet_date] = bot_module.TWEETS_PER_DAY
+
+        bot.start_new_day_if_needed = start_new_day_and_record
+
+        until = self.start + timedelta(days=self.days)
+        output = sys.stdout if verbose else open(os.devnull, 'w')
+        try:
+            with contextlib.redirect_stdout(output):
+                bot.run(until=until)
+        finally:
+            if not verbose:
+                output.close()
+
+        return self.report(twitter.posts, bot_module.QUIET_HOURS)
+
+    def report(self, posts, quiet_hours):
+        """
+        Summarize the simulated schedule.
+
+        Args:
+            posts: Post datetimes
+            quiet_hours: Hours in which nothing should be posted
+
+        Returns:
+            dict: posts per day distribution, gap stats, quota and quiet-hour violations
+        """
+        per_day = Counter(post.date() for post in posts)
+        days = [self.start.date() + timedelta(days=i) for i in range(self.days)]
+        counts = [per_day.get(day, 0) for day in days]
+        gaps = [(b - a).total_seconds() / 3600 for a, b in zip(posts, posts[1:])]
+
+        over_quota = [day for day in days if per_day.get(day, 0) > self.targets.get(day, 5)]
+        under_quota = [day for day in days if per_day.get(day, 0) < self.targets.get(day, 3)]
+        quiet = [post for post in posts if post.hour in quiet_hours]
+        hours = defaultdict(int)
+        for post in posts:
+            hours[post.hour] += 1
+
+        return {
+            'days': self.days,
+            'posts': len(posts),
+            'posts_per_day': {
+                'mean': round(statistics.mean(counts), 2) if counts else 0,
+                'min': min(counts) if counts else 0,
+                'max': max(counts) if counts else 0,
+                'distribution': dict(sorted(Counter(counts).items())),
+            },
+            'gap_hours': {
+                'min': round(min(gaps), 2) if gaps else None,
+                'median': round(statistics.median(gaps), 2) if gaps else None,
+                'max': round(max(gaps), 2) if gaps else None,
+            },
+            'over_quota_days': len(over_quota),
+            'under_quota_days': len(under_quota),
+            'quiet_hour_posts': len(quiet),
+            'posts_by_hour': dict(sorted(hours.items())),
+        }
+
+
+def print_report(report):
+    print("=" * 60)
+    print(f"SIMULATION: {report['days']} days, {report['posts']} posts")
+    print("=" * 60)
+    ppd = report['posts_per_day']
+    print(f"[POSTS/DAY] mean {ppd['mean']}, min {ppd['min']}, max {ppd['max']}")
+    print(f"[POSTS/DAY] distribution {ppd['distribution']}")
+    gaps = report['gap_hours']
+    print(f"[GAPS] min {gaps['min']}h, median {gaps['median']}h, max {gaps['max']}h")
+    print(f"[QUOTA] over target: {report['over_quota_days']} days, under target: {report['under_quota_days']} days")
+    print(f"[QUIET HOURS] posts: {report['quiet_hour_posts']}")
+    print(f"[HOURS] {report['posts_by_hour']}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Simulate the posting schedule on a virtual clock")
+    parser.add_argument('--days', type=int, default=365, help="Days to simulate")
+    parser.add_argument('--seed', type=int, default=None, help="Random seed")
+    parser.add_argument('--start', type=datetime.fromisoformat, default=None,
+                        help="Start time, e.g. 2026-01-01T09:00")
+    parser.add_argument('--verbose', action='store_true', help="Show bot output")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as workdir:
+        simulation = Simulation(args.days, start=args.start, seed=args.seed, workdir=workdir)
+        report = simulation.run(verbose=args.verbose)
+    print_report(report)
+    sys.exit(1 if report['quiet_hour_posts'] or report['over_quota_days'] else 0)
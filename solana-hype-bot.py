@@ -1,10 +1,14 @@
 #!/usr/bin/env python3
 import tweepy
-import time
 import random
 import os
 import json
-import re
+import sys
+import signal
+import socket
+import threading
+import hashlib
+import argparse
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 
@@ -12,6 +16,19 @@ from dotenv import load_dotenv
 from grok_client import GrokClient
 from knowledge_base import NovaStaqKnowledgeBase
 from prompt_builder import PromptBuilder
+from history_store import TweetHistory
+from fallback_pool import FallbackPool, LAST_RESORT_TWEET
+from state_backend import get_state_backend
+from budget_governor import (BudgetGovernor, load_draft_texts, STAGE_NORMAL,
+                             STAGE_CACHED_DRAFTS, STAGE_OFFLINE)
+from tweet_rules import LENGTH_TYPES, clean_tweet, is_valid_length
+from sampling_bandit import SamplingBandit
+from token_budget import max_tokens_for_length
+from clock import SystemClock, VirtualClock
+from profiler import Profiler
+from atomic_io import write_json
+from replay import (CassetteWriter, Cassette, RecordingSession, ReplaySession,
+                    RecordingTwitterClient, ReplayTwitterClient, ReplayError)
 
 load_dotenv()
 
@@ -27,83 +44,358 @@ HF_TOKEN = os.getenv('HF_TOKEN')
 HF_MODEL = os.getenv('HF_MODEL', 'meta-llama/Llama-3.3-70B-Instruct')
 HF_TEMPERATURE = float(os.getenv('HF_TEMPERATURE', '0.7'))
 HF_MAX_TOKENS = int(os.getenv('HF_MAX_TOKENS', '150'))
+PROMPT_TOKEN_BUDGET = int(os.getenv('PROMPT_TOKEN_BUDGET', '900')) or None
 
 TWEETS_PER_DAY = random.randint(3, 5)
-TWEET_HISTORY_FILE = 'tweet_history.json'
-MAX_HISTORY = 1000
+TWEET_HISTORY_FILE = 'tweet_history.jsonl'
+LEGACY_HISTORY_FILE = 'tweet_history.json'
+USERNAME_CACHE_FILE = '.twitter_user_cache.json'
+STATE_FILE = 'bot_state.json'
+SAMPLING_STATS_FILE = 'sampling_stats.json'
+STATE_BACKEND = os.getenv('STATE_BACKEND', 'sqlite:///bot_state.db')
+BOT_ACCOUNT = os.getenv('BOT_ACCOUNT', 'default')
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+BOT_PROFILE = os.getenv('BOT_PROFILE')  # output directory enables profiling
+SPECULATIVE_DRAFTS = os.getenv('SPECULATIVE_DRAFTS', '1') != '0'
+DRAFT_MAX_AGE_HOURS = float(os.getenv('DRAFT_MAX_AGE_HOURS', '24'))
+SLOT_RETRY_SECONDS = 60  # wait before retrying a slot another worker is posting
+BULK_DRAFTS_FILE = os.getenv('BULK_DRAFTS_FILE')  # bulk_generate.py output used as cached drafts
+
+# LLM budget per tweet and per day for the account (0 = no limit)
+BUDGET_TWEET_REQUESTS = int(os.getenv('BUDGET_TWEET_REQUESTS', '12'))
+BUDGET_TWEET_TOKENS = int(os.getenv('BUDGET_TWEET_TOKENS', '15000'))
+BUDGET_TWEET_SECONDS = float(os.getenv('BUDGET_TWEET_SECONDS', '300'))
+BUDGET_DAY_REQUESTS = int(os.getenv('BUDGET_DAY_REQUESTS', '150'))
+BUDGET_DAY_TOKENS = int(os.getenv('BUDGET_DAY_TOKENS', '150000'))
+BUDGET_DAY_SECONDS = float(os.getenv('BUDGET_DAY_SECONDS', '3600'))
+BUDGET_CHEAP_MODEL = os.getenv('BUDGET_CHEAP_MODEL')
+QUIET_HOURS = set(range(23, 24)) | set(range(0, 8))
 
 # Old template arrays removed - now using Grok AI with Novastaq knowledge base
-# Fallback templates kept in _generate_fallback_tweet() method
+# Offline fallback tweets come from fallback_pool.py
+
+
+def create_twitter_client(wait_on_rate_limit=True):
+    """Twitter API v2 client from the configured credentials."""
+    return tweepy.Client(
+        bearer_token=BEARER_TOKEN,
+        consumer_key=API_KEY,
+        consumer_secret=API_SECRET,
+        access_token=ACCESS_TOKEN,
+        access_token_secret=ACCESS_TOKEN_SECRET,
+        wait_on_rate_limit=wait_on_rate_limit
+    )
+
+
+def create_state_backend(read_only=False):
+    """
+    State backend from STATE_BACKEND for BOT_ACCOUNT (see state_backend.py).
+
+    Args:
+        read_only: Leave the store untouched (dry runs)
+    """
+    return get_state_backend(
+        STATE_BACKEND,
+        account=BOT_ACCOUNT,
+        read_only=read_only,
+        state_path=STATE_FILE,
+        history_path=TWEET_HISTORY_FILE,
+        legacy_history_path=LEGACY_HISTORY_FILE
+    )
+
 
 class NovaStaqTwitterBot:
-    def __init__(self):
-        # Initialize Twitter client
-        self.client = tweepy.Client(
-            bearer_token=BEARER_TOKEN,
-            consumer_key=API_KEY,
-            consumer_secret=API_SECRET,
-            access_token=ACCESS_TOKEN,
-            access_token_secret=ACCESS_TOKEN_SECRET,
-            wait_on_rate_limit=True
-        )
-        me = self.client.get_me()
-        self.username = me.data.username
-        print(f"[OK] @{self.username} - Novastaq AI Bot\n")
+    def __init__(self, dry_run=False, record=None, replay=None, replay_speed=0.0, clock=None, state_backend=None, profile=None):
+        """
+        Initialize bot. Twitter auth and knowledge files are deferred until
+        first use so short-lived runs start without network round trips.
 
-        # Initialize Hugging Face AI components
-        print("Initializing Hugging Face AI system...")
+        Args:
+            dry_run: Generate tweets without Twitter auth, never post and
+                never write state, history or sampling stats (the state
+                backend is opened read-only)
+            record: Cassette path to record LLM and Twitter traffic to
+            replay: Cassette path to serve LLM and Twitter traffic from.
+                A replayed run uses in-memory state seeded with the history
+                recorded in the cassette, and a VirtualClock by default
+            replay_speed: Replay latency multiplier (0 = instant, 1 = original)
+            clock: Time source with now() and sleep() (default: SystemClock;
+                see clock.VirtualClock for simulation)
+            state_backend: Shared history/schedule store (default: from
+                STATE_BACKEND; see state_backend.py)
+            profile: Directory for profiler output (default: BOT_PROFILE;
+                unset disables profiling)
+        """
+        self.dry_run = dry_run
+        self.clock = clock or (VirtualClock() if replay else SystemClock())
+        self._client = None
+        self._username = None
+        self._user_id = None
+
+        # Record/replay transports (see replay.py)
+        self.recorder = CassetteWriter(record) if record else None
+        self.cassette = Cassette(replay, speed=replay_speed) if replay else None
+        session = None
+        if self.cassette:
+            session = ReplaySession(self.cassette)
+        elif self.recorder:
+            session = RecordingSession(self.recorder)
+
+        # Hugging Face AI components (knowledge files load on first access)
         self.grok_client = GrokClient(
             api_key=HF_TOKEN,
             model=HF_MODEL,
             temperature=HF_TEMPERATURE,
-            max_tokens=HF_MAX_TOKENS
+            max_tokens=HF_MAX_TOKENS,
+            session=session,
+            sleep=self.clock.sleep
         )
         self.knowledge_base = NovaStaqKnowledgeBase()
         self.prompt_builder = PromptBuilder(self.knowledge_base)
-        print("[OK] Hugging Face AI initialized\n")
+        self.bandit = SamplingBandit(None if self.cassette or self.dry_run else SAMPLING_STATS_FILE)
+        self.last_selection = None
+        self.fallback_pool = None
+        self.draft_pool = None
+        self.governor = BudgetGovernor(
+            self.grok_client,
+            self.clock,
+            tweet_limits={'requests': BUDGET_TWEET_REQUESTS, 'tokens': BUDGET_TWEET_TOKENS,
+                          'seconds': BUDGET_TWEET_SECONDS},
+            day_limits={'requests': BUDGET_DAY_REQUESTS, 'tokens': BUDGET_DAY_TOKENS,
+                        'seconds': BUDGET_DAY_SECONDS},
+            cheap_model=BUDGET_CHEAP_MODEL
+        )
 
-        # Tweet tracking
+        # Tweet tracking (shared with other workers through the state backend)
+        if self.cassette and not state_backend:
+            # Replays must not see (or change) this directory's state
+            state_backend = get_state_backend('sqlite:///:memory:', account=BOT_ACCOUNT)
+        self.state_backend = state_backend or create_state_backend(read_only=dry_run)
         self.history = self.load_history()
         self.tweets_today = 0
-        self.last_tweet_date = datetime.now().date()
+        self.last_tweet_date = self.clock.now().date()
+        self.next_tweet_at = None
+        self.pending_draft = None
+        self.stopping = False
+        self.load_state()
+
+        self.profiler = None
+        profile = profile or BOT_PROFILE
+        if profile:
+            self.profiler = Profiler(profile)
+            self.profiler.instrument(self, {
+                'iteration': 'post_next_tweet',
+                'generate': 'generate_unique_tweet',
+                'clean': '_clean_tweet',
+                'post': 'post_tweet',
+            })
+            self.profiler.instrument(self.prompt_builder, {'prompt': 'build_prompts'})
+            self.profiler.instrument(self.grok_client, {'llm': 'generate_tweet'})
+            self.profiler.start()
+
+    @property
+    def client(self):
+        """Twitter client, created on first access."""
+        if self._client is None:
+            if self.dry_run:
+                raise RuntimeError("Twitter client is not available in dry-run mode")
+            if self.cassette:
+                self._client = ReplayTwitterClient(self.cassette)
+                return self._client
+            self._client = create_twitter_client()
+            if self.recorder:
+                self._client = RecordingTwitterClient(self._client, self.recorder)
+        return self._client
+
+    @property
+    def username(self):
+        """Authenticated username, resolved once and cached to disk."""
+        if self._username is None:
+            if self.dry_run:
+                self._username = "dry-run"
+            else:
+                self._username, self._user_id = self._resolve_user()
+        return self._username
+
+    @property
+    def user_id(self):
+        """Authenticated user id, resolved once and cached to disk."""
+        if self._user_id is None:
+            self._username, self._user_id = self._resolve_user()
+        return self._user_id
+
+    def _resolve_user(self):
+        """
+        Look up the username and id for the configured access token, using
+        the on-disk cache to skip the get_me() call when possible.
 
-    def load_history(self):
+        Returns:
+            tuple: (username, user id)
+        """
+        # Recorded runs always call get_me() so cassettes are self-contained
+        use_cache = not (self.recorder or self.cassette)
+        cache_key = hashlib.sha256((ACCESS_TOKEN or '').encode()).hexdigest()[:16]
         try:
-            with open(TWEET_HISTORY_FILE, 'r') as f:
-                return set(json.load(f))
-        except FileNotFoundError:
-            return set()
+            if not use_cache:
+                raise FileNotFoundError
+            with open(USERNAME_CACHE_FILE, 'r') as f:
+                cache = json.load(f)
+            if cache.get('key') == cache_key and cache.get('username') and cache.get('id'):
+                return cache['username'], cache['id']
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+
+        me = self.client.get_me()
+        username, user_id = me.data.username, str(me.data.id)
+        if use_cache:
+            write_json(USERNAME_CACHE_FILE, {'key': cache_key, 'username': username, 'id': user_id})
+        return username, user_id
+
+    def load_history(self):
+        history = self.state_backend.history
+        if self.cassette:
+            # Start from the history the recorded run started from
+            try:
+                texts = self.cassette.next('state', 'history')['response']
+            except ReplayError:
+                texts = []  # cassette recorded without a history snapshot
+            for text in texts:
+                history.add(text)
+            return history
+
+        if not self.dry_run and not isinstance(history, TweetHistory) and len(history) == 0 \
+                and (os.path.exists(TWEET_HISTORY_FILE) or os.path.exists(LEGACY_HISTORY_FILE)):
+            # First run on a shared backend: import the local history files
+            legacy = TweetHistory(TWEET_HISTORY_FILE, legacy_path=LEGACY_HISTORY_FILE)
+            for record in legacy.records():
+                record.pop('fp', None)
+                history.add(record.pop('text'), **record)
+            print(f"[OK] Imported {len(history)} tweets into shared history")
+        if self.recorder:
+            # Snapshot for replays, which run against in-memory state
+            self.recorder.write('state', 'history', {}, response=list(history))
+        return history
 
     def save_history(self):
-        history_list = list(self.history)[-MAX_HISTORY:]
-        with open(TWEET_HISTORY_FILE, 'w') as f:
-            json.dump(history_list, f)
+        self.history.save()
+
+    def load_state(self):
+        """Restore today's count, daily target and next scheduled slot."""
+        global TWEETS_PER_DAY
+        state = self.state_backend.load_day()
+        if not state and not self.cassette and STATE_BACKEND != 'json' and os.path.exists(STATE_FILE):
+            # First run on a shared backend: pick up the local state file
+            try:
+                with open(STATE_FILE, 'r') as f:
+                    state = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                state = None
+        if state:
+            self.last_tweet_date = datetime.strptime(state['date'], '%Y-%m-%d').date()
+            self.tweets_today = state.get('tweets_today', 0)
+            TWEETS_PER_DAY = state.get('target', TWEETS_PER_DAY)
+            next_tweet_at = state.get('next_tweet_at')
+            self.next_tweet_at = datetime.fromisoformat(next_tweet_at) if next_tweet_at else None
+            self.pending_draft = state.get('pending_draft')
+            self.governor.load(state.get('spend'))
+
+        # A worker that died between posting and saving (possibly before any
+        # day state was written) leaves its slot posted but uncounted; count
+        # it so the next slot can be claimed
+        posted = self.state_backend.posted_slots(self.last_tweet_date.isoformat())
+        if posted > self.tweets_today:
+            print(f"[STATE] {posted - self.tweets_today} posted slot(s) missing from day state, recovered")
+            self.tweets_today = posted
+            self.schedule_next_tweet()
+
+    def save_state(self):
+        """
+        Persist today's count, daily target and next scheduled slot.
+
+        Uses compare-and-set: if another worker saved since our last load,
+        nothing is written and our view is reloaded instead. LLM spend since
+        the last write survives the reload and is added to the other
+        worker's totals on the next save, so workers share one daily budget.
+        Dry runs write nothing.
+
+        Returns:
+            bool: True if written (always True in a dry run)
+        """
+        if self.dry_run:
+            return True
+        state = {
+            'date': self.last_tweet_date.isoformat(),
+            'tweets_today': self.tweets_today,
+            'target': TWEETS_PER_DAY,
+            'next_tweet_at': self.next_tweet_at.isoformat() if self.next_tweet_at else None,
+            'pending_draft': self.pending_draft,
+            'spend': self.governor.to_dict()
+        }
+        if self.state_backend.save_day(state, self.state_backend.version):
+            self.governor.saved()
+            return True
+
+        print("[STATE] Updated by another worker, reloading")
+        self.load_state()
+        return False
 
     def generate_unique_tweet(self, max_attempts=10):
         """
         Generate unique tweet using Grok API with Novastaq knowledge base.
 
+        LLM spend is capped by the budget governor: as the day's budget runs
+        low, fewer attempts are made, a cheaper model is used, bulk drafts
+        are preferred and finally only the offline fallback pool is used
+        (see budget_governor.py).
+
         Returns:
             str: Generated tweet text
         """
+        stage = self.governor.begin_tweet()
+        try:
+            tweet = None
+            if stage >= STAGE_CACHED_DRAFTS:
+                tweet = self._take_cached_draft()
+            if not tweet and stage < STAGE_OFFLINE:
+                tweet = self._generate_llm_tweet(stage, max_attempts)
+            return tweet or self._take_cached_draft() or self._generate_fallback_tweet()
+        finally:
+            self.governor.end_tweet()
+
+    def _generate_llm_tweet(self, stage, max_attempts):
+        """
+        Generate a tweet with the LLM within the tweet's budget.
+
+        Args:
+            stage: Budget stage (see budget_governor.STAGES)
+            max_attempts: Attempts at full budget
+
+        Returns:
+            str or None: Accepted tweet, or None if every attempt failed
+        """
+        max_attempts = self.governor.max_attempts(stage, max_attempts)
+        model = self.governor.model(stage, HF_MODEL)
         for attempt in range(max_attempts):
+            if not self.governor.allow_attempt():
+                print("[SPEND] Budget reached, no more attempts for this tweet")
+                break
+            requests_before = self.grok_client.total_usage['requests']
+            selection = None
             try:
-                # 1. Randomly select tweet parameters
-                category = self.knowledge_base.get_random_category()
-                # More variety: very_short, short, medium, long, very_long
-                length_type = random.choice(['very_short', 'short', 'medium', 'long', 'very_long'])
-
-                # 25% chance to focus on specific product
-                product = None
-                if category['name'] == 'product_spotlight' or random.random() < 0.25:
-                    product = self.knowledge_base.get_random_product()
-
-                # 2. Build prompts
-                system_prompt = self.prompt_builder.build_system_prompt()
-                user_prompt = self.prompt_builder.build_user_prompt(
+                # 1. Select tweet parameters (weights learned from past acceptance)
+                category, length_type, product = self.bandit.choose(
+                    self.knowledge_base.get_all_categories(),
+                    LENGTH_TYPES,
+                    self.knowledge_base.get_all_products()
+                )
+                selection = (category['name'], length_type, product['name'] if product else None)
+
+                # 2. Build prompts within the input token budget
+                system_prompt, user_prompt = self.prompt_builder.build_prompts(
                     category=category,
                     length_type=length_type,
-                    product=product
+                    product=product,
+                    token_budget=PROMPT_TOKEN_BUDGET
                 )
 
                 # 3. Generate tweet via Grok API
@@ -115,40 +407,78 @@ class NovaStaqTwitterBot:
 
                 tweet = self.grok_client.generate_tweet(
                     system_prompt=system_prompt,
-                    user_prompt=user_prompt
+                    user_prompt=user_prompt,
+                    max_tokens=max_tokens_for_length(length_type),
+                    max_retries=self.governor.max_retries(),
+                    model=model
                 )
+                usage = self.grok_client.last_usage
+                print(f"[TOKENS] in={usage['input_tokens']} out={usage['output_tokens']}"
+                      + (" (estimated)" if usage['estimated'] else ""))
 
                 # 4. Clean and validate
                 tweet = self._clean_tweet(tweet)
 
                 # 5. Check uniqueness and length
-                if tweet and tweet not in self.history and 50 <= len(tweet) <= 280:
+                rejection = self._rejection_reason(tweet)
+                accepted = rejection is None
+                self._record_attempt(selection, accepted, requests_before)
+                if accepted:
                     print(f"[OK] Generated ({len(tweet)} chars)")
+                    self.last_selection = selection
                     return tweet
                 else:
-                    if tweet in self.history:
+                    if rejection == 'duplicate':
                         print(f"[WARN] Duplicate detected, retrying... ({attempt+1}/{max_attempts})")
-                    elif tweet:
+                    elif rejection == 'length':
                         print(f"[WARN] Invalid length ({len(tweet)} chars), retrying...")
 
+            except ReplayError:
+                raise
             except Exception as e:
                 print(f"[ERROR] API error (attempt {attempt+1}): {e}")
 
                 # Try simpler prompt on later attempts
-                if attempt >= max_attempts // 2:
+                tweet = None
+                if stage == STAGE_NORMAL and attempt >= max_attempts // 2 and self.governor.allow_attempt():
                     print("[INFO] Trying simpler prompt...")
                     try:
                         system_prompt, user_prompt = self.prompt_builder.build_simple_fallback_prompt()
-                        tweet = self.grok_client.generate_tweet(system_prompt, user_prompt)
+                        tweet = self.grok_client.generate_tweet(system_prompt, user_prompt,
+                                                                max_retries=self.governor.max_retries(),
+                                                                model=model)
                         tweet = self._clean_tweet(tweet)
-                        if tweet and tweet not in self.history and 50 <= len(tweet) <= 280:
-                            return tweet
-                    except:
-                        pass
+                        if self._rejection_reason(tweet) is not None:
+                            tweet = None
+                    except ReplayError:
+                        raise
+                    except Exception:
+                        tweet = None
+
+                # The failed call and the simpler prompt count as this attempt's cost
+                self._record_attempt(selection, None, requests_before)
+                if tweet:
+                    self.last_selection = None
+                    return tweet
 
-        # Ultimate fallback
         print("[WARN] Max attempts reached, using fallback")
-        return self._generate_fallback_tweet()
+        return None
+
+    def _record_attempt(self, selection, accepted, requests_before):
+        """
+        Record an attempt and its HTTP requests (retries included) for the bandit.
+
+        Args:
+            selection: (category, length_type, product) names, or None if the
+                attempt failed before choosing
+            accepted: Passed validation (None if the API call failed)
+            requests_before: grok_client.total_usage['requests'] at the start
+        """
+        if selection is None:
+            return
+        api_calls = self.grok_client.total_usage['requests'] - requests_before
+        self.bandit.record_attempt(*selection, accepted=accepted, api_calls=api_calls)
+        self.bandit.save()
 
     def _clean_tweet(self, tweet):
         """
@@ -160,139 +490,408 @@ class NovaStaqTwitterBot:
         Returns:
             str: Cleaned tweet
         """
-        if not tweet:
-            return ""
+        return clean_tweet(tweet)
 
-        # Remove surrounding quotes
-        tweet = tweet.strip('"\'')
+    def _rejection_reason(self, tweet):
+        """
+        Validate a cleaned tweet before posting.
 
-        # Remove emojis
-        emoji_pattern = re.compile("["
-            u"\U0001F600-\U0001F64F"  # emoticons
-            u"\U0001F300-\U0001F5FF"  # symbols & pictographs
-            u"\U0001F680-\U0001F6FF"  # transport & map
-            u"\U0001F1E0-\U0001F1FF"  # flags
-            u"\U00002700-\U000027BF"  # dingbats
-            u"\U0001F900-\U0001F9FF"  # supplemental symbols
-            "]+", flags=re.UNICODE)
-        tweet = emoji_pattern.sub('', tweet)
+        Args:
+            tweet: Cleaned tweet
 
-        # Remove bullet points and dashes at start of lines
-        tweet = re.sub(r'^[-•]\s*', '', tweet, flags=re.MULTILINE)
+        Returns:
+            str or None: 'empty', 'duplicate' or 'length', or None if it can be posted
+        """
+        if not tweet:
+            return 'empty'
+        if tweet in self.history:
+            return 'duplicate'
+        if not is_valid_length(tweet):
+            return 'length'
+        return None
+
+    def _take_cached_draft(self):
+        """
+        Next bulk draft (BULK_DRAFTS_FILE, written by bulk_generate.py) not
+        yet in history.
 
-        # Normalize whitespace
-        tweet = ' '.join(tweet.split())
+        Returns:
+            str or None: Draft text, or None if there are none left
+        """
+        if not BULK_DRAFTS_FILE:
+            return None
+        if self.draft_pool is None:
+            self.draft_pool = FallbackPool(load_draft_texts(BULK_DRAFTS_FILE), self.history)
 
-        return tweet.strip()
+        tweet = self.draft_pool.next()
+        if tweet:
+            self.last_selection = None
+            print(f"[DRAFT] Using bulk draft ({len(self.draft_pool)} left)")
+        return tweet
 
     def _generate_fallback_tweet(self):
         """
-        Simple fallback when Grok API fails.
+        Offline tweet for when the LLM fails: the next pool candidate not
+        yet in history (see fallback_pool.py).
 
         Returns:
-            str: Simple Novastaq-branded tweet
-        """
-        products = ["Velcro", "BitNova", "Stakepadi", "Tsara", "Criptpay"]
-        topics = [
-            "Building decentralized payment infrastructure for Africa.",
-            "Bringing Web3 innovation to real-world financial challenges.",
-            "The future of payments is decentralized, transparent, and accessible.",
-            "Solving liquidity challenges with blockchain technology.",
-            "Web3 infrastructure for African payment systems.",
-            "Blockchain technology solving real payment problems in Africa.",
-            "Decentralized finance meets real-world utility.",
-            "Building the payment rails Africa needs."
-        ]
-
-        # Try simple format first
-        fallback = f"Novastaq: {random.choice(topics)}"
-        if fallback not in self.history and len(fallback) <= 280:
-            return fallback
-
-        # Try product mention
-        fallback = f"{random.choice(products)} is transforming payments in Africa."
-        if fallback not in self.history and len(fallback) <= 280:
-            return fallback
-
-        # Last resort
-        return "Building the future of decentralized payments in Africa."
+            str: Novastaq-branded tweet
+        """
+        self.last_selection = None
+        if self.fallback_pool is None:
+            self.fallback_pool = FallbackPool(self.knowledge_base.get_fallback_candidates(), self.history)
+
+        tweet = self.fallback_pool.next()
+        if tweet:
+            print(f"[FALLBACK] Local template tweet ({len(self.fallback_pool)} unused left)")
+            return tweet
+
+        print("[FALLBACK] Pool exhausted")
+        return LAST_RESORT_TWEET
 
     def post_tweet(self, text):
+        if self.dry_run:
+            print(f"[DRY RUN] {text}\n")
+            return True
+
         try:
             response = self.client.create_tweet(text=text)
             tweet_id = response.data['id']
-            self.history.add(text)
+            record = {'tweet_id': str(tweet_id), 'posted_at': self.clock.now().isoformat()}
+            if self.last_selection:
+                record['category'], record['length_type'], record['product'] = self.last_selection
+            self.history.add(text, **record)
             self.save_history()
             self.tweets_today += 1
             print(f"[POSTED] {text}")
             print(f"[URL] https://twitter.com/{self.username}/status/{tweet_id}")
             print(f"[STATS] Today: {self.tweets_today}/{TWEETS_PER_DAY}\n")
             return True
+        except ReplayError:
+            raise
         except Exception as e:
             print(f"[ERROR] {e}")
             return False
 
     def calculate_next_tweet_time(self):
-        current_hour = datetime.now().hour
+        now = self.clock.now()
+        current_hour = now.hour
         if current_hour >= 23 or current_hour < 8:
-            tomorrow_morning = datetime.now().replace(
+            tomorrow_morning = now.replace(
                 hour=random.randint(8, 10), minute=random.randint(0, 59), second=0
             ) + timedelta(days=1 if current_hour >= 23 else 0)
-            return (tomorrow_morning - datetime.now()).total_seconds()
+            return (tomorrow_morning - now).total_seconds()
         return random.uniform(2, 6) * 3600
 
-    def run(self):
+    def schedule_next_tweet(self):
+        """Pick the next posting slot and return the seconds until it."""
+        wait_seconds = self.calculate_next_tweet_time()
+        self.next_tweet_at = self.clock.now() + timedelta(seconds=wait_seconds)
+        print(f"[NEXT] {self.next_tweet_at.strftime('%I:%M %p')}")
+        return wait_seconds
+
+    def start_new_day_if_needed(self):
+        """Reset the daily counter and pick a new target on date change."""
         global TWEETS_PER_DAY
+        current_date = self.clock.now().date()
+        if current_date != self.last_tweet_date:
+            print(f"\n[NEW DAY] Yesterday: {self.tweets_today} tweets")
+            self.tweets_today = 0
+            self.last_tweet_date = current_date
+            TWEETS_PER_DAY = random.randint(3, 5)
+            if self.save_state():
+                print(f"[TARGET] Today: {TWEETS_PER_DAY} tweets\n")
+
+    def seconds_until_next_post(self):
+        """
+        Seconds until the next tweet is due (0 = post now).
+
+        A slot that comes due during quiet hours is moved to the next
+        morning instead of posting at night.
+
+        Returns:
+            float: Seconds to wait
+        """
+        now = self.clock.now()
+        if self.next_tweet_at and now < self.next_tweet_at:
+            return (self.next_tweet_at - now).total_seconds()
+        if now.hour in QUIET_HOURS:
+            return self.schedule_next_tweet()
+        return 0
+
+    def prepare_next_draft(self):
+        """
+        Generate the next tweet ahead of its slot so posting does not wait
+        on the LLM. The draft is kept in the day state until it is used.
+        """
+        text = self.generate_unique_tweet()
+        self.pending_draft = {
+            'text': text,
+            'selection': list(self.last_selection) if self.last_selection else None,
+            'created_at': self.clock.now().isoformat()
+        }
+        print(f"[DRAFT] Next tweet ready ({len(text)} chars)")
+
+    def take_pending_draft(self):
+        """
+        Use the pre-generated draft if it is still valid.
+
+        It is re-checked against history (another worker or a manual post
+        may have used it meanwhile), the length limits and its age.
+
+        Returns:
+            str or None: Draft text, or None if there is none or it went stale
+        """
+        draft, self.pending_draft = self.pending_draft, None
+        if not draft:
+            return None
+
+        age = self.clock.now() - datetime.fromisoformat(draft['created_at'])
+        if age > timedelta(hours=DRAFT_MAX_AGE_HOURS):
+            reason = "too old"
+        elif draft['text'] in self.history:
+            reason = "already posted"
+        elif not is_valid_length(draft['text']):
+            reason = "invalid length"
+        else:
+            self.last_selection = tuple(draft['selection']) if draft.get('selection') else None
+            print("[DRAFT] Using pre-generated tweet")
+            return draft['text']
+
+        print(f"[DRAFT] Discarding pre-generated tweet ({reason})")
+        return None
+
+    def ensure_draft(self):
+        """Pre-generate a draft while waiting for the next slot, if none is stored."""
+        if SPECULATIVE_DRAFTS and not self.dry_run and not self.stopping and self.pending_draft is None:
+            self.prepare_next_draft()
+            self.save_state()
+
+    def post_next_tweet(self):
+        """
+        Claim the next posting slot, then generate, post and record a tweet.
+
+        The slot ("<date>#<n>") is claimed atomically in the state backend,
+        so when several workers run for one account only one posts it. A
+        pre-generated draft is used when still valid, and the next one is
+        generated right after posting.
+
+        Returns:
+            bool or None: True if posted, False if posting failed, None if
+            another worker owns the slot
+        """
+        if self.dry_run:
+            return self.post_tweet(self.generate_unique_tweet())
+
+        slot = f"{self.last_tweet_date.isoformat()}#{self.tweets_today}"
+        if not self.state_backend.claim_slot(slot, WORKER_ID, now=self.clock.now()):
+            print(f"[SKIP] Slot {slot} claimed by another worker")
+            self.load_state()
+            return None
+
+        try:
+            tweet = self.take_pending_draft() or self.generate_unique_tweet()
+            posted = self.post_tweet(tweet)
+        except BaseException:
+            # Forced shutdown mid-slot: free it so a restart can post at once
+            self.state_backend.release_slot(slot, WORKER_ID)
+            raise
+        if not posted:
+            self.state_backend.release_slot(slot, WORKER_ID)
+            return False
+
+        self.state_backend.complete_slot(slot, WORKER_ID)
+        self.schedule_next_tweet()
+        while not self.save_state():
+            # Another worker changed the day state meanwhile. The reload
+            # counts our slot from the slot table (see load_state), so the
+            # reloaded state only needs to be written back
+            pass
+
+        # Count and schedule are saved first; the draft is a bonus
+        if SPECULATIVE_DRAFTS and not self.stopping:
+            self.prepare_next_draft()
+            self.save_state()
+        return True
+
+    def install_signal_handlers(self):
+        """
+        Stop gracefully on SIGTERM/SIGINT.
+
+        The first signal lets the tweet being generated or posted finish,
+        wakes the loop from its sleep and checkpoints state; a second
+        signal aborts immediately.
+        """
+        def handle(signum, frame):
+            if self.stopping:
+                raise KeyboardInterrupt
+            self.stopping = True
+            print(f"\n[SHUTDOWN] {signal.Signals(signum).name} received, finishing current work...")
+            self.clock.interrupt()
+
+        if threading.current_thread() is threading.main_thread():
+            for signum in (signal.SIGTERM, signal.SIGINT):
+                signal.signal(signum, handle)
+
+    def checkpoint(self):
+        """
+        Persist counters, schedule, pending draft, history and sampling stats
+        on shutdown, and close the traffic recording.
+        """
+        if not self.dry_run:
+            self.save_state()
+            self.save_history()
+            self.bandit.save()
+            print(f"[CHECKPOINT] Today: {self.tweets_today}/{TWEETS_PER_DAY}, "
+                  f"draft {'ready' if self.pending_draft else 'none'}")
+        self.close()
+
+    def close(self):
+        """Finish the traffic recording, if any (a .gz cassette needs its end marker)."""
+        if self.recorder:
+            self.recorder.close()
+            self.recorder = None
+
+    def run_once(self, force=False):
+        """
+        Post a single tweet if one is due, persist state and return.
+
+        Intended for cron or systemd timers: nothing stays resident between
+        runs, the schedule lives in the state backend.
+
+        Args:
+            force: Post now, ignoring the daily target and scheduled slot
+
+        Returns:
+            bool: True if a tweet was posted
+        """
+        self.install_signal_handlers()
+        self.start_new_day_if_needed()
+
+        if not force:
+            if self.tweets_today >= TWEETS_PER_DAY:
+                print(f"[COMPLETE] Goal reached ({self.tweets_today}/{TWEETS_PER_DAY} tweets)")
+                self.save_state()
+                return False
+
+            if self.seconds_until_next_post() > 0:
+                print(f"[WAIT] Next tweet due at {self.next_tweet_at.strftime('%I:%M %p')}")
+                self.save_state()
+                self.ensure_draft()
+                return False
+
+        return bool(self.post_next_tweet())
+
+    def run(self, until=None):
+        """
+        Main posting loop.
+
+        Args:
+            until: Stop once the clock passes this datetime (default: run forever)
+        """
         print("=" * 60)
         print("NOVASTAQ AI TWITTER BOT")
         print("=" * 60)
+        print(f"[OK] @{self.username} - Novastaq AI Bot")
         print(f"[TARGET] {TWEETS_PER_DAY} tweets/day")
         print(f"[ENGINE] Powered by Hugging Face AI (FREE)")
         print(f"[FOCUS] Novastaq + Web3 Education\n")
 
-        while True:
+        self.install_signal_handlers()
+        while not self.stopping and (until is None or self.clock.now() < until):
             try:
-                current_date = datetime.now().date()
-                if current_date != self.last_tweet_date:
-                    print(f"\n[NEW DAY] Yesterday: {self.tweets_today} tweets")
-                    self.tweets_today = 0
-                    self.last_tweet_date = current_date
-                    TWEETS_PER_DAY = random.randint(3, 5)
-                    print(f"[TARGET] Today: {TWEETS_PER_DAY} tweets\n")
+                # Pick up changes made by other workers sharing the backend
+                self.load_state()
+                self.start_new_day_if_needed()
 
                 if self.tweets_today >= TWEETS_PER_DAY:
                     print(f"[COMPLETE] Goal reached ({self.tweets_today} tweets)")
                     print("[SLEEP] Waiting until tomorrow...")
-                    time.sleep(3600)
+                    self.clock.sleep(3600)
                     continue
 
-                tweet = self.generate_unique_tweet()
-                if self.post_tweet(tweet):
-                    wait_seconds = self.calculate_next_tweet_time()
-                    next_time = datetime.now() + timedelta(seconds=wait_seconds)
-                    print(f"[NEXT] {next_time.strftime('%I:%M %p')}")
-                    time.sleep(wait_seconds)
+                scheduled = self.next_tweet_at
+                wait_seconds = self.seconds_until_next_post()
+                if wait_seconds > 0:
+                    if self.next_tweet_at != scheduled:
+                        self.save_state()
+                    self.ensure_draft()
+                    self.clock.sleep(self.seconds_until_next_post())
+                    continue
+
+                posted = self.post_next_tweet()
+                if posted:
+                    self.clock.sleep(self.seconds_until_next_post())
+                elif posted is False:
+                    self.clock.sleep(1800)
                 else:
-                    time.sleep(1800)
+                    # Another worker is posting this slot: wait for its schedule
+                    self.clock.sleep(self.seconds_until_next_post() or SLOT_RETRY_SECONDS)
 
             except KeyboardInterrupt:
-                print(f"\n[STOPPED] Today: {self.tweets_today} tweets")
+                break
+            except ReplayError as e:
+                print(f"[REPLAY] {e}")
                 break
             except Exception as e:
                 print(f"[ERROR] {e}")
-                time.sleep(600)
+                self.clock.sleep(600)
+
+        self.checkpoint()
+        print(f"[STOPPED] Today: {self.tweets_today} tweets")
+
+    def run_dry(self, count=1):
+        """
+        Generate tweets without Twitter auth or posting.
+
+        Args:
+            count: Number of tweets to generate
+        """
+        print("=" * 60)
+        print("NOVASTAQ AI TWITTER BOT - DRY RUN")
+        print("=" * 60)
+
+        try:
+            for i in range(count):
+                print(f"\n[TWEET {i+1}/{count}]")
+                self.post_tweet(self.generate_unique_tweet())
+        finally:
+            self.close()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Novastaq AI Twitter bot")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="Generate tweets without Twitter auth and exit")
+    parser.add_argument('--count', type=int, default=1,
+                        help="Number of tweets to generate in dry-run mode")
+    parser.add_argument('--record', metavar='CASSETTE',
+                        help="Record LLM and Twitter traffic to a cassette file")
+    parser.add_argument('--replay', metavar='CASSETTE',
+                        help="Serve LLM and Twitter traffic from a cassette file")
+    parser.add_argument('--replay-speed', type=float, default=0.0,
+                        help="Replay latency multiplier (0 = instant, 1 = original)")
+    parser.add_argument('--profile', nargs='?', const='profiles', metavar='DIR',
+                        help="Profile generation and write flame-graph stacks to DIR (default: profiles)")
+    return parser.parse_args()
 
 if __name__ == "__main__":
-    # Validate credentials
-    if not all([API_KEY, API_SECRET, ACCESS_TOKEN, ACCESS_TOKEN_SECRET, BEARER_TOKEN]):
+    args = parse_args()
+
+    # Validate credentials (a replayed run needs none)
+    if not args.dry_run and not args.replay and not all([API_KEY, API_SECRET, ACCESS_TOKEN, ACCESS_TOKEN_SECRET, BEARER_TOKEN]):
         print("[ERROR] Missing Twitter API credentials!")
-        exit(1)
+        sys.exit(1)
 
-    if not HF_TOKEN or HF_TOKEN == "YOUR_HF_TOKEN_HERE":
+    if not args.replay and (not HF_TOKEN or HF_TOKEN == "YOUR_HF_TOKEN_HERE"):
         print("[ERROR] Missing Hugging Face API token!")
         print("[INFO] Get your free token at: https://huggingface.co/settings/tokens")
-        exit(1)
-
-    # Start bot
-    bot = NovaStaqTwitterBot()
-    bot.run()
+        sys.exit(1)
+
+    options = {'record': args.record, 'replay': args.replay, 'replay_speed': args.replay_speed,
+               'profile': args.profile}
+    if args.dry_run:
+        NovaStaqTwitterBot(dry_run=True, **options).run_dry(count=args.count)
+    else:
+        # Start bot
+        bot = NovaStaqTwitterBot(**options)
+        bot.run()
@@ -0,0 +1,543 @@
+"""
+Shared state backends for running several bot workers for one account.
+
+A backend holds tweet history, engagement metrics, the day's
+counters/schedule and posting slot claims. Day state is written with
+compare-and-set on a version number and each posting slot ("<date>#<n>")
+can be claimed by exactly one worker, so redundant workers never post the
+same slot twice.
+
+Backends are selected by URL:
+    sqlite:///bot_state.db       SQLite file (default; safe across processes)
+    redis://localhost:6379/0     Redis or a Redis-compatible server (needs the redis package)
+    json                         Legacy JSON files (single worker only)
+"""
+
+import os
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from datetime import datetime, timedelta
+
+from atomic_io import write_json, append_line
+from history_store import TweetHistory, fingerprint, normalize_tweet
+
+# Engagement counters stored per metrics sample, in this order
+METRIC_FIELDS = ('like_count', 'retweet_count', 'reply_count', 'quote_count', 'impression_count')
+
+
+def _signed(fp):
+    """Map an unsigned 64-bit fingerprint into SQLite's signed INTEGER range."""
+    return fp - (1 << 64) if fp >= (1 << 63) else fp
+
+
+def get_state_backend(url, account='default', read_only=False, **kwargs):
+    """
+    Create a state backend from a URL.
+
+    Args:
+        url: Backend URL (see module docstring)
+        account: Account namespace, so several accounts can share one store
+        read_only: Leave the store untouched (dry runs): SQLite works on an
+            in-memory copy, JSON files are only read. Redis is opened as
+            usual, so callers must not write to it
+        **kwargs: Passed to JsonStateBackend (file paths)
+
+    Returns:
+        State backend instance
+    """
+    if url.startswith('sqlite:///'):
+        return SQLiteStateBackend(url[len('sqlite:///'):], account=account, read_only=read_only)
+    if url.startswith('redis://') or url.startswith('rediss://'):
+        return RedisStateBackend(url, account=account)
+    if url == 'json':
+        return JsonStateBackend(read_only=read_only, **kwargs)
+    raise ValueError(f"Unknown state backend: {url}")
+
+
+class JsonStateBackend:
+    """
+    Legacy file backend: bot_state.json plus TweetHistory files.
+
+    Has no cross-process coordination; use it for a single worker only.
+    """
+
+    def __init__(self, state_path='bot_state.json', history_path='tweet_history.jsonl', legacy_history_path=None,
+                 read_only=False):
+        self.state_path = state_path
+        self.history = TweetHistory(history_path, legacy_path=legacy_history_path, read_only=read_only)
+        self.metrics = JsonlMetrics(os.path.splitext(history_path)[0] + '_metrics.jsonl')
+        self.version = 0
+
+    def load_day(self):
+        try:
+            with open(self.state_path, 'r') as f:
+                state = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        self.version = state.get('version', 0)
+        return state
+
+    def save_day(self, state, version):
+        state = dict(state, version=version + 1)
+        write_json(self.state_path, state)
+        return True
+
+    def claim_slot(self, slot, worker_id, stale_after=900, now=None):
+        return True
+
+    def complete_slot(self, slot, worker_id):
+        pass
+
+    def release_slot(self, slot, worker_id):
+        pass
+
+    def posted_slots(self, date):
+        return 0
+
+
+class JsonlMetrics:
+    """
+    Engagement time series as an append-only JSON Lines file.
+
+    One compact array per sample: [tweet_id, unix_time, *METRIC_FIELDS],
+    with null counters once a tweet is gone (deleted or unavailable).
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def _read(self):
+        try:
+            with open(self.path, 'r') as f:
+                for line in f:
+                    try:
+                        row = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    yield row[0], row[1], (tuple(row[2:]) if row[2] is not None else None)
+        except FileNotFoundError:
+            return
+
+    def add(self, samples):
+        """Append (tweet_id, unix_time, counts tuple or None) samples."""
+        lines = [json.dumps([tweet_id, at] + (list(counts) if counts else [None] * len(METRIC_FIELDS)),
+                            separators=(',', ':'))
+                 for tweet_id, at, counts in samples]
+        if lines:
+            append_line(self.path, '\n'.join(lines))
+
+    def latest(self):
+        """Most recent sample per tweet: {tweet_id: (unix_time, counts or None)}."""
+        latest = {}
+        for tweet_id, at, counts in self._read():
+            if tweet_id not in latest or at >= latest[tweet_id][0]:
+                latest[tweet_id] = (at, counts)
+        return latest
+
+    def series(self, tweet_id):
+        """All samples of one tweet, oldest first: [(unix_time, counts or None)]."""
+        return sorted((at, counts) for tid, at, counts in self._read() if tid == tweet_id)
+
+
+class SQLiteHistory:
+    """Tweet history table keyed by fingerprint, with the TweetHistory interface."""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def __len__(self):
+        row = self.backend.execute("SELECT COUNT(*) FROM history WHERE account = ?", (self.backend.account,)).fetchone()
+        return row[0]
+
+    def __contains__(self, text):
+        if not text:
+            return False
+        rows = self.backend.execute(
+            "SELECT text FROM history WHERE account = ? AND fp = ?",
+            (self.backend.account, _signed(fingerprint(text)))
+        ).fetchall()
+        normalized = normalize_tweet(text)
+        return any(normalize_tweet(row[0]) == normalized for row in rows)
+
+    def __iter__(self):
+        for row in self.backend.execute("SELECT text FROM history WHERE account = ? ORDER BY rowid", (self.backend.account,)).fetchall():
+            yield row[0]
+
+    def records(self):
+        for text, data in self.backend.execute(
+                "SELECT text, data FROM history WHERE account = ? ORDER BY rowid", (self.backend.account,)).fetchall():
+            record = json.loads(data) if data else {}
+            record['text'] = text
+            yield record
+
+    def add(self, text, **fields):
+        with self.backend.transaction() as conn:
+            conn.execute(
+                "INSERT INTO history (account, fp, text, data) VALUES (?, ?, ?, ?)",
+                (self.backend.account, _signed(fingerprint(text)), text, json.dumps(fields) if fields else None)
+            )
+
+    def save(self):
+        """Writes are committed as they happen."""
+
+
+class SQLiteMetrics:
+    """Engagement time series table, one integer row per sample."""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def add(self, samples):
+        """Store (tweet_id, unix_time, counts tuple or None) samples."""
+        rows = [(self.backend.account, tweet_id, at) + (tuple(counts) if counts else (None,) * len(METRIC_FIELDS))
+                for tweet_id, at, counts in samples]
+        with self.backend.transaction() as conn:
+            conn.executemany("INSERT OR REPLACE INTO metrics VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def latest(self):
+        """Most recent sample per tweet: {tweet_id: (unix_time, counts or None)}."""
+        rows = self.backend.execute(
+            "SELECT tweet_id, MAX(at), likes, retweets, replies, quotes, impressions "
+            "FROM metrics WHERE account = ? GROUP BY tweet_id", (self.backend.account,)
+        ).fetchall()
+        return {row[0]: (row[1], tuple(row[2:]) if row[2] is not None else None) for row in rows}
+
+    def series(self, tweet_id):
+        """All samples of one tweet, oldest first: [(unix_time, counts or None)]."""
+        rows = self.backend.execute(
+            "SELECT at, likes, retweets, replies, quotes, impressions FROM metrics "
+            "WHERE account = ? AND tweet_id = ? ORDER BY at", (self.backend.account, tweet_id)
+        ).fetchall()
+        return [(row[0], tuple(row[1:]) if row[1] is not None else None) for row in rows]
+
+
+class SQLiteStateBackend:
+    """
+    SQLite backend (WAL mode, IMMEDIATE transactions for writes).
+
+    Safe for several worker processes on one host sharing the database file.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS history (
+            account TEXT NOT NULL, fp INTEGER NOT NULL, text TEXT NOT NULL, data TEXT);
+        CREATE INDEX IF NOT EXISTS history_fp ON history (account, fp);
+        CREATE TABLE IF NOT EXISTS day_state (
+            account TEXT PRIMARY KEY, state TEXT NOT NULL, version INTEGER NOT NULL);
+        CREATE TABLE IF NOT EXISTS slots (
+            account TEXT NOT NULL, slot TEXT NOT NULL, worker TEXT NOT NULL,
+            claimed_at TEXT NOT NULL, status TEXT NOT NULL, PRIMARY KEY (account, slot));
+        CREATE TABLE IF NOT EXISTS metrics (
+            account TEXT NOT NULL, tweet_id TEXT NOT NULL, at INTEGER NOT NULL,
+            likes INTEGER, retweets INTEGER, replies INTEGER, quotes INTEGER, impressions INTEGER,
+            PRIMARY KEY (account, tweet_id, at)) WITHOUT ROWID;
+    """
+
+    def __init__(self, path='bot_state.db', account='default', read_only=False):
+        """
+        Open (and create) the database.
+
+        Args:
+            path: SQLite database file
+            account: Account namespace
+            read_only: Work on an in-memory copy of the file (if any), so
+                nothing is ever written to it
+        """
+        self.path = path
+        self.account = account
+        self.lock = threading.RLock()
+        if read_only:
+            self.conn = sqlite3.connect(':memory:', isolation_level=None, check_same_thread=False)
+            if os.path.exists(path):
+                source = sqlite3.connect(Path(path).resolve().as_uri() + '?mode=ro', uri=True)
+                try:
+                    source.backup(self.conn)
+                finally:
+                    source.close()
+        else:
+            self.conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.SCHEMA)
+        self.history = SQLiteHistory(self)
+        self.metrics = SQLiteMetrics(self)
+        self.version = 0
+
+    def execute(self, sql, params=()):
+        with self.lock:
+            return self.conn.execute(sql, params)
+
+    def transaction(self):
+        return _Transaction(self)
+
+    def load_day(self):
+        row = self.execute("SELECT state, version FROM day_state WHERE account = ?", (self.account,)).fetchone()
+        if not row:
+            self.version = 0
+            return None
+        self.version = row[1]
+        return json.loads(row[0])
+
+    def save_day(self, state, version):
+        """
+        Write day state if nobody else has written since `version`.
+
+        Returns:
+            bool: True if written, False if another worker got there first
+        """
+        with self.transaction() as conn:
+            row = conn.execute("SELECT version FROM day_state WHERE account = ?", (self.account,)).fetchone()
+            current = row[0] if row else 0
+            if current != version:
+                return False
+            conn.execute(
+                "INSERT INTO day_state (account, state, version) VALUES (?, ?, ?) "
+                "ON CONFLICT(account) DO UPDATE SET state = excluded.state, version = excluded.version",
+                (self.account, json.dumps(state), version + 1)
+            )
+        self.version = version + 1
+        return True
+
+    def claim_slot(self, slot, worker_id, stale_after=900, now=None):
+        """
+        Atomically claim a posting slot.
+
+        A claim left by a worker that died mid-post is taken over once it is
+        older than stale_after seconds; posted slots are never reclaimed.
+
+        Args:
+            slot: Slot key ("<date>#<index>")
+            worker_id: Claiming worker
+            stale_after: Seconds after which another worker's claim expires
+            now: Current time from the caller's clock (default: wall clock)
+
+        Returns:
+            bool: True if this worker now owns the slot
+        """
+        now = now or datetime.now()
+        with self.transaction() as conn:
+            row = conn.execute(
+                "SELECT worker, claimed_at, status FROM slots WHERE account = ? AND slot = ?",
+                (self.account, slot)
+            ).fetchone()
+            if row:
+                worker, claimed_at, status = row
+                stale = now - datetime.fromisoformat(claimed_at) > timedelta(seconds=stale_after)
+                if status == 'posted' or (worker != worker_id and not stale):
+                    return False
+            conn.execute(
+                "INSERT OR REPLACE INTO slots (account, slot, worker, claimed_at, status) VALUES (?, ?, ?, ?, 'claimed')",
+                (self.account, slot, worker_id, now.isoformat())
+            )
+        return True
+
+    def complete_slot(self, slot, worker_id):
+        self.execute(
+            "UPDATE slots SET status = 'posted' WHERE account = ? AND slot = ? AND worker = ?",
+            (self.account, slot, worker_id)
+        )
+
+    def release_slot(self, slot, worker_id):
+        self.execute(
+            "DELETE FROM slots WHERE account = ? AND slot = ? AND worker = ? AND status = 'claimed'",
+            (self.account, slot, worker_id)
+        )
+
+    def posted_slots(self, date):
+        """
+        Slots of a day known to be posted, from the slot table.
+
+        Args:
+            date: ISO date of the slots
+
+        Returns:
+            int: Highest posted slot number + 1 (0 if none)
+        """
+        rows = self.execute(
+            "SELECT slot FROM slots WHERE account = ? AND slot LIKE ? AND status = 'posted'",
+            (self.account, f"{date}#%")
+        ).fetchall()
+        return max((int(row[0].split('#')[1]) + 1 for row in rows), default=0)
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT/ROLLBACK under the backend lock."""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def __enter__(self):
+        self.backend.lock.acquire()
+        self.backend.conn.execute("BEGIN IMMEDIATE")
+        return self.backend.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.backend.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self.backend.lock.release()
+        return False
+
+
+class RedisHistory:
+    """Tweet history in Redis: fingerprint -> JSON list of records in a hash."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.key = backend.key('history')
+        self.order_key = backend.key('history:order')
+
+    def __len__(self):
+        return self.backend.redis.llen(self.order_key)
+
+    def __contains__(self, text):
+        if not text:
+            return False
+        raw = self.backend.redis.hget(self.key, format(fingerprint(text), '016x'))
+        if not raw:
+            return False
+        normalized = normalize_tweet(text)
+        return any(normalize_tweet(record['text']) == normalized for record in json.loads(raw))
+
+    def records(self):
+        for fp in self.backend.redis.lrange(self.order_key, 0, -1):
+            raw = self.backend.redis.hget(self.key, fp)
+            if raw:
+                yield from json.loads(raw)
+
+    def __iter__(self):
+        for record in self.records():
+            yield record['text']
+
+    def add(self, text, **fields):
+        fp = format(fingerprint(text), '016x')
+        record = dict(fields, text=text)
+        with self.backend.redis.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(self.key)
+                    raw = pipe.hget(self.key, fp)
+                    records = json.loads(raw) if raw else []
+                    records.append(record)
+                    pipe.multi()
+                    pipe.hset(self.key, fp, json.dumps(records))
+                    if not raw:
+                        pipe.rpush(self.order_key, fp)
+                    pipe.execute()
+                    return
+                except self.backend.watch_error:
+                    continue
+
+    def save(self):
+        """Writes are applied as they happen."""
+
+
+class RedisMetrics:
+    """Engagement time series in Redis: one list of compact samples per tweet."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.latest_key = backend.key('metrics:latest')
+
+    def add(self, samples):
+        """Store (tweet_id, unix_time, counts tuple or None) samples."""
+        with self.backend.redis.pipeline() as pipe:
+            for tweet_id, at, counts in samples:
+                sample = json.dumps([at] + (list(counts) if counts else [None] * len(METRIC_FIELDS)),
+                                    separators=(',', ':'))
+                pipe.rpush(self.backend.key(f"metrics:{tweet_id}"), sample)
+                pipe.hset(self.latest_key, tweet_id, sample)
+            pipe.execute()
+
+    @staticmethod
+    def _decode(sample):
+        row = json.loads(sample)
+        return row[0], (tuple(row[1:]) if row[1] is not None else None)
+
+    def latest(self):
+        """Most recent sample per tweet: {tweet_id: (unix_time, counts or None)}."""
+        return {tweet_id: self._decode(sample) for tweet_id, sample in self.backend.redis.hgetall(self.latest_key).items()}
+
+    def series(self, tweet_id):
+        """All samples of one tweet, oldest first: [(unix_time, counts or None)]."""
+        return [self._decode(sample) for sample in self.backend.redis.lrange(self.backend.key(f"metrics:{tweet_id}"), 0, -1)]
+
+
+class RedisStateBackend:
+    """
+    Redis backend for workers spread across hosts.
+
+    Slot claims use SET NX with an expiry; day state uses WATCH/MULTI for
+    compare-and-set on its version.
+    """
+
+    def __init__(self, url, account='default', prefix='novastaq'):
+        try:
+            import redis
+        except ImportError:
+            raise ImportError("The redis state backend needs the redis package: pip install redis")
+
+        self.redis = redis.Redis.from_url(url, decode_responses=True)
+        self.watch_error = redis.WatchError
+        self.account = account
+        self.prefix = prefix
+        self.history = RedisHistory(self)
+        self.metrics = RedisMetrics(self)
+        self.version = 0
+
+    def key(self, name):
+        return f"{self.prefix}:{self.account}:{name}"
+
+    def load_day(self):
+        data = self.redis.hgetall(self.key('day'))
+        if not data:
+            self.version = 0
+            return None
+        self.version = int(data.get('version', 0))
+        return json.loads(data['state'])
+
+    def save_day(self, state, version):
+        key = self.key('day')
+        with self.redis.pipeline() as pipe:
+            try:
+                pipe.watch(key)
+                current = int(pipe.hget(key, 'version') or 0)
+                if current != version:
+                    return False
+                pipe.multi()
+                pipe.hset(key, mapping={'state': json.dumps(state), 'version': version + 1})
+                pipe.execute()
+            except self.watch_error:
+                return False
+        self.version = version + 1
+        return True
+
+    def claim_slot(self, slot, worker_id, stale_after=900, now=None):
+        # Claims expire by Redis TTL (server time), so `now` is not needed
+        key = self.key(f"slot:{slot}")
+        if self.redis.set(key, json.dumps({'worker': worker_id, 'status': 'claimed'}), nx=True, ex=stale_after):
+            return True
+        # Re-entrant for the worker that already holds it
+        current = self.redis.get(key)
+        return bool(current) and json.loads(current) == {'worker': worker_id, 'status': 'claimed'}
+
+    def complete_slot(self, slot, worker_id):
+        # Posted slots never expire within the day they belong to
+        self.redis.set(self.key(f"slot:{slot}"), json.dumps({'worker': worker_id, 'status': 'posted'}), ex=3 * 86400)
+
+    def release_slot(self, slot, worker_id):
+        key = self.key(f"slot:{slot}")
+        current = self.redis.get(key)
+        if current and json.loads(current) == {'worker': worker_id, 'status': 'claimed'}:
+            self.redis.delete(key)
+
+    def posted_slots(self, date):
+        """Highest posted slot number of a day + 1 (0 if none)."""
+        posted = 0
+        for key in self.redis.scan_iter(match=self.key(f"slot:{date}#*")):
+            value = self.redis.get(key)
+            if value and json.loads(value).get('status') == 'posted':
+                posted = max(posted, int(key.rsplit('#', 1)[1]) + 1)
+        return posted
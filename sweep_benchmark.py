@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Model and sampling-parameter sweep.
+
+Runs the same set of tweet prompts through GrokClient for every combination
+of model, temperature and max_tokens, passes each output through the bot's
+cleaning and posting validation, and reports per configuration:
+
+    accepted   share of generations the bot would post
+    latency    p50/p90/max seconds per generation (including HTTP retries)
+    req/acc    HTTP requests per accepted tweet (API cost, retries included)
+    gen/acc    generations per accepted tweet (attempts in generate_unique_tweet)
+    tok/acc    input + output tokens per accepted tweet
+
+Prompts are planned once from a seed, so every configuration answers the
+same prompts. Outputs are validated as the bot would, except that duplicates
+only count within a configuration (not against the live tweet history), so
+results stay comparable between runs. Use --record to keep a live sweep
+and --replay to reprocess it offline (the replayed sweep must use the same
+grid, samples and seed), or --endpoint for a local OpenAI-compatible server.
+
+Examples:
+    python sweep_benchmark.py --models meta-llama/Llama-3.3-70B-Instruct,Qwen/Qwen2.5-72B-Instruct \\
+        --temperatures 0.5,0.7,0.9 --samples 20 --record runs/sweep.jsonl.gz
+    python sweep_benchmark.py --temperatures 0.7,0.9 --max-tokens auto,150 --endpoint http://localhost:8080/v1/chat/completions
+    python sweep_benchmark.py --models ... --temperatures 0.5,0.7,0.9 --samples 20 --replay runs/sweep.jsonl.gz
+"""
+
+import sys
+import time
+import random
+import argparse
+from itertools import product as grid
+from dotenv import load_dotenv
+
+from bot_loader import load_bot_module
+from grok_client import GrokClient
+from replay import ReplayError
+from history_store import fingerprint
+from tweet_rules import LENGTH_TYPES, is_valid_length
+from token_budget import max_tokens_for_length
+from atomic_io import write_json
+
+load_dotenv()
+
+REJECTIONS = ('empty', 'duplicate', 'length', 'error')
+
+
+class CountingSession:
+    """Counts HTTP requests (GrokClient retries included) on a requests-style session."""
+
+    def __init__(self, session):
+        self.session = session
+        self.requests = 0
+
+    def post(self, *args, **kwargs):
+        self.requests += 1
+        return self.session.post(*args, **kwargs)
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of a list (0 for an empty list)."""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, max(0, round(q / 100 * len(values)) - 1))]
+
+
+class SweepBenchmark:
+    """
+    Measures acceptance, latency and cost for a grid of generation settings.
+    """
+
+    def __init__(self, bot, api_key=None, endpoint=None, max_retries=3, prompt_token_budget=None):
+        """
+        Initialize benchmark.
+
+        Args:
+            bot: NovaStaqTwitterBot (dry run) supplying prompts, cleaning,
+                validation and the LLM transport (live, recording or replay)
+            api_key: LLM API key (default: the bot's)
+            endpoint: OpenAI-compatible endpoint (default: Hugging Face)
+            max_retries: GrokClient retries per generation, as in production
+            prompt_token_budget: Input token budget for prompts (the bot's
+                PROMPT_TOKEN_BUDGET)
+        """
+        self.bot = bot
+        self.api_key = api_key or bot.grok_client.api_key
+        self.endpoint = endpoint
+        self.max_retries = max_retries
+        self.prompt_token_budget = prompt_token_budget
+        self.session = CountingSession(bot.grok_client.session)
+        self.backoff = 0.0
+
+    def plan(self, samples, seed=0):
+        """
+        Plan the prompts shared by every configuration.
+
+        Returns:
+            list: (length_type, system_prompt, user_prompt) per sample
+        """
+        kb = self.bot.knowledge_base
+        categories = kb.get_all_categories()
+        weights = [category.get('weight', 1.0) for category in categories]
+        prompts = []
+        for index in range(samples):
+            rng = random.Random(f"{seed}:{index}")
+            category = rng.choices(categories, weights=weights, k=1)[0]
+            length_type = rng.choice(LENGTH_TYPES)
+            product = None
+            if category['name'] == 'product_spotlight' or rng.random() < 0.25:
+                product = rng.choice(kb.get_all_products())
+            system_prompt, user_prompt = self.bot.prompt_builder.build_prompts(
+                category=category, length_type=length_type, product=product,
+                token_budget=self.prompt_token_budget
+            )
+            prompts.append((length_type, system_prompt, user_prompt))
+        return prompts
+
+    def _sleep(self, seconds):
+        """GrokClient retry backoff through the bot's clock (virtual on replay)."""
+        self.backoff += seconds
+        self.bot.clock.sleep(seconds)
+
+    def _latency(self, start, backoff_before):
+        """Seconds for one generation; replayed backoff is scaled like replayed requests."""
+        elapsed = time.monotonic() - start
+        if self.bot.cassette:
+            elapsed += (self.backoff - backoff_before) * self.bot.cassette.speed
+        return elapsed
+
+    @staticmethod
+    def _rejection_reason(tweet, seen):
+        """
+        Validate a cleaned tweet like the bot, with duplicates checked only
+        against this configuration's accepted tweets.
+
+        Returns:
+            str or None: 'empty', 'duplicate' or 'length', or None if accepted
+        """
+        if not tweet:
+            return 'empty'
+        if fingerprint(tweet) in seen:
+            return 'duplicate'
+        if not is_valid_length(tweet):
+            return 'length'
+        return None
+
+    def _replay_exhausted(self):
+        cassette = self.bot.cassette
+        return cassette is not None and 'llm.post' not in cassette.remaining()
+
+    def run_config(self, prompts, model, temperature, max_tokens):
+        """
+        Generate and validate every planned prompt with one configuration.
+
+        Args:
+            prompts: Output of plan()
+            model: Model name
+            temperature: Sampling temperature
+            max_tokens: Output token cap, or 'auto' for the bot's per-length cap
+
+        Returns:
+            dict or None: Result row, or None if a replay cassette ran out
+        """
+        client = GrokClient(
+            api_key=self.api_key,
+            model=model,
+            temperature=temperature,
+            api_endpoint=self.endpoint,
+            session=self.session,
+            sleep=self._sleep
+        )
+        requests_before = self.session.requests
+        latencies = []
+        rejections = dict.fromkeys(REJECTIONS, 0)
+        seen = set()
+
+        for length_type, system_prompt, user_prompt in prompts:
+            if self._replay_exhausted():
+                print("[ERROR] Replay cassette exhausted (grid, samples or seed differ from the recording?)")
+                return None
+            start, backoff_before = time.monotonic(), self.backoff
+            try:
+                raw = client.generate_tweet(
+                    system_prompt, user_prompt, max_retries=self.max_retries,
+                    max_tokens=max_tokens_for_length(length_type) if max_tokens == 'auto' else max_tokens
+                )
+            except ReplayError as e:
+                print(f"[ERROR] {e} (grid, samples or seed differ from the recording?)")
+                return None
+            except Exception as e:
+                latencies.append(self._latency(start, backoff_before))
+                rejections['error'] += 1
+                print(f"[ERROR] {model} t={temperature}: {e}")
+                continue
+            latencies.append(self._latency(start, backoff_before))
+
+            tweet = self.bot._clean_tweet(raw)
+            rejection = self._rejection_reason(tweet, seen)
+            if rejection:
+                rejections[rejection] += 1
+            else:
+                seen.add(fingerprint(tweet))
+
+        accepted = len(seen)
+        requests = self.session.requests - requests_before
+        tokens = client.total_usage['input_tokens'] + client.total_usage['output_tokens']
+
+        def per_accepted(value):
+            return round(value / accepted, 2) if accepted else None
+
+        return {
+            'model': model,
+            'temperature': temperature,
+            'max_tokens': max_tokens,
+            'samples': len(prompts),
+            'accepted': accepted,
+            'acceptance': round(accepted / len(prompts), 3) if prompts else 0.0,
+            'rejections': rejections,
+            'latency_p50': round(percentile(latencies, 50), 3),
+            'latency_p90': round(percentile(latencies, 90), 3),
+            'latency_max': round(max(latencies, default=0.0), 3),
+            'requests': requests,
+            'requests_per_accepted': per_accepted(requests),
+            'generations_per_accepted': per_accepted(len(prompts)),
+            'tokens_per_accepted': per_accepted(tokens),
+            'output_tokens_per_accepted': per_accepted(client.total_usage['output_tokens']),
+        }
+
+    def run(self, models, temperatures, max_tokens, samples, seed=0):
+        """
+        Run the full grid.
+
+        Returns:
+            list: Result rows, cheapest per accepted tweet first
+        """
+        prompts = self.plan(samples, seed)
+        results = []
+        for model, temperature, tokens in grid(models, temperatures, max_tokens):
+            print(f"[SWEEP] {model} temperature={temperature} max_tokens={tokens} ({samples} samples)")
+            row = self.run_config(prompts, model, temperature, tokens)
+            if row is None:
+                break
+            results.append(row)
+        results.sort(key=lambda r: (r['requests_per_accepted'] is None, r['requests_per_accepted'] or 0,
+                                    r['latency_p50']))
+        return results
+
+
+def print_results(results):
+    print(f"\n{'model':<40} {'temp':>5} {'max_tok':>7} {'accepted':>9} {'p50 s':>7} {'p90 s':>7} "
+          f"{'req/acc':>8} {'gen/acc':>8} {'tok/acc':>8}")
+    for r in results:
+        def show(value):
+            return '-' if value is None else value
+        print(f"{r['model'][-40:]:<40} {r['temperature']:>5} {str(r['max_tokens']):>7} "
+              f"{r['acceptance']:>9.1%} {r['latency_p50']:>7} {r['latency_p90']:>7} "
+              f"{show(r['requests_per_accepted']):>8} {show(r['generations_per_accepted']):>8} "
+              f"{show(r['tokens_per_accepted']):>8}")
+        rejected = ', '.join(f"{k}={v}" for k, v in r['rejections'].items() if v)
+        if rejected:
+            print(f"{'':<40} rejected: {rejected}")
+
+
+def parse_list(value, convert=str):
+    return [convert(item.strip()) for item in value.split(',') if item.strip()]
+
+
+def parse_max_tokens(value):
+    return value if value == 'auto' else int(value)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark models and sampling parameters per accepted tweet")
+    parser.add_argument('--models', help="Comma-separated models (default: HF_MODEL)")
+    parser.add_argument('--temperatures', help="Comma-separated temperatures (default: HF_TEMPERATURE)")
+    parser.add_argument('--max-tokens', default='auto',
+                        help="Comma-separated output token caps; 'auto' = per-length cap as in the bot")
+    parser.add_argument('--samples', type=int, default=20, help="Prompts per configuration")
+    parser.add_argument('--seed', type=int, default=0, help="Prompt planning seed")
+    parser.add_argument('--max-retries', type=int, default=3, help="GrokClient retries per generation")
+    parser.add_argument('--endpoint', help="OpenAI-compatible chat completions URL (e.g. a local server)")
+    parser.add_argument('--record', metavar='CASSETTE', help="Record LLM traffic to a cassette file")
+    parser.add_argument('--replay', metavar='CASSETTE', help="Serve LLM traffic from a cassette file")
+    parser.add_argument('--replay-speed', type=float, default=0.0,
+                        help="Replay latency multiplier (0 = instant, 1 = original)")
+    parser.add_argument('--output', help="Write results as JSON")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    bot_module = load_bot_module()
+    if not (args.replay or args.endpoint) and not bot_module.HF_TOKEN:
+        print("[ERROR] Missing Hugging Face API token!")
+        sys.exit(1)
+
+    bot = bot_module.NovaStaqTwitterBot(dry_run=True, record=args.record,
+                                        replay=args.replay, replay_speed=args.replay_speed)
+    benchmark = SweepBenchmark(bot, endpoint=args.endpoint, max_retries=args.max_retries,
+                               prompt_token_budget=bot_module.PROMPT_TOKEN_BUDGET)
+    results = benchmark.run(
+        models=parse_list(args.models) if args.models else [bot_module.HF_MODEL],
+        temperatures=parse_list(args.temperatures, float) if args.temperatures else [bot_module.HF_TEMPERATURE],
+        max_tokens=parse_list(args.max_tokens, parse_max_tokens),
+        samples=args.samples,
+        seed=args.seed
+    )
+    print_results(results)
+    if bot.recorder:
+        bot.recorder.close()
+    if args.output:
+        write_json(args.output, results, indent=2)
+        print(f"\n[OK] Results written to {args.output}")
+    sys.exit(0 if results else 1)
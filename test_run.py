@@ -1,28 +1,43 @@
 #!/usr/bin/env python3
 """
 Test run: Post 3 tweets then stop to verify everything works.
+
+Use --dry-run to exercise generation without Twitter auth or posting.
+Use --record run.jsonl.gz once, then --replay run.jsonl.gz to rerun the same
+traffic offline (see replay.py).
 """
 
 import os
 import sys
+import argparse
 from dotenv import load_dotenv
 
-# Import from the file directly
 sys.path.insert(0, os.path.dirname(__file__))
-import importlib.util
-spec = importlib.util.spec_from_file_location("bot", "solana-hype-bot.py")
-bot_module = importlib.util.module_from_spec(spec)
-spec.loader.exec_module(bot_module)
-NovaStaqTwitterBot = bot_module.NovaStaqTwitterBot
+
+from bot_loader import load_bot_module
 
 load_dotenv()
 
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Post 3 test tweets")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="Generate tweets without Twitter auth or posting")
+    parser.add_argument('--record', metavar='CASSETTE',
+                        help="Record LLM and Twitter traffic to a cassette file")
+    parser.add_argument('--replay', metavar='CASSETTE',
+                        help="Serve LLM and Twitter traffic from a cassette file")
+    parser.add_argument('--replay-speed', type=float, default=0.0,
+                        help="Replay latency multiplier (0 = instant, 1 = original)")
+    args = parser.parse_args()
+
     print("=" * 60)
-    print("TEST RUN - POSTING 3 TWEETS")
+    print("TEST RUN - POSTING 3 TWEETS" + (" (DRY RUN)" if args.dry_run else ""))
     print("=" * 60)
 
-    bot = NovaStaqTwitterBot()
+    bot_module = load_bot_module()
+    bot = bot_module.NovaStaqTwitterBot(dry_run=args.dry_run, record=args.record,
+                                        replay=args.replay, replay_speed=args.replay_speed)
 
     for i in range(3):
         print(f"\n[TWEET {i+1}/3]")
@@ -37,6 +52,8 @@ if __name__ == "__main__":
         else:
             print(f"[FAILED] Could not generate tweet {i+1}")
 
+    bot.close()
+
     print("\n" + "=" * 60)
     print("[COMPLETE] Test run finished")
     print("=" * 60)
@@ -0,0 +1,22 @@
+import os
+import sys
+
+import pytest
+
+# The bot's modules live at the repository root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+KNOWLEDGE_DIR = os.path.join(ROOT, "knowledge")
+
+from bot_loader import load_bot_module
+
+
+@pytest.fixture
+def bot_module(tmp_path, monkeypatch):
+    """solana-hype-bot.py loaded fresh, with its state and history files in tmp_path."""
+    monkeypatch.chdir(tmp_path)
+    module = load_bot_module()
+    module.STATE_BACKEND = f"sqlite:///{tmp_path / 'bot_state.db'}"
+    module.SPECULATIVE_DRAFTS = False
+    return module
@@ -0,0 +1,72 @@
+"""
+Local fakes for the Twitter API and the LLM client.
+"""
+
+from types import SimpleNamespace
+
+
+class FakeTwitterClient:
+    """
+    In-memory stand-in for the tweepy.Client calls the bots make.
+
+    Mentions are returned newest first in pages of max_results, as the
+    Twitter API does.
+    """
+
+    def __init__(self, failures=0):
+        """
+        Args:
+            failures: Number of create_tweet calls that raise before succeeding
+        """
+        self.mentions = []
+        self.users = {}
+        self.tweets = []
+        self.failures = failures
+        self.next_id = 1000
+
+    def add_mention(self, text, author_id='7', username='alice'):
+        self.next_id += 1
+        self.users[author_id] = username
+        self.mentions.append(SimpleNamespace(id=self.next_id, text=text, author_id=author_id))
+        return str(self.next_id)
+
+    def get_users_mentions(self, id, since_id=None, pagination_token=None, max_results=10, **kwargs):
+        matching = sorted((m for m in self.mentions if since_id is None or m.id > int(since_id)),
+                          key=lambda m: m.id, reverse=True)
+        start = int(pagination_token or 0)
+        page = matching[start:start + max_results]
+        meta = {'result_count': len(page)}
+        if matching:
+            meta['newest_id'] = str(matching[0].id)
+        if start + max_results < len(matching):
+            meta['next_token'] = str(start + max_results)
+        users = [SimpleNamespace(id=author_id, username=name) for author_id, name in self.users.items()]
+        return SimpleNamespace(data=page or None, includes={'users': users}, meta=meta)
+
+    def create_tweet(self, text, in_reply_to_tweet_id=None, **kwargs):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("503 Service Unavailable")
+        self.next_id += 1
+        self.tweets.append({'id': str(self.next_id), 'text': text, 'in_reply_to': in_reply_to_tweet_id})
+        return SimpleNamespace(data={'id': str(self.next_id), 'text': text})
+
+
+class FakeGrokClient:
+    """GrokClient stand-in that answers with reply(user_prompt)."""
+
+    def __init__(self, reply=lambda user_prompt: "Thanks for reaching out!"):
+        self.reply = reply
+        self.total_usage = {'calls': 0, 'requests': 0, 'input_tokens': 0, 'output_tokens': 0}
+
+    def generate_tweet(self, system_prompt, user_prompt, **kwargs):
+        self.total_usage['calls'] += 1
+        self.total_usage['requests'] += 1
+        return self.reply(user_prompt)
+
+
+class FakePromptBuilder:
+    """Reply prompts that pass the mention text straight through."""
+
+    def build_reply_prompt(self, text, username=None):
+        return "reply", text
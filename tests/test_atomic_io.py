@@ -0,0 +1,25 @@
+import os
+import stat
+
+from atomic_io import UMASK, atomic_write, write_json
+
+
+def mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def test_new_file_gets_default_permissions(tmp_path):
+    path = tmp_path / 'state.json'
+    write_json(str(path), {'tweets_today': 1})
+    assert mode(path) == 0o666 & ~UMASK
+
+
+def test_existing_file_keeps_its_permissions(tmp_path):
+    path = tmp_path / 'state.json'
+    path.write_text('{}')
+    os.chmod(path, 0o640)
+
+    atomic_write(str(path), '{"tweets_today": 2}')
+    assert mode(path) == 0o640
+    assert path.read_text() == '{"tweets_today": 2}'
+    assert os.listdir(tmp_path) == ['state.json']
@@ -0,0 +1,127 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from clock import VirtualClock
+
+START = datetime(2026, 1, 5, 9, 0)
+
+
+class PostingClient:
+    def __init__(self):
+        self.posts = []
+
+    def create_tweet(self, text):
+        self.posts.append(text)
+        return SimpleNamespace(data={'id': str(len(self.posts))})
+
+
+def make_bot(bot_module, clock):
+    bot = bot_module.NovaStaqTwitterBot(clock=clock)
+    bot._client = PostingClient()
+    bot._username = "test"
+    bot.install_signal_handlers = lambda: None
+    counter = iter(range(10 ** 6))
+    bot.generate_unique_tweet = lambda: f"Test tweet {next(counter)} about payments in Africa"
+    return bot
+
+
+def test_worker_waits_while_another_worker_holds_the_slot(bot_module):
+    clock = VirtualClock(START)
+    bot = make_bot(bot_module, clock)
+    bot.state_backend.claim_slot(f"{START.date().isoformat()}#0", 'other-worker')
+
+    claim = bot.state_backend.claim_slot
+    claims = []
+
+    def counting_claim(slot, worker_id, **kwargs):
+        claims.append(clock.now())
+        if len(claims) > 100:
+            pytest.fail("worker is spinning on a claimed slot")
+        return claim(slot, worker_id, **kwargs)
+
+    bot.state_backend.claim_slot = counting_claim
+    bot.run(until=START + timedelta(minutes=10))
+
+    assert 1 <= len(claims) <= 11
+    assert bot._client.posts == []
+
+
+def test_posted_but_unsaved_slot_is_recovered(bot_module):
+    clock = VirtualClock(START)
+    dead = make_bot(bot_module, clock)
+    # Died after posting slot #0, before any day state was saved
+    slot = f"{START.date().isoformat()}#0"
+    dead.state_backend.claim_slot(slot, 'dead-worker')
+    dead.state_backend.complete_slot(slot, 'dead-worker')
+
+    survivor = make_bot(bot_module, clock)
+    assert survivor.tweets_today == 1
+    assert survivor.next_tweet_at is not None
+    assert survivor.state_backend.claim_slot(f"{START.date().isoformat()}#1", 'survivor')
+
+
+def test_workers_post_each_slot_once(bot_module):
+    clock = VirtualClock(START)
+    first, second = make_bot(bot_module, clock), make_bot(bot_module, clock)
+
+    for _ in range(3):
+        # Both workers see the same count, so both go for the same slot
+        for bot in (first, second):
+            bot.load_state()
+        for bot in (first, second):
+            bot_module.WORKER_ID = f"worker-{id(bot)}"
+            bot.post_next_tweet()
+
+    posts = first._client.posts + second._client.posts
+    assert len(posts) == 3
+    first.load_state()
+    assert first.tweets_today == 3
+    assert first.state_backend.posted_slots(START.date().isoformat()) == 3
+
+
+def test_spend_is_shared_across_a_state_conflict(bot_module):
+    clock = VirtualClock(START)
+    first, second = make_bot(bot_module, clock), make_bot(bot_module, clock)
+    first.start_new_day_if_needed()
+    second.load_state()
+
+    for bot, requests in ((first, 30), (second, 20)):
+        bot.governor.begin_tweet()
+        bot.grok_client.total_usage['requests'] += requests
+        bot.governor.end_tweet()
+
+    assert first.save_state()
+    assert not second.save_state()  # conflict: reloads first's state
+    assert second.save_state()
+
+    fresh = make_bot(bot_module, clock)
+    assert fresh.governor.day['requests'] == 50
+
+
+def test_post_followed_by_a_state_conflict_counts_once(bot_module):
+    clock = VirtualClock(START)
+    first, second = make_bot(bot_module, clock), make_bot(bot_module, clock)
+    assert first.save_state()
+    second.load_state()
+    second.schedule_next_tweet()
+    assert second.save_state()  # first's next save conflicts
+
+    first.post_next_tweet()
+
+    assert first.tweets_today == 1
+    second.load_state()
+    assert second.tweets_today == 1
+    assert second.state_backend.posted_slots(START.date().isoformat()) == 1
+
+
+def test_dry_run_writes_no_state(bot_module, tmp_path):
+    (tmp_path / 'tweet_history.json').write_text('["An older tweet about payments"]')
+    before = sorted((path.name, path.stat().st_mtime_ns) for path in tmp_path.iterdir())
+
+    bot = bot_module.NovaStaqTwitterBot(dry_run=True, clock=VirtualClock(START))
+    bot.start_new_day_if_needed()
+    assert bot.save_state()
+
+    assert sorted((path.name, path.stat().st_mtime_ns) for path in tmp_path.iterdir()) == before
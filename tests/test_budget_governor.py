@@ -0,0 +1,97 @@
+from datetime import datetime
+
+from budget_governor import (BudgetGovernor, STAGE_NORMAL, STAGE_FEWER_ATTEMPTS, STAGE_CHEAP_MODEL,
+                             STAGE_CACHED_DRAFTS, STAGE_OFFLINE)
+from clock import VirtualClock
+
+from fakes import FakeGrokClient
+
+NO_LIMITS = {'requests': 0, 'tokens': 0, 'seconds': 0}
+
+
+def make_governor(clock, day_requests=100, tweet_requests=0, cheap_model='small-model'):
+    return BudgetGovernor(FakeGrokClient(), clock, dict(NO_LIMITS, requests=tweet_requests),
+                          dict(NO_LIMITS, requests=day_requests), cheap_model=cheap_model)
+
+
+def spend(governor, requests):
+    """Meter one tweet that made `requests` HTTP requests."""
+    stage = governor.begin_tweet()
+    governor.grok_client.total_usage['requests'] += requests
+    governor.end_tweet()
+    return stage
+
+
+def test_stages_follow_day_share():
+    governor = make_governor(VirtualClock(datetime(2026, 1, 5, 9)))
+    stages = []
+    for _ in range(6):
+        stages.append(governor.stage())
+        spend(governor, 20 if governor.day['requests'] < 40 else 15)
+    # 0, 20, 40, 55, 70, 85 requests used
+    assert stages == [STAGE_NORMAL, STAGE_NORMAL, STAGE_NORMAL, STAGE_FEWER_ATTEMPTS,
+                      STAGE_CHEAP_MODEL, STAGE_CACHED_DRAFTS]
+    spend(governor, 15)
+    assert governor.stage() == STAGE_OFFLINE
+
+
+def test_cheap_model_stage_is_skipped_without_a_model():
+    governor = make_governor(VirtualClock(datetime(2026, 1, 5, 9)), cheap_model=None)
+    spend(governor, 75)
+    assert governor.stage() == STAGE_FEWER_ATTEMPTS
+    assert governor.model(governor.stage(), 'big-model') == 'big-model'
+
+
+def test_model_and_attempts_per_stage():
+    governor = make_governor(VirtualClock(datetime(2026, 1, 5, 9)))
+    assert governor.model(STAGE_NORMAL, 'big-model') == 'big-model'
+    assert governor.model(STAGE_CHEAP_MODEL, 'big-model') == 'small-model'
+    assert governor.max_attempts(STAGE_NORMAL, 10) == 10
+    assert governor.max_attempts(STAGE_FEWER_ATTEMPTS, 10) == 3
+
+
+def test_tweet_limit_stops_attempts():
+    governor = make_governor(VirtualClock(datetime(2026, 1, 5, 9)), tweet_requests=5)
+    governor.begin_tweet()
+    assert governor.allow_attempt()
+    assert governor.max_retries(3) == 3
+    governor.grok_client.total_usage['requests'] += 4
+    assert governor.allow_attempt()
+    assert governor.max_retries(3) == 1
+    governor.grok_client.total_usage['requests'] += 1
+    assert not governor.allow_attempt()
+    governor.end_tweet()
+
+
+def test_day_rolls_over():
+    clock = VirtualClock(datetime(2026, 1, 5, 9))
+    governor = make_governor(clock)
+    spend(governor, 100)
+    assert governor.stage() == STAGE_OFFLINE
+    clock.advance(days=1)
+    assert governor.stage() == STAGE_NORMAL
+    assert governor.to_dict()['date'] == '2026-01-06'
+
+
+def test_unsaved_spend_survives_reload():
+    clock = VirtualClock(datetime(2026, 1, 5, 9))
+    first, second = make_governor(clock), make_governor(clock)
+    spend(first, 30)
+    spend(second, 20)
+
+    saved = first.to_dict()
+    first.saved()
+    # second's compare-and-set failed: it reloads first's totals, then saves
+    second.load(saved)
+    assert second.day['requests'] == 50
+    saved = second.to_dict()
+    second.saved()
+
+    first.load(saved)
+    assert first.day['requests'] == 50
+
+
+def test_spend_from_another_day_is_ignored():
+    governor = make_governor(VirtualClock(datetime(2026, 1, 5, 9)))
+    governor.load({'date': '2026-01-04', 'requests': 90, 'tokens': 0, 'seconds': 0})
+    assert governor.day['requests'] == 0
@@ -0,0 +1,42 @@
+import re
+from collections import Counter
+
+import pytest
+
+from fallback_pool import FallbackPool, build_candidates
+from knowledge_base import NovaStaqKnowledgeBase
+from tweet_rules import lint_tweet, is_valid_length
+
+from conftest import KNOWLEDGE_DIR
+
+
+@pytest.fixture(scope='module')
+def candidates():
+    return build_candidates(NovaStaqKnowledgeBase(KNOWLEDGE_DIR, use_bundle=False))
+
+
+def test_candidates_are_valid_and_unique(candidates):
+    assert len(candidates) > 500
+    assert len(set(candidates)) == len(candidates)
+    for text in candidates:
+        assert not lint_tweet(text), text
+        assert is_valid_length(text), text
+
+
+def test_no_candidate_only_reorders_another(candidates):
+    words = Counter(frozenset(Counter(re.findall(r'\w+', text.lower())).items()) for text in candidates)
+    assert max(words.values()) == 1
+
+
+def test_order_is_stable(candidates):
+    assert build_candidates(NovaStaqKnowledgeBase(KNOWLEDGE_DIR, use_bundle=False)) == candidates
+
+
+def test_pool_serves_unused_candidates_in_order():
+    history = {"b"}
+    pool = FallbackPool(["a", "b", "c", "d"], history)
+    assert len(pool) == 3
+    assert pool.next() == "a"
+    history.add("c")  # posted by another worker since the index was built
+    assert pool.next() == "d"
+    assert pool.next() is None
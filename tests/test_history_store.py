@@ -0,0 +1,60 @@
+from history_store import TweetHistory
+
+
+def test_membership_ignores_case_and_whitespace(tmp_path):
+    history = TweetHistory(str(tmp_path / 'history.jsonl'))
+    history.add("Velcro settles payments in seconds.", tweet_id='1')
+
+    assert "velcro  settles payments in seconds." in history
+    assert "Velcro settles payments in minutes." not in history
+    assert "" not in history
+    assert len(history) == 1
+
+
+def test_persists_across_reopen(tmp_path):
+    path = str(tmp_path / 'history.jsonl')
+    history = TweetHistory(path)
+    for i in range(50):
+        history.add(f"Tweet number {i}")
+    history.save()
+
+    reopened = TweetHistory(path)
+    assert len(reopened) == 50
+    assert "Tweet number 49" in reopened
+    assert [record['text'] for record in reopened.records()][:2] == ["Tweet number 0", "Tweet number 1"]
+
+
+def test_rebuilds_stale_index(tmp_path):
+    path = str(tmp_path / 'history.jsonl')
+    history = TweetHistory(path)
+    history.add("Saved tweet")
+    history.save()
+    history.add("Added after the index was saved")
+
+    reopened = TweetHistory(path)
+    assert "Added after the index was saved" in reopened
+    assert len(reopened) == 2
+
+
+def test_skips_torn_last_line(tmp_path):
+    path = tmp_path / 'history.jsonl'
+    history = TweetHistory(str(path))
+    history.add("Complete tweet")
+    with open(path, 'a') as f:
+        f.write('{"fp": "00ff", "text": "Half writ')
+
+    reopened = TweetHistory(str(path))
+    assert "Complete tweet" in reopened
+    assert list(reopened) == ["Complete tweet"]
+
+    reopened.add("Tweet after the crash")
+    assert list(TweetHistory(str(path))) == ["Complete tweet", "Tweet after the crash"]
+
+
+def test_imports_legacy_history(tmp_path):
+    legacy = tmp_path / 'tweet_history.json'
+    legacy.write_text('["Old tweet one", "Old tweet two"]')
+
+    history = TweetHistory(str(tmp_path / 'history.jsonl'), legacy_path=str(legacy))
+    assert "Old tweet two" in history
+    assert len(history) == 2
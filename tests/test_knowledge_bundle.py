@@ -0,0 +1,51 @@
+import json
+import os
+import pickle
+import shutil
+
+import pytest
+
+import knowledge_bundle
+from knowledge_bundle import BUNDLE_FILE, load_bundle
+
+from conftest import KNOWLEDGE_DIR
+
+
+@pytest.fixture
+def knowledge_dir(tmp_path):
+    path = tmp_path / 'knowledge'
+    shutil.copytree(KNOWLEDGE_DIR, path, ignore=shutil.ignore_patterns(BUNDLE_FILE))
+    load_bundle(str(path))
+    return path
+
+
+def saved_sources(knowledge_dir):
+    with open(knowledge_dir / BUNDLE_FILE, 'rb') as f:
+        return pickle.load(f)['sources']
+
+
+def fail(*args):
+    pytest.fail("took the slow path")
+
+
+def test_changed_source_rebuilds(knowledge_dir):
+    path = knowledge_dir / 'products.json'
+    data = json.loads(path.read_text())
+    data['products'][0]['name'] = 'Renamed'
+    path.write_text(json.dumps(data))
+
+    bundle = load_bundle(str(knowledge_dir))
+    assert 'renamed' in bundle['product_index']
+    assert saved_sources(knowledge_dir)[str(path)][1] == path.stat().st_size
+
+
+def test_touched_source_refreshes_the_manifest(knowledge_dir, monkeypatch):
+    path = knowledge_dir / 'products.json'
+    os.utime(path, ns=(path.stat().st_atime_ns, path.stat().st_mtime_ns + 10 ** 9))
+
+    monkeypatch.setattr(knowledge_bundle, 'build_bundle', fail)
+    load_bundle(str(knowledge_dir))
+    assert saved_sources(knowledge_dir)[str(path)][0] == path.stat().st_mtime_ns
+
+    monkeypatch.setattr(knowledge_bundle, '_sha256', fail)
+    assert load_bundle(str(knowledge_dir))['sources'][str(path)][0] == path.stat().st_mtime_ns
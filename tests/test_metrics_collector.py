@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from clock import VirtualClock
+from metrics_collector import MetricsCollector, FINAL_AGE
+from sampling_bandit import SamplingBandit
+from state_backend import SQLiteStateBackend
+
+POSTED = datetime(2026, 1, 5, 9, 0)
+
+
+class MetricsTwitterClient:
+    """get_tweets stand-in: every tweet has one like per lookup so far."""
+
+    def __init__(self, gone=()):
+        self.calls = []
+        self.gone = set(gone)
+
+    def get_tweets(self, ids, tweet_fields=None):
+        self.calls.append(list(ids))
+        likes = len(self.calls)
+        tweets = [SimpleNamespace(id=int(tweet_id), public_metrics={'like_count': likes, 'impression_count': 100})
+                  for tweet_id in ids if tweet_id not in self.gone]
+        return SimpleNamespace(data=tweets)
+
+
+def make_collector(count=1, gone=(), clock=None):
+    backend = SQLiteStateBackend(':memory:')
+    for i in range(count):
+        backend.history.add(f"Tweet {i} about payments", tweet_id=str(1000 + i), posted_at=POSTED.isoformat(),
+                            category='market_insights', length_type='short', product=None)
+    return MetricsCollector(MetricsTwitterClient(gone), backend.history, backend.metrics,
+                            bandit=SamplingBandit(None), clock=clock or VirtualClock(POSTED))
+
+
+def test_refresh_follows_tweet_age():
+    clock = VirtualClock(POSTED)
+    collector = make_collector(clock=clock)
+    sampled_at = []
+    while clock.now() < POSTED + FINAL_AGE + timedelta(days=2):
+        if collector.collect()['sampled']:
+            sampled_at.append(clock.now() - POSTED)
+        clock.advance(minutes=15)
+
+    gaps = [later - earlier for earlier, later in zip(sampled_at, sampled_at[1:])]
+    assert gaps == ([timedelta(minutes=15)] * 3   # first hour
+                    + [timedelta(hours=1)] * 5    # until 6 hours
+                    + [timedelta(hours=3)] * 6    # until 1 day
+                    + [timedelta(days=1)] * 6     # until 7 days
+                    + [timedelta(minutes=15)])    # final sample at 7 days
+    assert sampled_at[-1] == FINAL_AGE            # and never again
+
+
+def test_lookups_are_batched_by_100():
+    collector = make_collector(count=250)
+    stats = collector.collect()
+
+    assert [len(ids) for ids in collector.client.calls] == [100, 100, 50]
+    assert stats == {'due': 250, 'sampled': 250, 'finalized': 0, 'calls': 3}
+    assert collector.collect()['calls'] == 0  # nothing due again yet
+
+
+def test_bandit_is_fed_once_per_tweet():
+    clock = VirtualClock(POSTED)
+    collector = make_collector(count=2, gone={'1001'}, clock=clock)
+    for _ in range(4):
+        collector.collect()
+        clock.advance(days=3)
+
+    arm = collector.bandit.stats[SamplingBandit.arm_key('market_insights', 'short', None)]
+    assert arm['posts'] == 1
+    assert arm['engagement'] == len(collector.client.calls)  # likes at the final lookup
@@ -0,0 +1,82 @@
+import gzip
+import json
+
+import pytest
+import tweepy
+
+from replay import (Cassette, CassetteWriter, RecordingSession, ReplaySession, RecordingTwitterClient,
+                    ReplayTwitterClient, ReplayError)
+
+
+class FakeHTTPResponse:
+    def __init__(self, text):
+        self.status_code = 200
+        self.headers = {'Content-Type': 'application/json', 'X-Request-Id': 'abc'}
+        self.text = text
+
+
+class FakeSession:
+    def post(self, url, headers=None, json=None, timeout=None):
+        return FakeHTTPResponse('{"choices": [{"message": {"content": "%s"}}]}' % json['prompt'])
+
+
+class FakeTweepyClient:
+    def create_tweet(self, text):
+        if not text:
+            raise tweepy.TweepyException("400 Bad Request")
+        return tweepy.Response(data={'id': '1', 'text': text}, includes={}, errors=[], meta={})
+
+
+def record(path, close=True):
+    writer = CassetteWriter(path)
+    session = RecordingSession(writer, FakeSession())
+    client = RecordingTwitterClient(FakeTweepyClient(), writer)
+    for prompt in ("first", "second"):
+        session.post('https://llm.example/v1', headers={'Authorization': 'Bearer secret'}, json={'prompt': prompt})
+    client.create_tweet("Hello")
+    with pytest.raises(tweepy.TweepyException):
+        client.create_tweet("")
+    if close:
+        writer.close()
+    return writer
+
+
+@pytest.mark.parametrize('name', ['run.jsonl', 'run.jsonl.gz'])
+def test_record_then_replay(tmp_path, name):
+    path = str(tmp_path / name)
+    record(path)
+
+    cassette = Cassette(path)
+    session, client = ReplaySession(cassette), ReplayTwitterClient(cassette)
+    assert session.post('https://llm.example/v1', json={'prompt': 'first'}).json()['choices'][0]['message'] \
+        == {'content': 'first'}
+    response = session.post('https://llm.example/v1', json={'prompt': 'second'})
+    assert response.headers == {'Content-Type': 'application/json'}
+    assert client.create_tweet("Hello").data == {'id': '1', 'text': 'Hello'}
+    with pytest.raises(tweepy.TweepyException):
+        client.create_tweet("")
+    assert cassette.remaining() == {}
+    with pytest.raises(ReplayError):
+        session.post('https://llm.example/v1', json={'prompt': 'third'})
+
+
+@pytest.mark.parametrize('name', ['run.jsonl', 'run.jsonl.gz'])
+def test_killed_recording_keeps_complete_entries(tmp_path, name):
+    path = str(tmp_path / name)
+    writer = record(path, close=False)  # killed: a .gz stream has no end marker
+    if not name.endswith('.gz'):
+        writer.file.write('{"channel": "llm", "meth')  # killed mid-write
+        writer.file.flush()
+
+    cassette = Cassette(path)
+    assert cassette.remaining() == {'llm.post': 2, 'twitter.create_tweet': 2}
+    writer.close()
+
+
+def test_bot_finishes_its_recording(bot_module, tmp_path):
+    path = str(tmp_path / 'run.jsonl.gz')
+    bot = bot_module.NovaStaqTwitterBot(dry_run=True, record=path)
+    bot.run_dry(count=0)
+
+    with gzip.open(path, 'rt') as f:  # raises EOFError without the end marker
+        assert [json.loads(line)['channel'] for line in f] == ['state']
@@ -0,0 +1,112 @@
+from reply_bot import ReplyBot, MentionState, MAX_REPLY_ATTEMPTS
+
+from fakes import FakeTwitterClient, FakeGrokClient, FakePromptBuilder
+
+
+def make_bot(tmp_path, client, grok=None):
+    return ReplyBot(client=client, user_id='1', grok_client=grok or FakeGrokClient(),
+                    prompt_builder=FakePromptBuilder(), state=MentionState(str(tmp_path / 'mentions.json')),
+                    workers=2)
+
+
+def test_first_run_skips_existing_mentions(tmp_path):
+    client = FakeTwitterClient()
+    for i in range(12):
+        client.add_mention(f"old mention {i}")
+
+    make_bot(tmp_path, client).run_once()
+    assert client.tweets == []
+
+    new_id = client.add_mention("is Velcro live?")
+    make_bot(tmp_path, client).run_once()
+    assert [tweet['in_reply_to'] for tweet in client.tweets] == [new_id]
+
+
+def test_first_run_without_mentions_answers_the_next_one(tmp_path):
+    client = FakeTwitterClient()
+    make_bot(tmp_path, client).run_once()
+
+    new_id = client.add_mention("hello")
+    make_bot(tmp_path, client).run_once()
+    assert [tweet['in_reply_to'] for tweet in client.tweets] == [new_id]
+
+
+def test_answers_each_mention_once_across_pages(tmp_path):
+    client = FakeTwitterClient()
+    make_bot(tmp_path, client).run_once()
+    ids = [client.add_mention(f"question {i}") for i in range(250)]
+
+    make_bot(tmp_path, client).run_once()
+    make_bot(tmp_path, client).run_once()
+    assert sorted(tweet['in_reply_to'] for tweet in client.tweets) == sorted(ids)
+
+
+def test_skip_matches_the_exact_token(tmp_path):
+    client = FakeTwitterClient()
+    make_bot(tmp_path, client).run_once()
+    spam = client.add_mention("spam")
+    question = client.add_mention("question")
+    replies = {"spam": "SKIP.", "question": "Skipping the fees is easy: Velcro settles in seconds."}
+
+    make_bot(tmp_path, client, FakeGrokClient(lambda text: replies[text])).run_once()
+    assert [tweet['in_reply_to'] for tweet in client.tweets] == [question]
+    assert MentionState(str(tmp_path / 'mentions.json')).pending == {}
+    assert spam in MentionState(str(tmp_path / 'mentions.json')).answered
+
+
+def test_failed_reply_is_retried_without_restart(tmp_path):
+    client = FakeTwitterClient(failures=1)
+    bot = make_bot(tmp_path, client)
+    bot.run_once()
+    mention_id = client.add_mention("hello")
+
+    bot.start_workers()
+    bot.poll()
+    bot.queue.join()
+    assert client.tweets == [] and len(bot.failed) == 1
+
+    bot.retry_failed()
+    bot.stop_workers()
+    assert [tweet['in_reply_to'] for tweet in client.tweets] == [mention_id]
+    assert bot.state.pending == {}
+
+
+def test_gives_up_after_max_attempts(tmp_path):
+    client = FakeTwitterClient(failures=MAX_REPLY_ATTEMPTS)
+    bot = make_bot(tmp_path, client)
+    bot.run_once()
+    client.add_mention("hello")
+
+    bot.start_workers()
+    bot.poll()
+    for _ in range(MAX_REPLY_ATTEMPTS):
+        bot.queue.join()
+        bot.retry_failed()
+    bot.stop_workers()
+    assert client.tweets == []
+    assert bot.state.pending == {} and bot.failed == []
+
+
+def test_interrupted_post_is_not_answered_again(tmp_path):
+    client = FakeTwitterClient()
+    make_bot(tmp_path, client).run_once()
+    mention_id = client.add_mention("hello")
+
+    # Crash after create_tweet, before the mention was marked done
+    state = MentionState(str(tmp_path / 'mentions.json'))
+    bot = ReplyBot(client=client, user_id='1', grok_client=FakeGrokClient(),
+                   prompt_builder=FakePromptBuilder(), state=state)
+
+    def crash(mention_id):
+        raise SystemExit
+
+    state.mark_done = crash
+    bot.poll()
+    try:
+        bot.handle(bot.queue.get())
+    except SystemExit:
+        pass
+    assert len(client.tweets) == 1
+
+    make_bot(tmp_path, client).run_once()
+    assert [tweet['in_reply_to'] for tweet in client.tweets] == [mention_id]
@@ -0,0 +1,72 @@
+import json
+import random
+
+from sampling_bandit import SamplingBandit
+
+ARM = ('market_insights', 'short', None)
+
+
+def arm(path):
+    with open(path) as f:
+        return json.load(f)[SamplingBandit.arm_key(*ARM)]
+
+
+def test_saves_from_two_processes_are_merged(tmp_path):
+    path = str(tmp_path / 'sampling_stats.json')
+    bot = SamplingBandit(path)
+    collector = SamplingBandit(path)  # loaded before the bot's first save
+
+    bot.record_attempt(*ARM, accepted=True, api_calls=2)
+    bot.save()
+    collector.record_engagement(*ARM, engagement=42)
+    collector.save()
+    bot.record_attempt(*ARM, accepted=False, api_calls=3)
+    bot.save()
+
+    assert arm(path) == {'accepted': 1, 'rejected': 1, 'api_calls': 5, 'posts': 1, 'engagement': 42}
+    assert SamplingBandit(path).stats == bot.stats
+
+
+def test_save_twice_does_not_double_count(tmp_path):
+    path = str(tmp_path / 'sampling_stats.json')
+    bandit = SamplingBandit(path)
+    bandit.record_attempt(*ARM, accepted=True)
+    bandit.save()
+    bandit.save()
+    assert arm(path)['accepted'] == 1
+
+
+def test_failed_call_records_cost_only():
+    bandit = SamplingBandit(None)
+    bandit.record_attempt(*ARM, accepted=None, api_calls=3)
+    stats = bandit.stats[SamplingBandit.arm_key(*ARM)]
+    assert (stats['accepted'], stats['rejected'], stats['api_calls']) == (0, 0, 3)
+
+
+def test_choose_avoids_arms_that_keep_failing():
+    random.seed(1)
+    bandit = SamplingBandit(None)
+    categories = [{'name': 'good', 'weight': 1.0}, {'name': 'bad', 'weight': 1.0}]
+    for _ in range(50):
+        bandit.record_attempt('good', 'short', None, accepted=True)
+        bandit.record_attempt('bad', 'short', None, accepted=False)
+
+    picks = [bandit.choose(categories, ['short'], [])[0]['name'] for _ in range(200)]
+    assert picks.count('good') > 150
+
+
+def test_summary_reports_calls_per_accepted():
+    bandit = SamplingBandit(None)
+    bandit.record_attempt(*ARM, accepted=True, api_calls=3)
+    bandit.record_attempt(*ARM, accepted=False, api_calls=1)
+    [(key, rate, calls)] = bandit.summary()
+    assert (rate, calls) == (0.5, 4)
+
+
+def test_in_memory_bandit_writes_nothing(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    bandit = SamplingBandit(None)
+    bandit.record_attempt(*ARM, accepted=True)
+    bandit.save()
+    assert bandit.stats[SamplingBandit.arm_key(*ARM)]['accepted'] == 1
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from state_backend import get_state_backend, SQLiteStateBackend
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / 'bot_state.db')
+
+
+def test_save_day_is_compare_and_set(db_path):
+    first = SQLiteStateBackend(db_path)
+    second = SQLiteStateBackend(db_path)
+    assert first.load_day() is None and second.load_day() is None
+
+    assert first.save_day({'tweets_today': 1}, first.version)
+    assert not second.save_day({'tweets_today': 7}, second.version)
+
+    assert second.load_day() == {'tweets_today': 1}
+    assert second.save_day({'tweets_today': 2}, second.version)
+    assert first.load_day() == {'tweets_today': 2}
+
+
+def test_accounts_are_separate(db_path):
+    alice = SQLiteStateBackend(db_path, account='alice')
+    bob = SQLiteStateBackend(db_path, account='bob')
+    alice.save_day({'tweets_today': 3}, alice.version)
+    alice.history.add("Alice's tweet")
+
+    assert bob.load_day() is None
+    assert "Alice's tweet" not in bob.history
+    assert "Alice's tweet" in alice.history
+
+
+def test_slot_is_claimed_by_one_worker(db_path):
+    first = SQLiteStateBackend(db_path)
+    second = SQLiteStateBackend(db_path)
+
+    assert first.claim_slot('2026-01-05#0', 'worker-a')
+    assert first.claim_slot('2026-01-05#0', 'worker-a')  # re-claim by the owner
+    assert not second.claim_slot('2026-01-05#0', 'worker-b')
+    assert second.claim_slot('2026-01-05#1', 'worker-b')
+
+
+def test_released_slot_can_be_claimed(db_path):
+    backend = SQLiteStateBackend(db_path)
+    backend.claim_slot('2026-01-05#0', 'worker-a')
+    backend.release_slot('2026-01-05#0', 'worker-a')
+    assert backend.claim_slot('2026-01-05#0', 'worker-b')
+
+
+def test_stale_claim_is_taken_over_but_posted_slot_is_not(db_path):
+    backend = SQLiteStateBackend(db_path)
+    backend.claim_slot('2026-01-05#0', 'worker-a')
+    assert backend.claim_slot('2026-01-05#0', 'worker-b', stale_after=0)
+
+    backend.complete_slot('2026-01-05#0', 'worker-b')
+    backend.release_slot('2026-01-05#0', 'worker-b')  # no effect once posted
+    assert not backend.claim_slot('2026-01-05#0', 'worker-a', stale_after=0)
+    assert not backend.claim_slot('2026-01-05#0', 'worker-b')
+
+
+def test_claim_goes_stale_by_the_callers_clock(db_path):
+    backend = SQLiteStateBackend(db_path)
+    start = datetime(2026, 1, 5, 9)
+    backend.claim_slot('2026-01-05#0', 'worker-a', now=start)
+
+    assert not backend.claim_slot('2026-01-05#0', 'worker-b', now=start + timedelta(minutes=10))
+    assert backend.claim_slot('2026-01-05#0', 'worker-b', now=start + timedelta(minutes=16))
+
+
+def test_posted_slots(db_path):
+    backend = SQLiteStateBackend(db_path)
+    assert backend.posted_slots('2026-01-05') == 0
+
+    for slot in ('2026-01-05#0', '2026-01-05#1', '2026-01-05#2', '2026-01-06#0'):
+        backend.claim_slot(slot, 'worker-a')
+    backend.complete_slot('2026-01-05#0', 'worker-a')
+    backend.complete_slot('2026-01-05#1', 'worker-a')
+    backend.complete_slot('2026-01-06#0', 'worker-a')
+
+    assert backend.posted_slots('2026-01-05') == 2
+    assert backend.posted_slots('2026-01-06') == 1
+
+
+def test_json_backend_round_trip(tmp_path):
+    backend = get_state_backend('json', state_path=str(tmp_path / 'bot_state.json'),
+                                history_path=str(tmp_path / 'history.jsonl'))
+    assert backend.load_day() is None
+    assert backend.save_day({'tweets_today': 2}, backend.version)
+    assert backend.load_day()['tweets_today'] == 2
+    assert backend.claim_slot('2026-01-05#0', 'worker-a')
+
+
+def test_unknown_backend_url():
+    with pytest.raises(ValueError):
+        get_state_backend('postgres://localhost/bot')
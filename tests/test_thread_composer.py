@@ -0,0 +1,86 @@
+import json
+import os
+
+import pytest
+
+from thread_composer import ThreadComposer
+
+from fakes import FakeTwitterClient
+
+TWEETS = ["Hook 1/3", "Fact 2/3", "Close 3/3"]
+
+
+class Killed(BaseException):
+    """The process dying mid-post (not caught like an API error)."""
+
+
+class DyingTwitterClient(FakeTwitterClient):
+    def __init__(self, die_on):
+        super().__init__()
+        self.die_on = die_on
+
+    def create_tweet(self, text, **kwargs):
+        if text == self.die_on:
+            raise Killed()
+        return super().create_tweet(text, **kwargs)
+
+
+def make_composer(tmp_path, client):
+    return ThreadComposer(client=client, grok_client=None, prompt_builder=None, knowledge_base=None,
+                          progress_path=str(tmp_path / 'thread_progress.json'))
+
+
+def test_thread_is_posted_as_a_reply_chain(tmp_path):
+    client = FakeTwitterClient()
+    ids = make_composer(tmp_path, client).post("topic", TWEETS)
+
+    assert [tweet['text'] for tweet in client.tweets] == TWEETS
+    assert [tweet['in_reply_to'] for tweet in client.tweets] == [None] + ids[:-1]
+    assert not os.path.exists(tmp_path / 'thread_progress.json')
+
+
+def test_failed_segment_is_resumed(tmp_path):
+    client = FakeTwitterClient(failures=1)
+    composer = make_composer(tmp_path, client)
+    assert composer.post("topic", TWEETS) is None
+    assert 'sending' not in composer.load_progress()
+
+    assert len(composer.resume()) == 3
+    assert [tweet['text'] for tweet in client.tweets] == TWEETS
+
+
+def test_interrupted_segment_is_not_reposted(tmp_path):
+    client = DyingTwitterClient(die_on=TWEETS[1])
+    with pytest.raises(Killed):
+        make_composer(tmp_path, client).post("topic", TWEETS)
+    with open(tmp_path / 'thread_progress.json') as f:
+        assert json.load(f)['sending'] == 1
+
+    client.die_on = None
+    composer = make_composer(tmp_path, client)
+    assert composer.resume() is None
+    assert [tweet['text'] for tweet in client.tweets] == TWEETS[:1]
+
+    ids = composer.resume(posted_id='555')
+    assert ids[1] == '555'
+    assert client.tweets[-1] == {'id': ids[2], 'text': TWEETS[2], 'in_reply_to': '555'}
+
+
+def test_interrupted_segment_can_be_reposted(tmp_path):
+    client = DyingTwitterClient(die_on=TWEETS[1])
+    with pytest.raises(Killed):
+        make_composer(tmp_path, client).post("topic", TWEETS)
+
+    client.die_on = None
+    make_composer(tmp_path, client).resume(repost=True)
+    assert [tweet['text'] for tweet in client.tweets] == TWEETS
+
+
+def test_no_new_thread_while_one_is_in_progress(tmp_path):
+    client = FakeTwitterClient(failures=1)
+    composer = make_composer(tmp_path, client)
+    assert composer.post("first", TWEETS) is None
+
+    assert composer.post("second", ["Other 1/3", "Other 2/3", "Other 3/3"]) is None
+    assert client.tweets == []
+    assert composer.load_progress()['topic'] == "first"
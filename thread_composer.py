@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Thread composer for long-form posts.
+
+Plans a thread from a topic (hook, one knowledge fact per middle tweet,
+closing tweet), generates every segment concurrently through GrokClient with
+the whole outline as shared context, validates each with the tweet rules and
+posts the thread as a reply chain.
+
+Progress is written to thread_progress.json before the first post and
+around every post, so a thread that fails midway is resumed from the next
+segment with --resume instead of being reposted from the start. A segment is
+marked as sending before it is posted; if the process dies mid-post, --resume
+stops until told whether that segment went out (--posted-id or --repost).
+No new thread is started while one is in progress.
+
+Examples:
+    python thread_composer.py --topic "How Velcro settles cross-border payments" --product Velcro
+    python thread_composer.py --topic "Stablecoins for African merchants" --segments 4 --dry-run
+    python thread_composer.py --resume
+    python thread_composer.py --resume --posted-id 1789012345678901234
+"""
+
+import os
+import sys
+import json
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+
+from bot_loader import load_bot_module
+from tweet_rules import MAX_TWEET_LENGTH, clean_tweet, lint_tweet
+from token_budget import max_tokens_for_length
+from atomic_io import write_json
+
+load_dotenv()
+
+THREAD_PROGRESS_FILE = 'thread_progress.json'
+MIN_SEGMENTS = 3
+MAX_SEGMENTS = 10
+
+
+class ThreadComposer:
+    """
+    Plans, generates and posts tweet threads.
+    """
+
+    def __init__(self, client, grok_client, prompt_builder, knowledge_base, history=None,
+                 progress_path=THREAD_PROGRESS_FILE, workers=6, numbered=True, max_attempts=3,
+                 dry_run=False):
+        """
+        Initialize composer.
+
+        Args:
+            client: Twitter client (anything with create_tweet)
+            grok_client: GrokClient for generation
+            prompt_builder: PromptBuilder for thread segment prompts
+            knowledge_base: NovaStaqKnowledgeBase for planning facts
+            history: Tweet history to check and record segments (optional)
+            progress_path: JSON file tracking a thread being posted
+            workers: Concurrent segment generations
+            numbered: Append " i/N" to each segment
+            max_attempts: Generation attempts per segment
+            dry_run: Print the thread instead of posting it
+        """
+        self.client = client
+        self.grok_client = grok_client
+        self.prompt_builder = prompt_builder
+        self.knowledge_base = knowledge_base
+        self.history = history
+        self.progress_path = progress_path
+        self.workers = workers
+        self.numbered = numbered
+        self.max_attempts = max_attempts
+        self.dry_run = dry_run
+
+    def plan(self, topic, segments=6, product=None):
+        """
+        Outline a thread: a hook, one fact per middle segment and a close.
+
+        The thread is shortened when the knowledge base has fewer relevant
+        facts than middle segments.
+
+        Args:
+            topic: Thread topic
+            segments: Requested number of tweets
+            product: Product name to focus facts on (optional)
+
+        Returns:
+            list: Segment briefs in thread order
+        """
+        segments = max(MIN_SEGMENTS, min(MAX_SEGMENTS, segments))
+        facts = self.knowledge_base.get_relevant_snippets(
+            f"{topic} {product or ''}", product_name=product,
+            k=segments - 2, token_budget=60 * segments
+        )
+        if len(facts) < segments - 2:
+            print(f"[PLAN] Only {len(facts)} relevant facts, thread shortened to {len(facts) + 2} tweets")
+
+        outline = [f"Hook: open the thread on '{topic}' with a concrete problem or claim that makes people read on."]
+        outline += [f"Explain this point in plain words: {fact}" for fact in facts]
+        outline.append("Close: sum up what it means for users and builders, with a clear next step.")
+        return outline
+
+    def _suffix(self, index, total):
+        return f" {index + 1}/{total}" if self.numbered else ""
+
+    def generate_segment(self, topic, outline, index):
+        """
+        Generate and validate one segment.
+
+        Returns:
+            str or None: Segment text with its number suffix, or None if
+            every attempt failed validation
+        """
+        suffix = self._suffix(index, len(outline))
+        max_length = MAX_TWEET_LENGTH - len(suffix)
+        system_prompt, user_prompt = self.prompt_builder.build_thread_segment_prompt(
+            topic, outline, index, max_length=max_length
+        )
+
+        for attempt in range(self.max_attempts):
+            try:
+                text = clean_tweet(self.grok_client.generate_tweet(
+                    system_prompt, user_prompt, max_tokens=max_tokens_for_length('very_long')
+                ))
+            except Exception as e:
+                print(f"[ERROR] Segment {index + 1} (attempt {attempt + 1}): {e}")
+                continue
+
+            violations = lint_tweet(text + suffix)
+            if self.history is not None and text in self.history:
+                violations.append("Already posted")
+            if not violations:
+                return text + suffix
+            print(f"[LINT] Segment {index + 1} (attempt {attempt + 1}): {', '.join(violations)}")
+        return None
+
+    def compose(self, topic, segments=6, product=None):
+        """
+        Plan a thread and generate all segments concurrently.
+
+        Returns:
+            list or None: Segment texts in order, or None if a segment failed
+        """
+        outline = self.plan(topic, segments, product)
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(outline))) as executor:
+            tweets = list(executor.map(lambda i: self.generate_segment(topic, outline, i), range(len(outline))))
+
+        failed = [i + 1 for i, tweet in enumerate(tweets) if tweet is None]
+        if failed:
+            print(f"[ERROR] Could not generate segments {failed}")
+            return None
+        if len(set(tweets)) < len(tweets):
+            print("[ERROR] Generated thread repeats a segment")
+            return None
+        return tweets
+
+    def load_progress(self):
+        """Thread being posted, or None."""
+        try:
+            with open(self.progress_path, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def save_progress(self, progress):
+        write_json(self.progress_path, progress, indent=2)
+
+    def in_progress(self):
+        """True while a thread is partly posted (progress file exists)."""
+        return os.path.exists(self.progress_path)
+
+    def post(self, topic, tweets):
+        """
+        Post a composed thread as a reply chain.
+
+        Returns:
+            list or None: Tweet ids, or None if posting stopped midway or
+            another thread is still in progress
+        """
+        if self.dry_run:
+            for tweet in tweets:
+                print(f"[DRY RUN] {tweet}\n")
+            return []
+
+        if self.in_progress():
+            print(f"[ERROR] A thread is still in progress ({self.progress_path}), run with --resume first")
+            return None
+
+        progress = {'topic': topic, 'tweets': tweets, 'posted': []}
+        self.save_progress(progress)
+        return self._post_remaining(progress)
+
+    def resume(self, posted_id=None, repost=False):
+        """
+        Continue posting the thread recorded in the progress file.
+
+        If the process died while posting a segment, that segment may or may
+        not be out, so nothing is posted until the caller says which.
+
+        Args:
+            posted_id: Id of the interrupted segment, which did go out
+            repost: The interrupted segment did not go out: post it again
+
+        Returns:
+            list or None: Tweet ids, or None if there is nothing to resume
+            or posting stopped again
+        """
+        progress = self.load_progress()
+        if not progress:
+            print("[RESUME] No thread in progress")
+            return None
+        tweets, posted = progress['tweets'], progress['posted']
+        print(f"[RESUME] '{progress['topic']}': {len(posted)}/{len(tweets)} posted")
+
+        if progress.get('sending') is not None:
+            index = progress['sending']
+            if posted_id:
+                posted.append(str(posted_id))
+                self._record(tweets, index, posted)
+            elif not repost:
+                print(f"[WARN] Segment {index + 1}/{len(tweets)} may already be posted (interrupted post)")
+                print("[INFO] Check the account, then resume with --posted-id <tweet id> or --repost")
+                return None
+            del progress['sending']
+            self.save_progress(progress)
+        return self._post_remaining(progress)
+
+    def _post_remaining(self, progress):
+        tweets, posted = progress['tweets'], progress['posted']
+        for index in range(len(posted), len(tweets)):
+            progress['sending'] = index
+            self.save_progress(progress)
+            try:
+                kwargs = {'in_reply_to_tweet_id': posted[-1]} if posted else {}
+                response = self.client.create_tweet(text=tweets[index], **kwargs)
+            except Exception as e:
+                del progress['sending']
+                self.save_progress(progress)
+                print(f"[ERROR] Segment {index + 1}/{len(tweets)} not posted: {e}")
+                print(f"[INFO] Run with --resume to continue from segment {index + 1}")
+                return None
+
+            posted.append(str(response.data['id']))
+            del progress['sending']
+            self.save_progress(progress)
+            self._record(tweets, index, posted)
+
+        os.remove(self.progress_path)
+        print(f"[THREAD] Posted {len(posted)} tweets, first id {posted[0]}")
+        return posted
+
+    def _record(self, tweets, index, posted):
+        """Add a posted segment to history."""
+        if self.history is not None:
+            self.history.add(tweets[index], tweet_id=posted[-1], thread_id=posted[0])
+            self.history.save()
+        print(f"[POSTED] {index + 1}/{len(tweets)} {tweets[index]}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Compose and post a tweet thread")
+    parser.add_argument('--topic', help="Thread topic")
+    parser.add_argument('--segments', type=int, default=6,
+                        help=f"Tweets in the thread ({MIN_SEGMENTS}-{MAX_SEGMENTS})")
+    parser.add_argument('--product', help="Focus product for knowledge facts")
+    parser.add_argument('--workers', type=int, default=6,
+                        help="Concurrent segment generations")
+    parser.add_argument('--no-numbers', action='store_true',
+                        help="Do not append i/N to segments")
+    parser.add_argument('--resume', action='store_true',
+                        help="Continue posting an interrupted thread")
+    parser.add_argument('--posted-id', metavar='TWEET_ID',
+                        help="With --resume: id of the segment that was being posted, which did go out")
+    parser.add_argument('--repost', action='store_true',
+                        help="With --resume: the segment that was being posted did not go out, post it again")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="Generate the thread without posting it")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if not args.resume and not args.topic:
+        print("[ERROR] --topic is required (or --resume)")
+        sys.exit(1)
+
+    bot_module = load_bot_module()
+    if not args.resume and not bot_module.HF_TOKEN:
+        print("[ERROR] Missing Hugging Face API token!")
+        sys.exit(1)
+
+    bot = bot_module.NovaStaqTwitterBot(dry_run=args.dry_run)
+    composer = ThreadComposer(
+        client=None if args.dry_run else bot.client,
+        grok_client=bot.grok_client,
+        prompt_builder=bot.prompt_builder,
+        knowledge_base=bot.knowledge_base,
+        history=bot.history,
+        workers=args.workers,
+        numbered=not args.no_numbers,
+        dry_run=args.dry_run
+    )
+
+    if args.resume:
+        result = composer.resume(posted_id=args.posted_id, repost=args.repost)
+    elif composer.in_progress() and not args.dry_run:
+        print(f"[ERROR] A thread is still in progress ({composer.progress_path}), run with --resume first")
+        result = None
+    else:
+        tweets = composer.compose(args.topic, args.segments, args.product)
+        result = composer.post(args.topic, tweets) if tweets else None
+    sys.exit(0 if result is not None else 1)
@@ -0,0 +1,107 @@
+from tweet_rules import LENGTH_RANGES, MAX_TWEET_LENGTH
+
+
+class TokenEstimator:
+    """
+    Calibrated token estimator.
+
+    Starts from a characters-per-token ratio typical of English text for
+    Llama-family tokenizers and refines it from the prompt token counts the
+    API reports, so estimates track the model actually in use without
+    shipping a tokenizer.
+    """
+
+    def __init__(self, chars_per_token=4.0, smoothing=0.1):
+        """
+        Initialize estimator.
+
+        Args:
+            chars_per_token: Initial characters-per-token ratio
+            smoothing: Weight of each new observation (exponential moving average)
+        """
+        self.chars_per_token = chars_per_token
+        self.smoothing = smoothing
+        self.observations = 0
+
+    def estimate(self, text):
+        """Estimate the token count of a text."""
+        if not text:
+            return 0
+        return max(1, round(len(text) / self.chars_per_token))
+
+    def calibrate(self, num_chars, actual_tokens):
+        """
+        Update the ratio from an API-reported token count.
+
+        Args:
+            num_chars: Characters sent
+            actual_tokens: Tokens the API reported for them
+        """
+        if num_chars <= 0 or actual_tokens <= 0:
+            return
+        observed = num_chars / actual_tokens
+        if self.observations == 0:
+            self.chars_per_token = observed
+        else:
+            self.chars_per_token += self.smoothing * (observed - self.chars_per_token)
+        self.observations += 1
+
+
+# Shared estimator, calibrated by GrokClient as responses come in
+estimator = TokenEstimator()
+
+
+def estimate_tokens(text):
+    """Estimate the token count of a text with the shared estimator."""
+    return estimator.estimate(text)
+
+
+def max_tokens_for_length(length_type, headroom=1.3, minimum=24):
+    """
+    Output token cap for a requested tweet length.
+
+    Allows some headroom over the upper character bound so the model is not
+    cut off mid-sentence, while keeping short requests from paying for a
+    full-size completion.
+
+    Args:
+        length_type: Length type from LENGTH_RANGES
+        headroom: Multiplier over the estimated token count of the max length
+        minimum: Lower bound on the cap
+
+    Returns:
+        int: max_tokens for the API request
+    """
+    _, max_chars = LENGTH_RANGES.get(length_type, (0, MAX_TWEET_LENGTH))
+    return max(minimum, int(max_chars / estimator.chars_per_token * headroom) + 8)
+
+
+def fit_sections(sections, budget):
+    """
+    Drop optional prompt sections until the prompt fits a token budget.
+
+    Args:
+        sections: List of (text, drop_priority) tuples in prompt order;
+            drop_priority None means required, lower numbers drop first
+        budget: Maximum estimated tokens, or None for no limit
+
+    Returns:
+        tuple: (kept section texts in order, list of dropped section indices)
+    """
+    kept = list(range(len(sections)))
+    dropped = []
+    if budget is None:
+        return [text for text, _ in sections], dropped
+
+    droppable = sorted(
+        (priority, i) for i, (_, priority) in enumerate(sections) if priority is not None
+    )
+    total = sum(estimate_tokens(text) for text, _ in sections)
+    for _, i in droppable:
+        if total <= budget:
+            break
+        total -= estimate_tokens(sections[i][0])
+        kept.remove(i)
+        dropped.append(i)
+
+    return [sections[i][0] for i in kept], dropped
@@ -0,0 +1,118 @@
+import re
+
+
+MIN_TWEET_LENGTH = 50
+MAX_TWEET_LENGTH = 280
+
+# Target character ranges per length type (matches PromptBuilder length specs)
+LENGTH_RANGES = {
+    'very_short': (50, 100),
+    'short': (100, 150),
+    'medium': (150, 200),
+    'long': (200, 250),
+    'very_long': (250, 280),
+}
+LENGTH_TYPES = list(LENGTH_RANGES)
+
+EMOJI_PATTERN = re.compile("["
+    u"\U0001F600-\U0001F64F"  # emoticons
+    u"\U0001F300-\U0001F5FF"  # symbols & pictographs
+    u"\U0001F680-\U0001F6FF"  # transport & map
+    u"\U0001F1E0-\U0001F1FF"  # flags
+    u"\U00002700-\U000027BF"  # dingbats
+    u"\U0001F900-\U0001F9FF"  # supplemental symbols
+    "]+", flags=re.UNICODE)
+BULLET_PATTERN = re.compile(r'^[-•]\s*', flags=re.MULTILINE)
+HASHTAG_PATTERN = re.compile(r'(?<!\w)#\w+')
+AI_PHRASE_PATTERN = re.compile(
+    r"\b(excited to (announce|share)|thrilled to (announce|share)|game[- ]changer|"
+    r"revolutioniz\w*|in today's (fast-paced|digital) world)\b",
+    flags=re.IGNORECASE)
+
+
+def clean_tweet(tweet):
+    """
+    Clean API output: remove quotes, excess whitespace, emojis.
+
+    Args:
+        tweet: Raw tweet from API
+
+    Returns:
+        str: Cleaned tweet
+    """
+    if not tweet:
+        return ""
+
+    # Remove surrounding quotes
+    tweet = tweet.strip('"\'')
+
+    # Remove emojis
+    tweet = EMOJI_PATTERN.sub('', tweet)
+
+    # Remove bullet points and dashes at start of lines
+    tweet = BULLET_PATTERN.sub('', tweet)
+
+    # Normalize whitespace
+    tweet = ' '.join(tweet.split())
+
+    return tweet.strip()
+
+
+def is_valid_length(tweet):
+    """Check a cleaned tweet against the posting length limits."""
+    return bool(tweet) and MIN_TWEET_LENGTH <= len(tweet) <= MAX_TWEET_LENGTH
+
+
+def lint_tweet(tweet):
+    """
+    Check a cleaned tweet against the brand voice rules.
+
+    Args:
+        tweet: Cleaned tweet text
+
+    Returns:
+        list: Violation descriptions (empty if the tweet is clean)
+    """
+    violations = []
+    if not tweet:
+        return ["Empty tweet"]
+    if len(tweet) < MIN_TWEET_LENGTH:
+        violations.append(f"Too short ({len(tweet)} chars)")
+    if len(tweet) > MAX_TWEET_LENGTH:
+        violations.append(f"Too long ({len(tweet)} chars)")
+    if EMOJI_PATTERN.search(tweet):
+        violations.append("Contains emojis")
+    if HASHTAG_PATTERN.search(tweet):
+        violations.append("Contains hashtags")
+    if AI_PHRASE_PATTERN.search(tweet):
+        violations.append("Contains AI/hype phrasing")
+    return violations
+
+
+def score_tweet(tweet, length_type=None):
+    """
+    Heuristic quality score for ranking drafts.
+
+    Rewards hitting the requested length range and concrete content
+    (numbers, named products), penalizes rule violations.
+
+    Args:
+        tweet: Cleaned tweet text
+        length_type: Requested length type, if any
+
+    Returns:
+        float: Score between 0.0 and 1.0
+    """
+    if not tweet:
+        return 0.0
+
+    score = 0.5
+    low, high = LENGTH_RANGES.get(length_type, (MIN_TWEET_LENGTH, MAX_TWEET_LENGTH))
+    if low <= len(tweet) <= high:
+        score += 0.2
+    if re.search(r'\d', tweet):
+        score += 0.15
+    if re.search(r'\b(Velcro|BitNova|Stakepadi|Tsara|Criptpay|Novastaq)\b', tweet):
+        score += 0.15
+    score -= 0.25 * len(lint_tweet(tweet))
+    return max(0.0, min(1.0, score))